@@ -0,0 +1,122 @@
+"""
+Tiempo y memoria pico de validate_existence (columnar) frente al loop
+original con iterrows() + row.to_dict(). Verifica que error_type,
+suggestion, fac_type y distance_meters coincidan.
+
+La memoria pico se mide con tracemalloc (asignaciones de Python y NumPy;
+las de GEOS no se cuentan).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_existence.py --sizes 10000 100000 1000000 --legacy-max 100000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loader import validate_pois_within_tile
+from projection import project_tile
+from validate_existence import validate_existence, MAX_DIST_METERS, VALID_FAC_TYPES
+from synthetic import make_tile_polygon, make_streets_nav, make_pois
+
+
+def legacy_validate_existence(loader_data):
+    # Loop original, solo como referencia
+    project_tile(loader_data)
+    pois = loader_data["pois"].copy()
+    pois_m = loader_data["pois_m"].to_numpy()
+    streets = loader_data["streets_nav"]
+    streets_m = streets.set_geometry(loader_data["streets_nav_m"])
+    multig_links = streets_m[streets["MULTIDIGIT"] == "Y"].set_index("link_id")
+
+    results = []
+    for pos, (_, row) in enumerate(pois.iterrows()):
+        link_id = row.get("LINK_ID")
+        poi_geom = row.geometry
+        fac_type = int(row.get("FAC_TYPE", -1)) if not pd.isna(row.get("FAC_TYPE")) else -1
+        distance = None
+        error_type = "UNDEFINED"
+        suggestion = ""
+        if pd.isna(link_id) or poi_geom is None or poi_geom.is_empty:
+            error_type = "INVALID_GEOMETRY"
+            suggestion = "Missing geometry or LINK_ID"
+        elif link_id not in multig_links.index:
+            error_type = "NOT_MULTIDIGIT"
+            suggestion = "Associated link is not MULTIDIGIT"
+        else:
+            link_geom = multig_links.loc[link_id].geometry
+            try:
+                distance = pois_m[pos].distance(link_geom)
+                if distance <= MAX_DIST_METERS:
+                    if fac_type in VALID_FAC_TYPES:
+                        error_type = "LEGITIMATE_EXCEPTION"
+                        suggestion = f"Valid FAC_TYPE {fac_type} near MULTIDIGIT (dist {distance:.2f}m)"
+                    else:
+                        error_type = "TOO_CLOSE_INVALID_TYPE"
+                        suggestion = f"FAC_TYPE {fac_type} is not valid for legit exception (dist {distance:.2f}m)"
+                else:
+                    error_type = "TOO_FAR_FROM_LINK"
+                    suggestion = f"POI is {distance:.2f}m from MULTIDIGIT link"
+            except Exception as e:
+                error_type = "DISTANCE_ERROR"
+                suggestion = f"Distance calc failed: {str(e)}"
+        results.append({**row.to_dict(), "fac_type": fac_type, "distance_meters": distance,
+                        "error_type": error_type, "suggestion": suggestion})
+    return gpd.GeoDataFrame(results, geometry="geometry", crs=pois.crs)
+
+
+def measure(fn, tile_data):
+    # Tiempo sin tracemalloc (lo hace varias veces más lento); memoria en una segunda corrida
+    t0 = time.perf_counter()
+    out = fn(tile_data)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(tile_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="No correr el loop original por encima de este número de POIs")
+    args = parser.parse_args()
+
+    print(f"{'POIs':>9} {'legacy (s)':>11} {'legacy MB':>10} {'vector (s)':>11} {'vector MB':>10}")
+    for n in args.sizes:
+        tile_geom = make_tile_polygon()
+        nav = make_streets_nav(max(1, n // 10))
+        pois = validate_pois_within_tile(make_pois(nav, n), tile_geom, nav)
+        # Separar ~1/3 de los POIs de su link para tener los tres casos de distancia
+        far = np.arange(n) % 3 == 0
+        pois.loc[far, "geometry"] = pois.geometry[far].translate(xoff=0.0001)
+        pois.loc[np.arange(n) % 50 == 0, "FAC_TYPE"] = np.nan
+        tile_data = {"tile_id": 1, "pois": pois, "streets_nav": nav, "tile_geom": tile_geom}
+        project_tile(tile_data)
+
+        fast, t_fast, mb_fast = measure(validate_existence, tile_data)
+        if n > args.legacy_max:
+            print(f"{n:>9} {'-':>11} {'-':>10} {t_fast:>11.3f} {mb_fast:>10.1f}")
+            continue
+
+        slow, t_slow, mb_slow = measure(legacy_validate_existence, tile_data)
+        for col in ["error_type", "suggestion", "fac_type"]:
+            assert (fast[col].to_numpy() == slow[col].to_numpy()).all(), col
+        assert np.allclose(fast["distance_meters"].to_numpy(dtype=float),
+                           slow["distance_meters"].to_numpy(dtype=float), equal_nan=True)
+        print(f"{n:>9} {t_slow:>11.3f} {mb_slow:>10.1f} {t_fast:>11.3f} {mb_fast:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
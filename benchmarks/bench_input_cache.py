@@ -0,0 +1,56 @@
+"""
+Tiempos de lectura de STREETS_NAV / NAMING: GeoJSON vs caché GeoParquet.
+
+Para cada ruta se reporta el arranque en frío (primera lectura; en el caché
+incluye parsear el GeoJSON y escribir el parquet) y en caliente (lectura
+siguiente).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_input_cache.py --sizes 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from tile_cache import read_streets_nav, read_naming
+from synthetic import make_streets_nav, make_naming
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'links':>8} {'archivo':>7} {'geojson frío':>13} {'geojson cal.':>13} "
+          f"{'caché frío':>11} {'caché cal.':>11}")
+
+    for n in args.sizes:
+        nav = make_streets_nav(n)
+        naming = make_naming(nav)
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, gdf, reader in [("NAV", nav, read_streets_nav), ("NAMING", naming, read_naming)]:
+                path = os.path.join(tmp, f"{label}.geojson")
+                gdf.to_file(path, driver="GeoJSON")
+
+                geo_cold = timed(reader, path, use_cache=False)
+                geo_warm = timed(reader, path, use_cache=False)
+                cache_cold = timed(reader, path)
+                cache_warm = timed(reader, path)
+
+                print(f"{n:>8} {label:>7} {geo_cold:>12.3f}s {geo_warm:>12.3f}s "
+                      f"{cache_cold:>10.3f}s {cache_warm:>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
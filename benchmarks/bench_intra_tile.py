@@ -0,0 +1,97 @@
+"""
+Compara los validadores de un solo tile corriendo en este proceso contra el
+modo paralelo dentro del tile (tile_shards.py: POIs de validate_poi_side y
+validate_existence, y grupos de ST_NAME de validate_multidigit repartidos
+entre --tile-workers procesos). Verifica que las salidas sean idénticas y
+reporta el mejor tiempo de cada modo (la primera repetición en paralelo
+incluye arrancar el pool; con --repeat 1 queda dentro de la medición).
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_intra_tile.py --pois 100000 1000000 --tile-workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from loader import load_tile
+from validate_slide import find_side_errors
+from validate_existence import validate_existence
+from validate_multidigit import validate_multidigit
+from synthetic import generate_dataset
+from result_writer import flush_writes
+import config
+
+VALIDATORS = {
+    "validate_poi_side": find_side_errors,
+    "validate_existence": validate_existence,
+    "validate_multidigit": validate_multidigit,
+}
+
+
+def run_validators(tile_data, workers, shard_min, repeat):
+    """
+    {nombre: (salida, mejor tiempo)} con config.TILE_WORKERS = workers.
+    """
+    config.set_tile_workers(workers, shard_min=shard_min)
+    results = {}
+    for name, fn in VALIDATORS.items():
+        times = []
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                out = fn(dict(tile_data))
+                times.append(time.perf_counter() - t0)
+                flush_writes()
+        results[name] = (out, min(times))
+    return results
+
+
+def same_output(a, b):
+    if isinstance(a, list):
+        return a == b
+    return a.drop(columns="geometry").equals(b.drop(columns="geometry")) and a.geometry.equals(b.geometry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validadores de un tile: secuencial vs repartido entre procesos")
+    parser.add_argument("--pois", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--streets", type=int, default=120)
+    parser.add_argument("--tile-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--shard-min", type=int, default=config.TILE_SHARD_MIN)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    previous_output_dir = config.OUTPUT_DIR
+    for n_pois in args.pois:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "data")
+            (tile_id,) = generate_dataset(data_dir, n_tiles=1, n_streets=args.streets, n_pois=n_pois)
+            config.set_output_dir(os.path.join(tmp, "outputs"))
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    tile_data = load_tile(tile_id, data_dir, export_errors=False)
+                print(f"[INFO] {len(tile_data['pois'])} POIs, {len(tile_data['streets_nav'])} links, "
+                      f"{args.tile_workers} procesos (CPUs: {os.cpu_count()})")
+                sequential = run_validators(tile_data, 1, args.shard_min, args.repeat)
+                parallel = run_validators(tile_data, args.tile_workers, args.shard_min, args.repeat)
+            finally:
+                config.set_tile_workers(1)
+                config.set_output_dir(previous_output_dir)
+
+        for name in VALIDATORS:
+            (out_1, t_1), (out_n, t_n) = sequential[name], parallel[name]
+            assert same_output(out_1, out_n), f"{name}: la salida cambia con {args.tile_workers} procesos"
+            print(f"  {name:<22} 1 proceso: {t_1:8.3f}s   {args.tile_workers} procesos: {t_n:8.3f}s   "
+                  f"speedup: {t_1 / t_n:5.2f}x   salida idéntica")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Tabla de atributos por link (link_attributes.py): costo de construirla sin
+caché, con el caché completo (corrida siguiente) y con una parte de los links
+modificados, frente a reproyectar y derivar cada vez como antes. Verifica que
+la tabla coincida con los cálculos escalares originales (normalize_line_geometry,
+get_reference_node_metric, longitudes) link por link.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_link_attributes.py --links 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import geopandas as gpd
+import shapely
+from shapely.geometry import LineString, MultiLineString
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from link_attributes import load_link_attributes
+from link_store import line_reference_first
+from projection import utm_crs_for
+from validate_slide import get_reference_node_metric
+from synthetic import make_streets_nav
+
+
+def normalize_line_geometry(geom):
+    # Normalización original de validate_multidigit (una geometría), solo como referencia
+    if isinstance(geom, LineString):
+        return geom
+    if isinstance(geom, MultiLineString):
+        coords = []
+        for part in geom.geoms:
+            coords.extend(part.coords)
+        return LineString(coords) if coords else None
+    return None
+
+
+def with_multilines(lines, fraction, seed=0):
+    """
+    Parte una fracción de los links en dos (MultiLineString) por su punto medio.
+    """
+    rng = np.random.default_rng(seed)
+    lines = lines.copy()
+    for i in rng.choice(len(lines), size=int(len(lines) * fraction), replace=False).tolist():
+        coords = list(lines[i].coords)
+        mid = lines[i].interpolate(0.5, normalized=True).coords[0]
+        lines[i] = MultiLineString([coords[:1] + [mid], [mid] + coords[1:]])
+    return lines
+
+
+def derive_legacy(lines, crs):
+    # Lo que se hacía por corrida: reproyectar, normalizar fila por fila y tomar nodos
+    lines_m = gpd.GeoSeries(lines, crs="EPSG:4326").to_crs(crs)
+    line_m = lines_m.apply(normalize_line_geometry).to_numpy()
+    return lines_m.to_numpy(), line_m, line_reference_first(lines)
+
+
+def check(attrs, lines, crs):
+    lines_m, line_m, ref_first = derive_legacy(lines, crs)
+    assert shapely.equals_exact(attrs.lines_m, lines_m, tolerance=0).all(), "geometrías métricas distintas"
+    assert shapely.equals_exact(attrs.line_m, line_m, tolerance=0).all(), "normalización distinta"
+    assert np.array_equal(attrs.length_m, shapely.length(line_m)), "longitudes distintas"
+    assert np.array_equal(attrs.ref_first, ref_first), "nodo de referencia distinto"
+    for i in np.flatnonzero(attrs.simple).tolist():
+        ref, non_ref = get_reference_node_metric(lines[i], lines_m[i])
+        assert tuple(attrs.ref_m[i]) == ref and tuple(attrs.non_ref_m[i]) == non_ref, f"nodos distintos en {i}"
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atributos por link: sin caché, con caché y con cambios parciales")
+    parser.add_argument("--links", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--multi", type=float, default=0.02, help="fracción de links MultiLineString")
+    parser.add_argument("--changed", type=float, default=0.01, help="fracción de links modificados")
+    args = parser.parse_args()
+
+    print(f"{'links':>8} {'legacy':>9} {'sin caché':>10} {'con caché':>10} {'cambios':>9}")
+    for n in args.links:
+        nav = make_streets_nav(n)
+        lines = with_multilines(np.asarray(nav.geometry.array, dtype=object), args.multi)
+        minx, miny, maxx, maxy = shapely.total_bounds(lines)
+        crs = utm_crs_for((minx + maxx) / 2, (miny + maxy) / 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, ".cache", "SREETS_NAV_1.links.npz")
+            _, t_legacy = timed(derive_legacy, lines, crs)
+            cold, t_cold = timed(load_link_attributes, lines, crs, cache_path)
+            warm, t_warm = timed(load_link_attributes, lines, crs, cache_path)
+            check(cold, lines, crs)
+            check(warm, lines, crs)
+
+            # Una fracción de los links se mueve: solo esos se reproyectan
+            changed = lines.copy()
+            moved = np.arange(0, n, max(int(1 / args.changed), 1))
+            changed[moved] = shapely.transform(changed[moved], lambda xy: xy + 1e-6)
+            partial, t_partial = timed(load_link_attributes, changed, crs, cache_path)
+            check(partial, changed, crs)
+
+        print(f"{n:>8} {t_legacy:>8.3f}s {t_cold:>9.3f}s {t_warm:>9.3f}s {t_partial:>8.3f}s   tabla idéntica")
+
+
+if __name__ == "__main__":
+    main()
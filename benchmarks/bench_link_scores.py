@@ -0,0 +1,87 @@
+"""
+Score de los pares N–Y de validate_multidigit: score_link fila por fila
+(merged.iloc, un score por link distinto y un promedio por par en Python)
+contra score_links en bloque más el promedio por índices. Verifica que los
+scores sean idénticos y mide el costo con --pairs pares al azar.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_link_scores.py --links 10000 100000 --pairs 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from validate_multidigit import named_links, score_links
+from synthetic import make_tile_polygon, make_streets_nav, make_naming
+
+
+def score_link(row, min_length=20):
+    # Score original de validate_multidigit (un link, fila por fila), solo como referencia
+    s = 0
+    if row.get("DIVIDER") == "Y":
+        s += 2
+    if str(row.get("FUNC_CLASS", "5")).strip() not in ("5", ""):
+        s += 1
+    if str(row.get("LANE_CAT", "1")).strip() != "1":
+        s += 1
+    if row["length_m"] > min_length:
+        s += 1
+    if str(row.get("SPEED_CAT", "0")).isdigit() and int(row["SPEED_CAT"]) >= 5:
+        s += 1
+    if row.get("TOLLWAY") == "Y":
+        s += 1
+    if row.get("URBAN") == "N":
+        s += 0.5
+    return s
+
+
+def rowwise_pair_scores(merged, link_a, link_b):
+    # Versión anterior: score_link por link distinto y promedio por par
+    scores = {}
+    for pos in np.union1d(link_a, link_b).tolist():
+        scores[pos] = score_link(merged.iloc[pos])
+    return np.array([(scores[a] + scores[b]) / 2 for a, b in zip(link_a.tolist(), link_b.tolist())], dtype=float)
+
+
+def batched_pair_scores(merged, link_a, link_b):
+    scores = score_links(merged)
+    return (scores[link_a] + scores[link_b]) / 2
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scores de pares: fila por fila vs en bloque")
+    parser.add_argument("--links", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--pairs", type=int, default=1_000_000, help="pares al azar por tile")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'links':>8} {'pares':>9} {'fila por fila':>14} {'en bloque':>10} {'speedup':>8}")
+    for n in args.links:
+        nav = make_streets_nav(n)
+        tile_data = {"tile_id": 1, "streets_nav": nav, "naming": make_naming(nav), "tile_geom": make_tile_polygon()}
+        merged = named_links(tile_data)
+        link_a = rng.integers(0, len(merged), args.pairs)
+        link_b = rng.integers(0, len(merged), args.pairs)
+
+        rowwise, t_row = timed(rowwise_pair_scores, merged, link_a, link_b)
+        batched, t_batch = timed(batched_pair_scores, merged, link_a, link_b)
+        assert np.array_equal(rowwise, batched), "los scores cambian"
+        print(f"{n:>8} {args.pairs:>9} {t_row:>13.3f}s {t_batch:>9.3f}s {t_row / t_batch:>7.0f}x   scores idénticos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compara find_suspicious_pairs (pares de links, ángulo de la cuerda) contra
+find_suspicious_chain_pairs (grafo de links, cadenas y rumbos por segmento)
+sobre una retícula sintética más avenidas curvas: una calzada es un solo
+link en arco (MULTIDIGIT=N) y la opuesta son varios links cortos (Y).
+Reporta cuántas avenidas curvas encuentra cada método, el total de pares y
+los tiempos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_multidigit_chains.py --streets 40 120 --curves 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from vector_multidigit_check import find_suspicious_pairs, find_suspicious_chain_pairs
+from projection import utm_crs_for
+from synthetic import make_grid_streets, ORIGIN
+
+# Grados por metro (aprox.) cerca del origen sintético
+DEG_PER_M = 1 / 111_000
+
+
+def make_curved_avenues(n_curves, radius_m=300, gap_m=20, vertices=40, origin=ORIGIN,
+                        first_link_id=900_000_000):
+    """
+    n_curves avenidas en arco de 60–150 grados. Calzada exterior: un solo link N
+    circulando en un sentido; interior: 2–4 links Y en sentido contrario.
+    """
+    rows = []
+    link_id = first_link_id
+    for k in range(n_curves):
+        cx = origin[0] + (k % 10) * 3 * radius_m * DEG_PER_M
+        cy = origin[1] + (k // 10) * 3 * radius_m * DEG_PER_M
+        sweep_deg, pieces = 60 + (37 * k) % 91, 2 + k % 3
+        theta = np.radians(np.linspace(0, sweep_deg, vertices))
+        name = f"CURVA {k}"
+        for radius, md, parts in ((radius_m + gap_m, "N", 1), (radius_m, "Y", pieces)):
+            x = cx + radius * DEG_PER_M * np.cos(theta)
+            y = cy + radius * DEG_PER_M * np.sin(theta)
+            bounds = np.linspace(0, vertices - 1, parts + 1).round().astype(int)
+            for p in range(parts):
+                coords = np.column_stack([x, y])[bounds[p]:bounds[p + 1] + 1]
+                start, end = coords[0], coords[-1]
+                start_is_ref = (start[1] < end[1]) or (start[1] == end[1] and start[0] <= end[0])
+                # Exterior hacia el final del arco, interior hacia el inicio
+                towards_end = md == "N"
+                rows.append({
+                    "link_id": link_id, "ST_NAME": name, "MULTIDIGIT": md, "DIVIDER": "Y",
+                    "DIR_TRAVEL": "F" if towards_end == start_is_ref else "T",
+                    "FUNC_CLASS": "2", "LANE_CAT": "2",
+                    "geometry": shapely.LineString(coords),
+                })
+                link_id += 1
+    return gpd.GeoDataFrame(rows, geometry="geometry", crs="EPSG:4326")
+
+
+def build_merged(n_streets, n_curves):
+    nav, naming = make_grid_streets(n_streets, segments_per_street=max(n_streets // 2, 1))
+    grid = nav.merge(pd.DataFrame({"link_id": naming["link_id"], "ST_NAME": naming["ST_NAME"]}), on="link_id")
+    curves = make_curved_avenues(n_curves)
+    merged = gpd.GeoDataFrame(pd.concat([grid, curves], ignore_index=True), geometry="geometry", crs="EPSG:4326")
+    merged["geometry_ll"] = merged.geometry.array
+    minx, miny, maxx, maxy = merged.total_bounds
+    return merged.to_crs(utm_crs_for((minx + maxx) / 2, (miny + maxy) / 2))
+
+
+def curves_found(pairs):
+    return len({p["st_name"] for p in pairs if p["st_name"].startswith("CURVA")})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pares de links vs cadenas para MULTIDIGIT")
+    parser.add_argument("--streets", type=int, nargs="+", default=[40, 120])
+    parser.add_argument("--curves", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for n_streets in args.streets:
+        merged = build_merged(n_streets, args.curves)
+        print(f"[INFO] {n_streets} calles + {args.curves} avenidas curvas: {len(merged)} links")
+        for label, fn in (("pares de links", find_suspicious_pairs), ("cadenas", find_suspicious_chain_pairs)):
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                pairs = fn(merged, 0)
+                times.append(time.perf_counter() - t0)
+            print(f"  {label:<15} {min(times):8.3f}s  pares={len(pairs):6d}  "
+                  f"curvas encontradas={curves_found(pairs)}/{args.curves}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compara vector_multidigit_check.find_suspicious_pairs (STRtree + arreglos)
+contra el loop i<j original sobre una retícula sintética. Verifica que los
+suspicious_pairs sean idénticos y reporta tiempos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_multidigit_pairs.py --streets 10 30
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from vector_multidigit_check import find_suspicious_pairs, is_parallel_and_within_distance
+from projection import utm_crs_for
+from synthetic import make_grid_streets
+
+
+def legacy_pairs(merged, tile_id):
+    # Loop original de find_multidigit_errors, solo como referencia
+    street_groups = merged.groupby("ST_NAME")
+    suspicious_pairs = []
+    for st_name, group in street_groups:
+        group = group.reset_index(drop=True)
+        for i in range(len(group)):
+            line1 = group.loc[i].geometry
+            link1 = group.loc[i].link_id
+            m1 = group.loc[i]["MULTIDIGIT"]
+            d1 = group.loc[i]["DIVIDER"]
+            len1 = line1.length
+            for j in range(i + 1, len(group)):
+                line2 = group.loc[j].geometry
+                link2 = group.loc[j].link_id
+                m2 = group.loc[j]["MULTIDIGIT"]
+                d2 = group.loc[j]["DIVIDER"]
+                len2 = line2.length
+                if (len1 < 40 or len2 < 40) and not ("Y" in (d1, d2)):
+                    continue
+                if is_parallel_and_within_distance(line1, line2):
+                    if m1 == "N" or m2 == "N":
+                        suspicious_pairs.append({
+                            "tile_id": tile_id,
+                            "link1": int(link1),
+                            "link2": int(link2),
+                            "st_name": st_name,
+                            "MULTIDIGIT_link1": m1,
+                            "MULTIDIGIT_link2": m2,
+                            "DIVIDER_link1": d1,
+                            "DIVIDER_link2": d2,
+                            "note": "unverified_divider" if (d1 != "Y" and d2 != "Y") else "confirmed_divider"
+                        })
+    return suspicious_pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streets", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--segments", type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'links':>8} {'pares':>7} {'legacy (s)':>11} {'vector (s)':>11} {'speedup':>8}")
+    for n_streets in args.streets:
+        nav, naming = make_grid_streets(n_streets, segments_per_street=args.segments)
+        merged = nav.merge(naming[["link_id", "ST_NAME"]], on="link_id", how="left")
+        merged = merged.to_crs(utm_crs_for(*merged.geometry.iloc[0].coords[0]))
+
+        t0 = time.perf_counter()
+        fast = find_suspicious_pairs(merged, 1)
+        t_fast = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        slow = legacy_pairs(merged, 1)
+        t_slow = time.perf_counter() - t0
+
+        assert fast == slow, "find_suspicious_pairs difiere del loop original"
+        print(f"{len(merged):>8} {len(fast):>7} {t_slow:>11.3f} {t_fast:>11.3f} {t_slow / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
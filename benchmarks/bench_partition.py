@@ -0,0 +1,138 @@
+"""
+Latencia de cola de una corrida con tiles disparejos: un tile grande y varios
+chicos, validados con main.run() primero como tiles completos y luego como
+las unidades de repartition.py (quadkeys con halo). Reporta el tiempo total
+de la corrida y la distribución del tiempo por unidad de trabajo (p50, p95,
+máximo), y verifica que los conteos de los validadores sean los mismos,
+también con POIs ubicados justo sobre las líneas de corte entre unidades.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_partition.py --pois 200000 20000 20000 20000 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import config
+from main import run
+from repartition import repartition, TARGET_ROWS
+from tile_cache import build_cache
+from link_index import get_link_resolver
+from loader import tile_paths
+from tile_catalog import get_catalog
+from synthetic import generate_dataset, make_pois, write_tile_files
+
+
+def add_split_line_pois(data_dir, tile_id, n_pois, seed=0):
+    """
+    Agrega al tile calles sobre las líneas de corte de los dos primeros niveles
+    de quadkey (verticales y horizontales, mismas cuentas que split_units) y
+    n_pois POIs sobre ellas: su ubicación cae exactamente en el borde entre
+    dos unidades.
+    """
+    paths = tile_paths(tile_id, data_dir)
+    x0, y0, x1, y1 = get_catalog(paths["tiles"]).geometry(tile_id).bounds
+    xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+    xs, ys = [(x0 + xm) / 2, xm, (xm + x1) / 2], [(y0 + ym) / 2, ym, (ym + y1) / 2]
+    lines = ([shapely.LineString([(x, y0 + 0.1 * (y1 - y0)), (x, y1 - 0.1 * (y1 - y0))]) for x in xs]
+             + [shapely.LineString([(x0 + 0.1 * (x1 - x0), y), (x1 - 0.1 * (x1 - x0), y)]) for y in ys])
+
+    nav = gpd.read_file(paths["nav"])
+    naming = gpd.read_file(paths["naming"])
+    pois = pd.read_csv(paths["poi"])
+    link_ids = np.arange(len(lines)) + int(nav["link_id"].max()) + 1
+    nav = pd.concat([nav, gpd.GeoDataFrame(nav.iloc[[0] * len(lines)].drop(columns="geometry")
+                                           .assign(link_id=link_ids).reset_index(drop=True),
+                                           geometry=lines, crs=nav.crs)], ignore_index=True)
+    naming = pd.concat([naming, gpd.GeoDataFrame({"link_id": link_ids, "ST_NAME": "LINEA DE CORTE"},
+                                                 geometry=lines, crs=naming.crs)], ignore_index=True)
+    extra = make_pois(nav.iloc[-len(lines):], n_pois, seed=seed)
+    extra["POI_ID"] += int(pois["POI_ID"].max()) + 1 - extra["POI_ID"].min()
+    write_tile_files(data_dir, tile_id, nav, naming, pd.concat([pois, extra], ignore_index=True))
+
+
+def run_timed(data_dir, tile_ids, workers):
+    """
+    Corre main.run() sobre data_dir y regresa (segundos totales, resúmenes).
+    Los cachés de entrada se construyen antes, fuera de la medición.
+    """
+    config.set_data_dir(data_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_cache(data_dir)
+        get_link_resolver(data_dir)
+        t0 = time.perf_counter()
+        summaries = run(tile_ids, workers=workers)
+        elapsed = time.perf_counter() - t0
+    failed = [s["tile_id"] for s in summaries if s["status"] != "ok"]
+    assert not failed, f"tiles con error: {failed}"
+    return elapsed, summaries
+
+
+def totals(summaries):
+    # Conteos de toda la corrida, sin importar en cuántas unidades se partió
+    counts = Counter()
+    for s in summaries:
+        for key in ("pois_total", "pois_inside", "side_errors", "multidigit_errors"):
+            counts[key] += s.get(key, 0)
+        counts.update({f"existence.{k}": v for k, v in s["existence"].items()})
+    return counts
+
+
+def describe(label, elapsed, summaries):
+    walls = np.array([s["timing"]["wall_s"] for s in summaries])
+    p50, p95 = np.percentile(walls, [50, 95])
+    print(f"  {label:<12} {len(walls):4d} unidades  total {elapsed:7.2f}s   por unidad: "
+          f"p50 {p50:6.2f}s  p95 {p95:6.2f}s  máx {walls.max():6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de cola: tiles completos vs unidades por quadkey")
+    parser.add_argument("--pois", type=int, nargs="+", default=[200_000, 20_000, 20_000, 20_000],
+                        help="POIs de cada tile")
+    parser.add_argument("--streets", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--target-rows", type=int, default=TARGET_ROWS)
+    parser.add_argument("--split-pois", type=int, default=1000,
+                        help="POIs del primer tile ubicados justo sobre las líneas de corte")
+    args = parser.parse_args()
+
+    previous = config.DATA_DIR, config.OUTPUT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, units_dir = os.path.join(tmp, "data"), os.path.join(tmp, "units")
+        tile_ids = generate_dataset(data_dir, n_tiles=len(args.pois), n_streets=args.streets, n_pois=args.pois)
+        add_split_line_pois(data_dir, tile_ids[0], args.split_pois)
+        with contextlib.redirect_stdout(io.StringIO()):
+            unit_ids = repartition(data_dir, units_dir, target_rows=args.target_rows)
+        print(f"[INFO] {len(tile_ids)} tiles ({', '.join(map(str, args.pois))} POIs) → {len(unit_ids)} unidades "
+              f"de ≤ {args.target_rows} filas, {args.workers} workers (CPUs: {os.cpu_count()})")
+        try:
+            config.set_output_dir(os.path.join(tmp, "out_tiles"))
+            tiles_s, tiles = run_timed(data_dir, tile_ids, args.workers)
+            config.set_output_dir(os.path.join(tmp, "out_units"))
+            units_s, units = run_timed(units_dir, unit_ids, args.workers)
+        finally:
+            config.set_data_dir(previous[0])
+            config.set_output_dir(previous[1])
+
+    describe("tiles", tiles_s, tiles)
+    describe("quadkeys", units_s, units)
+    assert totals(tiles) == totals(units), "los conteos cambian al repartir"
+    print("  conteos de los validadores idénticos")
+
+
+if __name__ == "__main__":
+    main()
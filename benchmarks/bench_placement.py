@@ -0,0 +1,79 @@
+"""
+Compara loader.validate_pois_within_tile (vectorizado) contra el loop
+original con iterrows() sobre tiles sintéticos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_placement.py
+    python benchmarks/bench_placement.py --sizes 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loader import validate_pois_within_tile
+from synthetic import make_tile_polygon, make_streets_nav, make_pois
+
+
+def legacy_validate_pois_within_tile(pois_df, tile_geom, streets_nav_gdf):
+    # Implementación original (loop por POI), solo como referencia
+    streets_nav_gdf = streets_nav_gdf.set_index("link_id")
+
+    geometries = []
+    for _, row in pois_df.iterrows():
+        link_id = row["LINK_ID"]
+        perc = row.get("PERCFRREF", 50) / 100.0
+
+        try:
+            link_geom = streets_nav_gdf.loc[link_id].geometry
+            poi_geom = link_geom.interpolate(perc, normalized=True)
+        except KeyError:
+            poi_geom = None
+        geometries.append(poi_geom)
+
+    pois_df["geometry"] = geometries
+    pois_gdf = gpd.GeoDataFrame(pois_df, geometry="geometry", crs="EPSG:4326")
+    pois_gdf["inside_tile"] = pois_gdf["geometry"].apply(lambda geom: geom.within(tile_geom) if geom else False)
+    return pois_gdf
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--links-per-poi", type=float, default=0.1)
+    parser.add_argument("--no-legacy", action="store_true", help="Solo mide la versión vectorizada")
+    args = parser.parse_args()
+
+    tile_geom = make_tile_polygon()
+    print(f"{'POIs':>10} {'legacy (s)':>12} {'vector (s)':>12} {'speedup':>9}")
+
+    for n in args.sizes:
+        nav = make_streets_nav(max(1, int(n * args.links_per_poi)))
+        pois = make_pois(nav, n)
+
+        t0 = time.perf_counter()
+        fast = validate_pois_within_tile(pois.copy(), tile_geom, nav)
+        t_fast = time.perf_counter() - t0
+
+        if args.no_legacy:
+            print(f"{n:>10} {'-':>12} {t_fast:>12.3f} {'-':>9}")
+            continue
+
+        t0 = time.perf_counter()
+        slow = legacy_validate_pois_within_tile(pois.copy(), tile_geom, nav)
+        t_slow = time.perf_counter() - t0
+
+        assert (fast["inside_tile"].to_numpy() == slow["inside_tile"].to_numpy()).all()
+        assert fast.geometry.geom_equals_exact(slow.geometry, tolerance=1e-12).eq(
+            slow.geometry.notna()).all()
+
+        print(f"{n:>10} {t_slow:>12.3f} {t_fast:>12.3f} {t_slow / t_fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Costo de reproyectar un tile a su zona UTM (projection.project_tile) frente
+a lo que cuestan los validadores que lo reutilizan.
+
+La reproyección se hace una sola vez por tile; antes cada validador
+convertía grados a metros (× 111320) en cada distancia o longitud.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_projection.py --sizes 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loader import validate_pois_within_tile
+from projection import project_tile
+from validate_slide import validate_poi_side
+from validate_multidigit import validate_multidigit
+from validate_existence import validate_existence
+import config
+from result_writer import flush_writes
+from synthetic import make_tile_polygon, make_streets_nav, make_naming, make_pois
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Número de POIs por tile (links = POIs / 10)")
+    args = parser.parse_args()
+
+    print(f"{'POIs':>8} {'reproyección':>13} {'validadores':>12} {'% del total':>12}")
+    for n in args.sizes:
+        tile_geom = make_tile_polygon()
+        nav = make_streets_nav(max(1, n // 10))
+        pois = validate_pois_within_tile(make_pois(nav, n), tile_geom, nav)
+        tile_data = {"tile_id": 1, "pois": pois, "streets_nav": nav,
+                     "naming": make_naming(nav), "tile_geom": tile_geom}
+
+        t0 = time.perf_counter()
+        project_tile(tile_data)
+        t_proj = time.perf_counter() - t0
+
+        # Las salidas de los validadores van a un directorio temporal
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            config.set_output_dir(tmp)
+            t0 = time.perf_counter()
+            validate_poi_side(tile_data)
+            validate_multidigit(tile_data)
+            validate_existence(tile_data)
+            t_val = time.perf_counter() - t0
+            flush_writes()
+
+        print(f"{n:>8} {t_proj:>12.3f}s {t_val:>11.3f}s {100 * t_proj / (t_proj + t_val):>11.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compara validate_slide.validate_poi_side (arreglos NumPy) contra el loop
+original con iterrows(): verifica que los registros sean idénticos y
+reporta el speedup.
+
+Los POIs sintéticos se desplazan al azar hasta ~15 m del link para que haya
+POIs en ambos lados de la calle, además de POI_ID repetidos y LINK_ID
+inexistentes.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_side.py --sizes 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loader import validate_pois_within_tile
+from projection import project_tile
+from validate_slide import (validate_poi_side, get_reference_node_metric,
+                            displace_point, determine_side)
+from synthetic import make_tile_polygon, make_streets_nav, make_pois
+
+
+def legacy_poi_side_records(tile_data):
+    # Loop original de validate_poi_side (sin los prints de resumen), solo como referencia
+    project_tile(tile_data)
+    pois = tile_data["pois"]
+    pois_m = tile_data["pois_m"].to_numpy()
+    streets_nav = tile_data["streets_nav"]
+    tile_id = int(tile_data["tile_id"])
+
+    results = []
+    processed_ids = set()
+    streets_nav = streets_nav.assign(geometry_m=tile_data["streets_nav_m"]).set_index("link_id")
+
+    for pos, (_, poi) in enumerate(pois.iterrows()):
+        try:
+            poi_id = int(poi["POI_ID"])
+            link_id = int(poi["LINK_ID"])
+            expected_side = str(poi["POI_ST_SD"]).strip().upper()
+            geometry = poi.geometry
+            geometry_m = pois_m[pos]
+        except Exception:
+            continue
+
+        if poi_id in processed_ids or not poi["inside_tile"]:
+            continue
+        processed_ids.add(poi_id)
+
+        if link_id not in streets_nav.index:
+            results.append({
+                "tile_id": tile_id, "poi_id": poi_id, "link_id": link_id,
+                "error_type": "invalid_link_reference",
+                "description": "LINK_ID not found in street geometry",
+                "suggestion": "Check if link ID is missing from base NAV data",
+                "geometry": None
+            })
+            continue
+
+        try:
+            link = streets_nav.loc[link_id]
+            ref_node, non_ref_node = get_reference_node_metric(link.geometry, link["geometry_m"])
+            displaced = displace_point(geometry_m, ref_node, non_ref_node, expected_side)
+            actual_side = determine_side(ref_node, non_ref_node, displaced)
+            if actual_side != expected_side:
+                results.append({
+                    "tile_id": tile_id, "poi_id": poi_id, "link_id": link_id,
+                    "error_type": "wrong_side_of_street",
+                    "description": f"POI expected on {expected_side} side, but is located on {actual_side}",
+                    "suggestion": f"Update POI_ST_SD to '{actual_side}'",
+                    "expected_side": expected_side,
+                    "actual_side": actual_side,
+                    "geometry": [float(geometry.x), float(geometry.y)] if geometry else None
+                })
+        except Exception as e:
+            results.append({
+                "tile_id": tile_id, "poi_id": poi_id, "link_id": link_id,
+                "error_type": "geometry_processing_error",
+                "description": str(e),
+                "suggestion": "Check geometry or input values",
+                "geometry": None
+            })
+    return results
+
+
+def make_tile_data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tile_geom = make_tile_polygon()
+    nav = make_streets_nav(max(1, n // 10), seed=seed)
+    pois = make_pois(nav, n, seed=seed)
+    pois.loc[pois.sample(frac=0.01, random_state=seed).index, "POI_ID"] = pois["POI_ID"].iloc[0]
+    pois = validate_pois_within_tile(pois, tile_geom, nav)
+
+    # Sacar los POIs de la línea (~15 m como máximo) para tener ambos lados
+    jitter = rng.uniform(-0.00015, 0.00015, (len(pois), 2))
+    xy = shapely.get_coordinates(pois.geometry.to_numpy(), include_z=False)
+    has_geom = ~shapely.is_missing(pois.geometry.to_numpy())
+    moved = pois.geometry.to_numpy().copy()
+    moved[has_geom] = shapely.points(xy + jitter[has_geom])
+    pois["geometry"] = moved
+
+    return {"tile_id": 1, "pois": pois, "streets_nav": nav, "tile_geom": tile_geom}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'POIs':>8} {'errores':>8} {'legacy (s)':>11} {'vector (s)':>11} {'speedup':>8}")
+    for n in args.sizes:
+        tile_data = make_tile_data(n)
+        project_tile(tile_data)
+
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fast = validate_poi_side(tile_data)
+        t_fast = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        slow = legacy_poi_side_records(tile_data)
+        t_slow = time.perf_counter() - t0
+
+        assert fast == slow, "validate_poi_side difiere del loop original"
+        print(f"{n:>8} {len(fast):>8} {t_slow:>11.3f} {t_fast:>11.3f} {t_slow / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Modo streaming (POIs por chunks) frente a la carga completa en memoria:
+verifica que los resultados sean idénticos y compara la memoria pico
+(tracemalloc) de ambos caminos. Se corre con el CSV de POIs mínimo (solo las
+columnas que usan los validadores) y con columnas extra (y POIs sin LINK_ID),
+que deben llegar iguales a existence y a la base consolidada en los dos caminos.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_streaming.py --pois 200000 --chunksize 20000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loader import load_tile
+from streaming import validate_tile_streaming
+from validate_slide import validate_poi_side, export_validation_results
+from validate_multidigit import validate_multidigit
+from validate_existence import validate_existence
+import config
+from result_writer import get_writer, flush_writes
+from merge_results import build_store
+from synthetic import (make_tile_polygon, make_streets_nav, make_naming, make_pois,
+                       write_tile_files, write_tiles_index)
+
+TILE_ID = 1
+
+
+def run_in_memory(base_path):
+    tile_data = load_tile(TILE_ID, base_path=base_path)
+    results = validate_poi_side(tile_data)
+    export_validation_results(results, TILE_ID)
+    validate_multidigit(tile_data)
+    exist_gdf = validate_existence(tile_data)
+    get_writer().write_geodataframe(config.existence_path(TILE_ID), exist_gdf)
+
+
+def traced(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+        flush_writes()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def read_outputs():
+    out = {}
+    side = config.side_errors_path(TILE_ID)
+    out["side"] = json.load(open(side)) if os.path.exists(side) else []
+    exist_path = config.existence_path(TILE_ID)
+    out["existence"] = gpd.read_parquet(exist_path) if exist_path.endswith(".parquet") else gpd.read_file(exist_path)
+    out["invalid"] = gpd.read_file(config.invalid_pois_path(TILE_ID))
+    # GeoJSON: los dos caminos pasan por el mismo escritor, así que los bytes deben coincidir
+    out["bytes"] = {path: open(path, "rb").read() for path in (exist_path, config.invalid_pois_path(TILE_ID))
+                    if not path.endswith(".parquet")}
+    # La etapa de merge debe aceptar las salidas de los dos caminos (también con IDs nulos)
+    db_path = config.output_path("results.sqlite")
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_store(db_path, config.OUTPUT_DIR)
+    with sqlite3.connect(db_path) as conn:
+        out["merged"] = conn.execute("SELECT * FROM existence ORDER BY poi_id, link_id, error_type").fetchall()
+    return out
+
+
+def with_extra_columns(pois, seed=0):
+    """
+    Columnas que no usan los validadores, como en los POI reales: texto con
+    vacíos, códigos con ceros a la izquierda y números que en algunos chunks
+    solo traen vacíos.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(pois)
+    extra = pois.assign(
+        POI_NAME=np.where(rng.random(n) < 0.1, "", [f"LUGAR {i}" for i in range(n)]),
+        POSTAL_CODE=[f"{c:05d}" for c in rng.integers(0, 99999, n)],
+        RATING=np.where(np.arange(n) < n // 2, np.nan, rng.random(n).round(2)),
+    )
+    # Algunos POIs sin LINK_ID (celda vacía en el CSV): llegan como NA hasta el merge
+    extra["LINK_ID"] = extra["LINK_ID"].astype("Int64")
+    extra.loc[extra.index[::500], "LINK_ID"] = pd.NA
+    return extra[["POI_NAME", *pois.columns[:2], "POSTAL_CODE", *pois.columns[2:], "RATING"]]
+
+
+def compare_outputs(mem, stream):
+    assert mem["side"] == stream["side"], "errores de lado distintos"
+    assert mem["merged"] == stream["merged"], "existence consolidada distinta"
+    for key in ["existence", "invalid"]:
+        a, b = mem[key], stream[key]
+        assert list(a.columns) == list(b.columns), key
+        assert a.dtypes.to_dict() == b.dtypes.to_dict(), (key, a.dtypes.to_dict(), b.dtypes.to_dict())
+        for col in a.columns:
+            if col == "geometry":
+                assert a.geometry.geom_equals_exact(b.geometry, 1e-9).eq(a.geometry.notna()).all(), key
+            elif a[col].dtype.kind in "iuf":
+                assert np.allclose(a[col].to_numpy(dtype=float, na_value=np.nan),
+                                   b[col].to_numpy(dtype=float, na_value=np.nan), equal_nan=True), (key, col)
+            else:
+                assert a[col].astype(str).equals(b[col].astype(str)), (key, col)
+    assert list(mem["bytes"].values()) == list(stream["bytes"].values()), "GeoJSON distinto byte a byte"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pois", type=int, default=200_000)
+    parser.add_argument("--chunksize", type=int, default=20_000)
+    args = parser.parse_args()
+
+    tile_geom = make_tile_polygon()
+    nav = make_streets_nav(max(1, args.pois // 100))
+    pois = make_pois(nav, args.pois)
+    pois.loc[np.arange(len(pois)) % 97 == 0, "POI_ID"] = pois["POI_ID"].iloc[0]
+
+    for case, case_pois in [("columnas mínimas", pois), ("columnas extra", with_extra_columns(pois))]:
+        print(f"[INFO] CSV con {case}: {', '.join(case_pois.columns)}")
+        with tempfile.TemporaryDirectory() as tmp:
+            data = os.path.join(tmp, "data")
+            write_tile_files(data, TILE_ID, nav, make_naming(nav), case_pois)
+            write_tiles_index(data, {TILE_ID: tile_geom})
+
+            outputs = {}
+            for label, fn, fn_args in [("memoria", run_in_memory, (data,)),
+                                       ("streaming", validate_tile_streaming, (TILE_ID, data, args.chunksize))]:
+                # Cada camino escribe sus salidas en su propia carpeta
+                config.set_output_dir(os.path.join(tmp, label, "outputs"))
+                t, mb = traced(fn, *fn_args)
+                outputs[label] = read_outputs()
+                print(f"{label:>10}: {t:7.2f}s (con tracemalloc)  pico {mb:8.1f} MB")
+
+        compare_outputs(outputs["memoria"], outputs["streaming"])
+        assert set(case_pois.columns) <= set(outputs["streaming"]["existence"].columns), "faltan columnas del CSV"
+        print(f"resultados idénticos (chunksize={args.chunksize})")
+
+
+if __name__ == "__main__":
+    main()
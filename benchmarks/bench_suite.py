@@ -0,0 +1,191 @@
+"""
+Suite de benchmarks sobre tiles sintéticos a varias escalas (estilo asv):
+genera los datos con synthetic.generate_dataset, mide load_tile,
+validate_poi_side, validate_multidigit, validate_existence y
+find_multidigit_errors, y compara la mediana de cada medición contra
+benchmarks/baseline.json. Una medición es regresión si es más lenta que el
+baseline por más de --threshold (y por más de MIN_DELTA_S segundos, para no
+marcar ruido en las mediciones de milisegundos). Sale con código 1 si hay
+regresiones.
+
+Uso (desde la raíz del repo):
+    python benchmarks/bench_suite.py                          # compara contra el baseline
+    python benchmarks/bench_suite.py --scales small medium --repeat 5
+    python benchmarks/bench_suite.py --save-baseline          # reescribe el baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from loader import load_tile
+from validate_slide import validate_poi_side
+from validate_multidigit import validate_multidigit
+from validate_existence import validate_existence
+from vector_multidigit_check import find_multidigit_errors
+from synthetic import generate_dataset
+import config
+from result_writer import flush_writes
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# Calles y POIs por tile; cada escala es un solo tile
+SCALES = {
+    "small": {"n_streets": 20, "n_pois": 2_000},
+    "medium": {"n_streets": 60, "n_pois": 20_000},
+    "large": {"n_streets": 120, "n_pois": 100_000},
+}
+
+MIN_DELTA_S = 0.02
+
+
+def _fresh_copy(tile_data):
+    # Cada validador recibe el tile tal como sale de load_tile (con su TileContext)
+    return dict(tile_data)
+
+
+def time_call(fn, repeat):
+    """
+    Ejecuta fn() `repeat` veces (stdout silenciado) y regresa los tiempos en segundos.
+    Las escrituras que fn() deja en la cola del escritor se terminan fuera de la medición.
+    """
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+            flush_writes()
+    return times
+
+
+def run_scale(name, params, repeat, seed=0):
+    """
+    Genera un tile de la escala `name` en un directorio temporal y mide cada función.
+    Las salidas de los validadores van a <tmp>/outputs para no tocar las del repo.
+    """
+    results = {}
+    previous_output_dir = config.OUTPUT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        (tile_id,) = generate_dataset(data_dir, n_tiles=1, seed=seed, **params)
+        config.set_output_dir(os.path.join(tmp, "outputs"))
+        try:
+            # Primera carga fuera de la medición (caché de entradas en disco)
+            with contextlib.redirect_stdout(io.StringIO()):
+                tile_data = load_tile(tile_id, data_dir, export_errors=False)
+            n_pois = len(tile_data["pois"])
+            n_links = len(tile_data["streets_nav"])
+
+            benchmarks = {
+                "load_tile": lambda: load_tile(tile_id, data_dir, export_errors=False),
+                "validate_poi_side": lambda: validate_poi_side(_fresh_copy(tile_data)),
+                "validate_multidigit": lambda: validate_multidigit(_fresh_copy(tile_data)),
+                "validate_existence": lambda: validate_existence(_fresh_copy(tile_data)),
+                "find_multidigit_errors": lambda: find_multidigit_errors(tile_id, base_path=data_dir),
+            }
+            for bench, fn in benchmarks.items():
+                times = time_call(fn, repeat)
+                results[f"{name}.{bench}"] = {
+                    "median_s": round(statistics.median(times), 4),
+                    "min_s": round(min(times), 4),
+                    "pois": n_pois,
+                    "links": n_links,
+                }
+        finally:
+            flush_writes()
+            config.set_output_dir(previous_output_dir)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Lista de (nombre, actual, baseline, razón, es_regresión) para las
+    mediciones que están en ambos.
+    """
+    rows = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            rows.append((key, current["median_s"], None, None, False))
+            continue
+        ratio = current["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        regression = ratio > threshold and current["median_s"] - base["median_s"] > MIN_DELTA_S
+        rows.append((key, current["median_s"], base["median_s"], ratio, regression))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de regresión sobre tiles sintéticos")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Razón actual/baseline a partir de la cual se marca regresión")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guarda estas mediciones como el nuevo baseline")
+    parser.add_argument("--json", help="Escribe las mediciones en este archivo")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scales:
+        print(f"[INFO] Escala {name}: {SCALES[name]}")
+        results.update(run_scale(name, SCALES[name], args.repeat))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        payload = {
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()},
+            "repeat": args.repeat,
+            "results": results,
+        }
+        # Se conservan las escalas que no se midieron en esta corrida
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f).get("results", {})
+            payload["results"] = {**previous, **results}
+        tmp_path = args.baseline + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, args.baseline)
+        print(f"[INFO] Baseline guardado en {args.baseline}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    else:
+        print(f"[WARN] No hay baseline en {args.baseline}; usa --save-baseline")
+
+    print(f"\n{'benchmark':<36} {'actual (s)':>11} {'baseline (s)':>13} {'razón':>7}")
+    regressions = 0
+    for key, current, base, ratio, regression in compare(results, baseline, args.threshold):
+        base_txt = f"{base:.4f}" if base is not None else "-"
+        ratio_txt = f"{ratio:.2f}x" if ratio is not None else "-"
+        flag = "  REGRESIÓN" if regression else ""
+        print(f"{key:<36} {current:>11.4f} {base_txt:>13} {ratio_txt:>7}{flag}")
+        regressions += regression
+
+    if regressions:
+        print(f"\n[WARN] {regressions} regresiones (> {args.threshold:.2f}x el baseline)")
+        sys.exit(1)
+    print("\n[INFO] Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Datos sintéticos estilo HERE para los benchmarks.
+
+Genera en memoria un tile (polígono), calles NAV con geometría LineString
+y POIs con LINK_ID / PERCFRREF / POI_ST_SD, con las mismas columnas que
+usan loader.py y los validadores. generate_dataset() escribe varios tiles
+completos (POI csv, NAV, NAMING y HERE_L11_Tiles.geojson) con la misma
+estructura que data/.
+
+Uso (desde la raíz del repo):
+    python benchmarks/synthetic.py --out /tmp/synthetic --tiles 4 --streets 60 --pois 20000
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+# Esquina suroeste del tile sintético (zona CDMX) y tamaño en grados
+ORIGIN = (-99.15, 19.36)
+TILE_SIZE = 0.02
+
+
+def make_tile_polygon(origin=ORIGIN, size=TILE_SIZE):
+    x0, y0 = origin
+    return shapely.box(x0, y0, x0 + size, y0 + size)
+
+
+def make_streets_nav(n_links, seed=0, origin=ORIGIN, size=TILE_SIZE):
+    """
+    Segmentos rectos de 2 vértices repartidos por el tile. Un ~2% se sale
+    del borde para que haya POIs fuera del tile.
+    """
+    rng = np.random.default_rng(seed)
+    x0, y0 = origin
+    start = rng.uniform(0, size, (n_links, 2)) + (x0, y0)
+    angle = rng.uniform(0, 2 * np.pi, n_links)
+    length = rng.uniform(0.0002, 0.002, n_links)
+    length[rng.random(n_links) < 0.02] = size / 2
+    end = start + np.column_stack([np.cos(angle), np.sin(angle)]) * length[:, None]
+
+    coords = np.stack([start, end], axis=1).reshape(-1, 2)
+    geoms = shapely.linestrings(coords, indices=np.repeat(np.arange(n_links), 2))
+
+    return gpd.GeoDataFrame({
+        "link_id": np.arange(700_000_000, 700_000_000 + n_links, dtype=np.int64),
+        "MULTIDIGIT": rng.choice(["N", "Y"], n_links, p=[0.8, 0.2]),
+        "DIVIDER": rng.choice(["N", "Y"], n_links, p=[0.9, 0.1]),
+        "DIR_TRAVEL": rng.choice(["B", "F", "T"], n_links, p=[0.6, 0.2, 0.2]),
+        "FUNC_CLASS": rng.choice(["2", "3", "4", "5"], n_links),
+        "LANE_CAT": rng.choice(["1", "2", "3"], n_links),
+        "SPEED_CAT": rng.choice(["3", "4", "5", "6", "7"], n_links),
+        "TOLLWAY": "N",
+        "URBAN": "Y",
+    }, geometry=geoms, crs="EPSG:4326")
+
+
+def make_pois(streets_nav, n_pois, seed=0, missing_link_rate=0.01):
+    """
+    POIs asignados a links al azar. Un pequeño porcentaje apunta a un
+    LINK_ID inexistente (como los de otros tiles).
+    """
+    rng = np.random.default_rng(seed + 1)
+    link_ids = streets_nav["link_id"].to_numpy()
+    poi_links = link_ids[rng.integers(0, len(link_ids), n_pois)]
+    missing = rng.random(n_pois) < missing_link_rate
+    poi_links[missing] = 1
+
+    return pd.DataFrame({
+        "POI_ID": np.arange(1_000_000_000, 1_000_000_000 + n_pois, dtype=np.int64),
+        "LINK_ID": poi_links,
+        "FAC_TYPE": rng.choice([4013, 4100, 4170, 5800, 7011], n_pois),
+        "POI_ST_SD": rng.choice(["L", "R"], n_pois),
+        "PERCFRREF": rng.integers(0, 101, n_pois),
+    })
+
+
+def make_naming(streets_nav, seed=0, n_names=50):
+    """
+    Tabla NAMING con un ST_NAME por link, repartido entre n_names calles.
+    """
+    rng = np.random.default_rng(seed + 2)
+    names = np.array([f"CALLE {i}" for i in range(n_names)])
+    return gpd.GeoDataFrame({
+        "link_id": streets_nav["link_id"].to_numpy(),
+        "ST_NAME": names[rng.integers(0, n_names, len(streets_nav))],
+    }, geometry=streets_nav.geometry.to_numpy(), crs=streets_nav.crs)
+
+
+def make_grid_streets(n_streets, segments_per_street=20, seed=0, origin=ORIGIN,
+                      block_deg=0.001, arterial_every=4, carriageway_gap_deg=0.0002):
+    """
+    Retícula de calles horizontales y verticales partidas en segmentos de una
+    cuadra. Cada `arterial_every` calles hay una avenida dividida: dos
+    calzadas paralelas con el mismo nombre y sentidos de circulación opuestos,
+    MULTIDIGIT/DIVIDER aleatorios (así hay candidatos a error). Los segmentos
+    consecutivos comparten nodo. Regresa (streets_nav, naming).
+    """
+    rng = np.random.default_rng(seed)
+    x0, y0 = origin
+    starts, ends, names, carriageway = [], [], [], []
+
+    for k in range(n_streets):
+        horizontal = k % 2 == 0
+        offset = (k // 2) * block_deg
+        arterial = (k // 2) % arterial_every == 0
+        name = f"AVENIDA {k}" if arterial else f"CALLE {k}"
+        lanes = [0.0, carriageway_gap_deg] if arterial else [0.0]
+        for lane_idx, lane in enumerate(lanes):
+            for s in range(segments_per_street):
+                a, b = s * block_deg, (s + 1) * block_deg
+                if horizontal:
+                    starts.append((x0 + a, y0 + offset + lane))
+                    ends.append((x0 + b, y0 + offset + lane))
+                else:
+                    starts.append((x0 + offset + lane, y0 + a))
+                    ends.append((x0 + offset + lane, y0 + b))
+                names.append(name)
+                carriageway.append(lane_idx + 1 if arterial else 0)
+
+    n = len(starts)
+    coords = np.stack([np.array(starts), np.array(ends)], axis=1).reshape(-1, 2)
+    # Ruido por nodo (no por vértice) para que no sean perfectamente rectas sin separar los links
+    nodes, node_of = np.unique(coords, axis=0, return_inverse=True)
+    coords = coords + rng.normal(0, 1e-6, nodes.shape)[node_of.reshape(-1)]
+    geoms = shapely.linestrings(coords, indices=np.repeat(np.arange(n), 2))
+
+    # Calzada 1 circula hacia el final de la calle, calzada 2 hacia el inicio.
+    # DIR_TRAVEL es relativo al nodo de referencia (menor latitud, empate → menor longitud)
+    carriageway = np.array(carriageway)
+    start, end = coords[0::2], coords[1::2]
+    start_is_ref = (start[:, 1] < end[:, 1]) | ((start[:, 1] == end[:, 1]) & (start[:, 0] <= end[:, 0]))
+    dir_travel = rng.choice(["B", "F", "T"], n, p=[0.6, 0.2, 0.2])
+    towards_end = np.where(start_is_ref, "F", "T")
+    towards_start = np.where(start_is_ref, "T", "F")
+    dir_travel = np.where(carriageway == 1, towards_end, np.where(carriageway == 2, towards_start, dir_travel))
+    link_ids = np.arange(800_000_000, 800_000_000 + n, dtype=np.int64)
+
+    nav = gpd.GeoDataFrame({
+        "link_id": link_ids,
+        "MULTIDIGIT": rng.choice(["N", "Y"], n, p=[0.5, 0.5]),
+        "DIVIDER": rng.choice(["N", "Y"], n, p=[0.7, 0.3]),
+        "DIR_TRAVEL": dir_travel,
+        "FUNC_CLASS": rng.choice(["2", "3", "4", "5"], n),
+        "LANE_CAT": rng.choice(["1", "2", "3"], n),
+        "SPEED_CAT": rng.choice(["3", "4", "5", "6", "7"], n),
+        "TOLLWAY": "N",
+        "URBAN": "Y",
+    }, geometry=geoms, crs="EPSG:4326")
+    naming = gpd.GeoDataFrame({"link_id": link_ids, "ST_NAME": names},
+                              geometry=geoms, crs="EPSG:4326")
+    return nav, naming
+
+
+def write_tile_files(base_path, tile_id, streets_nav, naming, pois):
+    """
+    Escribe un tile con la misma estructura de carpetas/nombres que data/.
+    """
+    for folder in ["POIs", "STREETS_NAV", "STREETS_NAMING_ADDRESSING"]:
+        os.makedirs(os.path.join(base_path, folder), exist_ok=True)
+    pois.to_csv(os.path.join(base_path, "POIs", f"POI_{tile_id}.csv"), index=False)
+    streets_nav.to_file(os.path.join(base_path, "STREETS_NAV", f"SREETS_NAV_{tile_id}.geojson"),
+                        driver="GeoJSON")
+    naming.to_file(os.path.join(base_path, "STREETS_NAMING_ADDRESSING",
+                                f"SREETS_NAMING_ADDRESSING_{tile_id}.geojson"), driver="GeoJSON")
+
+
+def write_tiles_index(base_path, tile_geoms):
+    """
+    HERE_L11_Tiles.geojson a partir de {tile_id: polígono}.
+    """
+    os.makedirs(base_path, exist_ok=True)
+    gpd.GeoDataFrame({"L11_Tile_ID": list(tile_geoms)}, geometry=list(tile_geoms.values()),
+                     crs="EPSG:4326").to_file(os.path.join(base_path, "HERE_L11_Tiles.geojson"),
+                                              driver="GeoJSON")
+
+
+def generate_dataset(base_path, n_tiles=1, n_streets=40, n_pois=10_000, seed=0,
+                     first_tile_id=4815000, block_deg=0.001):
+    """
+    Escribe n_tiles tiles sintéticos contiguos (de oeste a este) en base_path:
+    retícula de n_streets calles con avenidas divididas (dos calzadas con el
+    mismo nombre, MULTIDIGIT/DIVIDER al azar), nombres compartidos entre
+    calzadas y POIs con PERCFRREF / POI_ST_SD. El polígono de cada tile es un
+    poco más chico que su retícula, así que algunos POIs quedan fuera.
+    n_pois puede ser una lista (POIs de cada tile) para tiles disparejos.
+    Regresa la lista de tile_ids.
+    """
+    segments = max(n_streets // 2, 1)
+    extent = segments * block_deg
+    counts = list(n_pois) if isinstance(n_pois, (list, tuple)) else [n_pois] * n_tiles
+    tile_geoms = {}
+    for i in range(n_tiles):
+        tile_id = first_tile_id + i
+        origin = (ORIGIN[0] + i * extent, ORIGIN[1])
+        nav, naming = make_grid_streets(n_streets, segments_per_street=segments, seed=seed + i,
+                                        origin=origin, block_deg=block_deg)
+        # link_id únicos entre tiles
+        offset = i * len(nav)
+        nav["link_id"] += offset
+        naming["link_id"] += offset
+        pois = make_pois(nav, counts[i], seed=seed + i)
+        pois["POI_ID"] += sum(counts[:i])
+        write_tile_files(base_path, tile_id, nav, naming, pois)
+        tile_geoms[tile_id] = make_tile_polygon(origin, extent * 0.98)
+    write_tiles_index(base_path, tile_geoms)
+    return list(tile_geoms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera tiles sintéticos estilo HERE")
+    parser.add_argument("--out", required=True, help="Carpeta destino (misma estructura que data/)")
+    parser.add_argument("--tiles", type=int, default=1)
+    parser.add_argument("--streets", type=int, default=40, help="Calles por tile (mitad horizontales)")
+    parser.add_argument("--pois", type=int, default=10_000, help="POIs por tile")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    tile_ids = generate_dataset(args.out, args.tiles, args.streets, args.pois, args.seed)
+    print(f"[INFO] {len(tile_ids)} tiles sintéticos escritos en {args.out}: {tile_ids}")
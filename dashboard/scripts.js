@@ -43,121 +43,85 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 });
 
-async function loadAndDisplayErrors(tileId) {
-  const errors = await loadErrorsForTile(tileId);
-  console.log(`🔍 ${errors.length} errores cargados para tile ${tileId}`);
-  renderCharts(errors);
-}
-
-async function loadErrorsForTile(tileId) {
-  const sources = [
-    `/outputs/validation_multidigit/errors_${tileId}.json`,
-    `/outputs/validation_side/errors_${tileId}.json`,
-  ];
-
-  let allErrors = [];
-
-  for (const src of sources) {
-    try {
-      const res = await fetch(src);
-      if (res.ok) {
-        const data = await res.json();
-        allErrors = allErrors.concat(data);
-      } else {
-        console.warn(`⚠️ Archivo no encontrado: ${src}`);
-      }
-    } catch (err) {
-      console.warn(`⚠️ Error al cargar ${src}:`, err);
-    }
+// Datos precalculados por export_dashboard.py: resumen (unos KB), capas agrupadas por zoom
+// y detalle por tile. Cada archivo se pide una sola vez.
+const DASHBOARD_DIR = "/outputs/dashboard";
+const dashboardCache = {};
+let summaryData = null;
+let selectedTile = null;
+
+function fetchDashboardJson(name) {
+  if (!dashboardCache[name]) {
+    dashboardCache[name] = fetch(`${DASHBOARD_DIR}/${name}`)
+      .then((res) => {
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        return res.json();
+      })
+      .catch((err) => {
+        console.warn(`⚠️ Error al cargar ${name}:`, err);
+        delete dashboardCache[name];
+        return null;
+      });
   }
-
-  return allErrors;
+  return dashboardCache[name];
 }
 
-async function loadAndDisplayAllErrors() {
-  console.log("🔁 Cargando todos los errores...");
-
-  const tileIds = await fetch("tiles.json")
-    .then((res) => res.json())
-    .catch((err) => {
-      console.error("Error loading tiles.json:", err);
-      return [];
-    });
-
-  let allErrors = [];
-
-  for (const tileId of tileIds) {
-    console.log(`📂 Tile ${tileId}`);
-    const errors = await loadErrorsForTile(tileId);
-    console.log(`→ ${errors.length} errores`);
-    allErrors = allErrors.concat(errors);
+async function loadSummary() {
+  if (!summaryData) {
+    summaryData = await fetchDashboardJson("summary.json");
   }
+  return summaryData;
+}
 
-  console.log(`📊 Total de errores combinados: ${allErrors.length}`);
+async function loadAndDisplayErrors(tileId) {
+  const summary = await loadSummary();
+  if (!summary) return;
 
-  if (allErrors.length === 0) {
-    alert("No se encontraron errores en ninguno de los tiles.");
+  const tileSummary = summary.by_tile[String(tileId)];
+  if (!tileSummary) {
+    console.warn(`⚠️ Sin resultados para tile ${tileId}`);
+    return;
   }
+  console.log(`🔍 ${tileSummary.kpi.total} errores cargados para tile ${tileId}`);
 
-  renderCharts(allErrors);
-}
-
-async function loadAndDisplayErrors(tileId) {
-  const errors = await loadErrorsForTile(tileId);
-  console.log(`🔍 ${errors.length} errores cargados para tile ${tileId}`);
-  updateKPI(errors); 
-  renderCharts(errors);
+  selectedTile = String(tileId);
+  updateKPI(tileSummary.kpi);
+  renderCharts(tileSummary);
 }
 
 async function loadAndDisplayAllErrors() {
   console.log("🔁 Cargando todos los errores...");
 
-  const tileIds = await fetch("tiles.json")
-    .then((res) => res.json())
-    .catch((err) => {
-      console.error("Error loading tiles.json:", err);
-      return [];
-    });
-
-  let allErrors = [];
+  const summary = await loadSummary();
+  if (!summary) return;
 
-  for (const tileId of tileIds) {
-    const errors = await loadErrorsForTile(tileId);
-    allErrors = allErrors.concat(errors);
-  }
-
-  console.log(`📊 Total de errores combinados: ${allErrors.length}`);
+  console.log(`📊 Total de errores combinados: ${summary.all.kpi.total}`);
 
-  if (allErrors.length === 0) {
+  if (summary.all.kpi.total === 0) {
     alert("No se encontraron errores en ninguno de los tiles.");
   }
 
-  updateKPI(allErrors);
-  renderCharts(allErrors);
+  selectedTile = null;
+  updateKPI(summary.all.kpi);
+  renderCharts(summary.all);
 }
 
 
-function renderCharts(errors) {
-  renderChartByType(errors);
-  renderChartBySideMismatch(errors);
-  renderChartByLink(errors);
-  renderChartByTile(errors);
-  renderChartErrorDistribution(errors);
-  renderErrorMap(errors);
+function renderCharts(summary) {
+  renderChartByType(summary.by_type);
+  renderChartBySideMismatch(summary.by_side);
+  renderChartByLink(summary.top_links);
+  renderChartByTile(summary.top_tiles);
+  renderChartErrorDistribution(summary.by_type);
+  renderErrorMap(summary.bounds);
 }
 
 
-function renderChartByType(errors) {
+function renderChartByType(byType) {
   if (chartTypeInstance) chartTypeInstance.destroy();
 
-  const counts = {};
-  errors.forEach((e) => {
-    const type = e.error_type;
-    counts[type] = (counts[type] || 0) + 1;
-  });
-
-  const labels = Object.keys(counts);
-  const values = Object.values(counts);
+  const labels = byType.map(([type]) => type);
+  const values = byType.map(([, count]) => count);
 
   chartTypeInstance = new Chart(document.getElementById("chartByType"), {
     type: "bar",
@@ -202,18 +166,11 @@ function renderChartByType(errors) {
   });
 }
 
-function renderChartBySideMismatch(errors) {
+function renderChartBySideMismatch(bySide) {
   if (chartSideInstance) chartSideInstance.destroy();
 
-  const mismatchCounts = {};
-  errors.forEach((e) => {
-    if (!e.expected_side || !e.actual_side) return;
-    const combo = `${e.expected_side} → ${e.actual_side}`;
-    mismatchCounts[combo] = (mismatchCounts[combo] || 0) + 1;
-  });
-
-  const labels = Object.keys(mismatchCounts);
-  const values = Object.values(mismatchCounts);
+  const labels = bySide.map(([combo]) => combo);
+  const values = bySide.map(([, count]) => count);
 
   chartSideInstance = new Chart(document.getElementById("chartBySide"), {
     type: "bar",
@@ -258,18 +215,10 @@ function renderChartBySideMismatch(errors) {
   });
 }
 
-function renderChartByLink(errors) {
+function renderChartByLink(topLinks) {
   if (chartLinkInstance) chartLinkInstance.destroy();
 
-  const linkCounts = {};
-  errors.forEach((e) => {
-    const link = e.link_id;
-    linkCounts[link] = (linkCounts[link] || 0) + 1;
-  });
-
-  const sorted = Object.entries(linkCounts)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 10);
+  const sorted = topLinks;
 
   const labels = sorted.map(([link]) => `Link ${link}`);
   const values = sorted.map(([, count]) => count);
@@ -317,71 +266,20 @@ function renderChartByLink(errors) {
   });
 }
 
-document.getElementById("downloadCsv").addEventListener("click", async () => {
+// La descarga la arma el servidor de resultados (results_server.py) en streaming
+document.getElementById("downloadCsv").addEventListener("click", () => {
   const selected = document.getElementById("tileFilter").value;
-  const tileIds = await fetch("tiles.json").then(res => res.json());
-
-  const tilesToDownload = selected ? [selected] : tileIds;
-
-  const zip = new JSZip();
-
-  for (const tileId of tilesToDownload) {
-    const folder = zip.folder(`tile_${tileId}`);
-
-    const files = [
-      {
-        name: `errors_multidigit_${tileId}.json`,
-        path: `/outputs/validation_multidigit/errors_${tileId}.json`
-      },
-      {
-        name: `errors_side_${tileId}.json`,
-        path: `/outputs/validation_side/errors_${tileId}.json`
-      },
-      {
-        name: `existence_${tileId}.geojson`,
-        path: `/outputs/existence/existence_${tileId}.geojson`
-      }
-    ];
-
-    for (const file of files) {
-      try {
-        const res = await fetch(file.path);
-        if (!res.ok) {
-          console.warn(`No se pudo cargar: ${file.path}`);
-          continue;
-        }
-        const content = await res.text();
-        folder.file(file.name, content);
-      } catch (err) {
-        console.error(`Error leyendo ${file.path}:`, err);
-      }
-    }
-  }
-
-  const zipBlob = await zip.generateAsync({ type: "blob" });
-  const zipFileName = selected ? `tile_${selected}_errors.zip` : `all_tiles_errors.zip`;
-
   const link = document.createElement("a");
-  link.href = URL.createObjectURL(zipBlob);
-  link.download = zipFileName;
+  link.href = selected ? `/api/export.zip?tile_id=${encodeURIComponent(selected)}` : "/api/export.zip";
   document.body.appendChild(link);
   link.click();
   document.body.removeChild(link);
 });
 
-function renderChartByTile(errors) {
+function renderChartByTile(topTiles) {
   if (chartTileInstance) chartTileInstance.destroy();
 
-  const tileCounts = {};
-
-  errors.forEach(e => {
-    const tileId = e.tile_id || "Unknown";
-    tileCounts[tileId] = (tileCounts[tileId] || 0) + 1;
-  });
-
-  const sorted = Object.entries(tileCounts)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 10);
+  const sorted = topTiles;
 
   const labels = sorted.map(([tile]) => `Tile ${tile}`);
   const values = sorted.map(([, count]) => count);
@@ -425,17 +323,11 @@ function renderChartByTile(errors) {
 }
 
 
-function renderChartErrorDistribution(errors) {
+function renderChartErrorDistribution(byType) {
   if (chartDistributionInstance) chartDistributionInstance.destroy();
 
-  const counts = {};
-  errors.forEach(e => {
-    const type = e.error_type || "Unknown";
-    counts[type] = (counts[type] || 0) + 1;
-  });
-
-  const labels = Object.keys(counts);
-  const values = Object.values(counts);
+  const labels = byType.map(([type]) => type || "Unknown");
+  const values = byType.map(([, count]) => count);
 
   const backgroundColors = labels.map((_, i) =>
     `hsl(${(i * 360) / labels.length}, 70%, 50%)`
@@ -466,54 +358,91 @@ function renderChartErrorDistribution(errors) {
   });
 }
 
-function renderErrorMap(errors) {
-  const mapContainer = document.getElementById("chartMap");
-
-  if (mapContainer._leaflet_id) {
-    mapContainer._leaflet_id = null;
-    mapContainer.innerHTML = "";
-  }
+let errorMap;
+let errorLayer;
+let mapRequest = 0;
 
-  const map = L.map("chartMap").setView([19.43, -99.13], 12);
+function getErrorMap() {
+  if (!errorMap) {
+    errorMap = L.map("chartMap").setView([19.43, -99.13], 12);
 
-  L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
-    maxZoom: 18,
-  }).addTo(map);
+    L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
+      maxZoom: 18,
+    }).addTo(errorMap);
 
-  const bounds = [];
+    errorLayer = L.layerGroup().addTo(errorMap);
+    errorMap.on("moveend", refreshErrorLayer);
+  }
+  return errorMap;
+}
 
-  errors.forEach((error) => {
-    let lat, lon;
+function renderErrorMap(bounds) {
+  const map = getErrorMap();
+  if (bounds) {
+    map.fitBounds(bounds, { padding: [20, 20] });
+  }
+  refreshErrorLayer();
+}
 
-    if (error.lat && error.lon) {
-      lat = error.lat;
-      lon = error.lon;
-    } else if (error.geometry && Array.isArray(error.geometry)) {
-      [lon, lat] = error.geometry;
-    }
+// Vista "All": puntos agrupados del zoom actual; con más zoom que la última capa
+// agrupada, o con un tile seleccionado, el detalle de los tiles visibles.
+async function refreshErrorLayer() {
+  if (!summaryData) return;
+  const request = ++mapRequest;
+  const zoom = errorMap.getZoom();
+  const [minZoom, maxZoom] = summaryData.zooms;
+
+  let tiles = null;
+  if (selectedTile) {
+    tiles = [selectedTile];
+  } else if (zoom > maxZoom) {
+    const view = errorMap.getBounds();
+    tiles = summaryData.tiles.filter((t) => {
+      const b = summaryData.by_tile[String(t)].bounds;
+      return b && view.intersects(b);
+    });
+  }
 
-    if (!lat || !lon) return;
+  if (tiles) {
+    const layers = await Promise.all(tiles.map((t) => fetchDashboardJson(`points_${t}.json`)));
+    if (request !== mapRequest) return;
+    errorLayer.clearLayers();
+    layers.forEach((points) => {
+      (points || []).forEach(([lon, lat, errorType, linkId]) => {
+        L.circleMarker([lat, lon], {
+          radius: 5,
+          fillColor: "#f00",
+          fillOpacity: 0.7,
+          color: "#fff",
+          weight: 1,
+        })
+          .bindPopup(`<b>${errorType}</b><br>Link ${linkId}`)
+          .addTo(errorLayer);
+      });
+    });
+    return;
+  }
 
-    const marker = L.circleMarker([lat, lon], {
-      radius: 5,
+  const layerZoom = Math.min(Math.max(zoom, minZoom), maxZoom);
+  const clusters = await fetchDashboardJson(`clusters_z${layerZoom}.json`);
+  if (request !== mapRequest) return;
+  errorLayer.clearLayers();
+  (clusters || []).forEach(([lon, lat, count, typeIdx]) => {
+    L.circleMarker([lat, lon], {
+      radius: 5 + 3 * Math.log2(count),
       fillColor: "#f00",
       fillOpacity: 0.7,
       color: "#fff",
       weight: 1,
-    }).addTo(map);
-
-    marker.bindPopup(`<b>${error.error_type}</b>`);
-    bounds.push([lat, lon]);
+    })
+      .bindPopup(`<b>${count} errores</b><br>Principal: ${summaryData.types[typeIdx]}`)
+      .addTo(errorLayer);
   });
-
-  if (bounds.length > 0) {
-    map.fitBounds(bounds, { padding: [20, 20] });
-  }
 }
 
-function updateKPI(errors) {
-  document.getElementById("kpi-total").textContent = errors.length;
-  document.getElementById("kpi-tiles").textContent = new Set(errors.map(e => e.tile_id)).size;
-  document.getElementById("kpi-links").textContent = new Set(errors.map(e => e.link_id)).size;
-  document.getElementById("kpi-types").textContent = new Set(errors.map(e => e.error_type)).size;
+function updateKPI(kpi) {
+  document.getElementById("kpi-total").textContent = kpi.total;
+  document.getElementById("kpi-tiles").textContent = kpi.tiles;
+  document.getElementById("kpi-links").textContent = kpi.links;
+  document.getElementById("kpi-types").textContent = kpi.types;
 }
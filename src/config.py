@@ -0,0 +1,72 @@
+import os
+from tile_cache import HAS_PARQUET
+
+# Rutas base. Todas las salidas cuelgan de OUTPUT_DIR (absoluta), sin importar
+# desde qué directorio se corra; se puede mover con la variable POI_OUTPUT_DIR
+# (y las entradas con POI_DATA_DIR).
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.abspath(os.environ.get("POI_DATA_DIR", os.path.join(ROOT_DIR, "data")))
+OUTPUT_DIR = os.path.abspath(os.environ.get("POI_OUTPUT_DIR", os.path.join(ROOT_DIR, "outputs")))
+
+# Capa de existence: GeoParquet si hay pyarrow, si no GeoJSON
+EXISTENCE_FORMAT = os.environ.get("POI_EXISTENCE_FORMAT", "parquet" if HAS_PARQUET else "geojson")
+
+# Escrituras pendientes que admite la cola del escritor antes de frenar el cálculo
+WRITE_QUEUE_SIZE = int(os.environ.get("POI_WRITE_QUEUE_SIZE", "16"))
+
+# Procesos que se reparten los POIs / grupos de calles dentro de un mismo tile
+# (1 = sin paralelismo dentro del tile; ver tile_shards.py)
+TILE_WORKERS = int(os.environ.get("POI_TILE_WORKERS", "1"))
+# Mínimo de elementos (POIs, links) por parte: debajo de esto no vale la pena repartir
+TILE_SHARD_MIN = int(os.environ.get("POI_TILE_SHARD_MIN", "20000"))
+
+# Dónde se publican los arreglos compartidos con esos procesos (memoria si existe /dev/shm)
+SHARED_DIR = os.environ.get("POI_SHARED_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+
+def set_output_dir(path):
+    """
+    Cambia la carpeta de salidas del proceso (p. ej. benchmarks en un directorio temporal).
+    """
+    global OUTPUT_DIR
+    OUTPUT_DIR = os.path.abspath(path)
+
+
+def set_data_dir(path):
+    """
+    Cambia la carpeta de entradas del proceso (p. ej. las unidades de repartition.py).
+    """
+    global DATA_DIR
+    DATA_DIR = os.path.abspath(path)
+
+
+def set_tile_workers(workers, shard_min=None):
+    """
+    Cambia cuántos procesos se reparten el trabajo dentro de cada tile (y,
+    opcionalmente, el mínimo de elementos por parte).
+    """
+    global TILE_WORKERS, TILE_SHARD_MIN
+    TILE_WORKERS = max(int(workers), 1)
+    if shard_min is not None:
+        TILE_SHARD_MIN = max(int(shard_min), 1)
+
+
+def output_path(*parts):
+    return os.path.join(OUTPUT_DIR, *parts)
+
+
+def side_errors_path(tile_id):
+    return output_path("validation_side", f"errors_{tile_id}.json")
+
+
+def multidigit_errors_path(tile_id):
+    return output_path("validation_multidigit", f"errors_{tile_id}.json")
+
+
+def existence_path(tile_id):
+    ext = "parquet" if EXISTENCE_FORMAT == "parquet" else "geojson"
+    return output_path("existence", f"existence_{tile_id}.{ext}")
+
+
+def invalid_pois_path(tile_id):
+    return output_path(f"invalid_pois_{tile_id}.json")
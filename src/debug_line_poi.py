@@ -3,6 +3,9 @@ import pandas as pd
 import geopandas as gpd
 from shapely.geometry import LineString, Point
 import folium
+from tile_cache import read_streets_nav
+from link_store import build_link_store
+from config import output_path
 
 def debug_line_poi(tile_id, poi_id, base_path="../data"):
     poi_path = f"{base_path}/POIs/POI_{tile_id}.csv"
@@ -10,7 +13,7 @@ def debug_line_poi(tile_id, poi_id, base_path="../data"):
 
     # 1. Cargar datos
     pois_df = pd.read_csv(poi_path)
-    streets_gdf = gpd.read_file(nav_path)
+    streets_gdf = read_streets_nav(nav_path)
 
     # 2. Buscar el POI
     try:
@@ -28,11 +31,14 @@ def debug_line_poi(tile_id, poi_id, base_path="../data"):
     perc = max(0, min(100, perc)) / 100.0
 
     # 4. Encontrar la calle asociada
-    street_row_df = streets_gdf[streets_gdf["link_id"] == link_id]
-    if street_row_df.empty:
+    links = build_link_store(streets_gdf)
+    pos = links.lookup([link_id])[0]
+    if pos < 0:
         print(f"[ERROR] LINK_ID {link_id} no encontrado")
         return
-    street = street_row_df.iloc[0]
+    if link_id in links.duplicate_ids:
+        print(f"[WARN] LINK_ID {link_id} está repetido en STREETS_NAV; se usa su primera aparición")
+    street = streets_gdf.iloc[links.rows[pos]]
     line = street.geometry
 
     # 5. Normalizar DIR_TRAVEL
@@ -94,7 +100,7 @@ def debug_line_poi(tile_id, poi_id, base_path="../data"):
     ).add_to(m)
 
     # 11. Guardar HTML
-    output_dir = "../outputs/debug_maps"
+    output_dir = output_path("debug_maps")
     os.makedirs(output_dir, exist_ok=True)
     output_file = f"{output_dir}/debug_poi_{poi_id}.html"
     m.save(output_file)
@@ -0,0 +1,161 @@
+import os
+import json
+import sqlite3
+import numpy as np
+from merge_results import store_path
+from config import output_path
+
+TOP_N = 10
+
+# Capas de puntos agrupados: una por nivel de zoom de Leaflet, celdas de CELL_PX píxeles
+MIN_ZOOM = 4
+MAX_ZOOM = 16
+CELL_PX = 48
+
+
+def summarize(conn, tile_id=None):
+    """
+    KPIs, agregados de las gráficas (top-N) y extensión de los errores,
+    para un tile o para todos (tile_id=None).
+    """
+    where, params = ("WHERE tile_id = ?", (tile_id,)) if tile_id is not None else ("", ())
+    and_where = where.replace("WHERE", "AND") if where else ""
+
+    total, tiles, links, types = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT tile_id), COUNT(DISTINCT link_id), COUNT(DISTINCT error_type) "
+        f"FROM errors {where}", params).fetchone()
+    by_type = conn.execute(
+        f"SELECT error_type, COUNT(*) FROM errors {where} GROUP BY error_type ORDER BY 2 DESC, 1", params).fetchall()
+    by_side = conn.execute(
+        f"SELECT expected_side || ' → ' || actual_side, COUNT(*) FROM errors "
+        f"WHERE expected_side IS NOT NULL AND actual_side IS NOT NULL {and_where} "
+        f"GROUP BY 1 ORDER BY 2 DESC, 1", params).fetchall()
+    top_links = conn.execute(
+        f"SELECT link_id, COUNT(*) FROM errors {where} GROUP BY link_id ORDER BY 2 DESC, 1 LIMIT {TOP_N}",
+        params).fetchall()
+    top_tiles = conn.execute(
+        f"SELECT tile_id, COUNT(*) FROM errors {where} GROUP BY tile_id ORDER BY 2 DESC, 1 LIMIT {TOP_N}",
+        params).fetchall()
+    existence = conn.execute(
+        f"SELECT error_type, COUNT(*) FROM existence {where} GROUP BY error_type ORDER BY 2 DESC, 1",
+        params).fetchall()
+    bounds = conn.execute(
+        f"SELECT MIN(lat), MIN(lon), MAX(lat), MAX(lon) FROM errors "
+        f"WHERE lon IS NOT NULL AND lat IS NOT NULL {and_where}", params).fetchone()
+
+    return {
+        "kpi": {"total": total, "tiles": tiles, "links": links, "types": types},
+        "by_type": [list(r) for r in by_type],
+        "by_side": [list(r) for r in by_side],
+        "top_links": [list(r) for r in top_links],
+        "top_tiles": [list(r) for r in top_tiles],
+        "existence": [list(r) for r in existence],
+        # [[sur, oeste], [norte, este]] como lo espera Leaflet; None si no hay puntos
+        "bounds": [[bounds[0], bounds[1]], [bounds[2], bounds[3]]] if bounds[0] is not None else None,
+    }
+
+
+def _pixel_xy(lon, lat, zoom):
+    """
+    Coordenadas en píxeles Web Mercator (teselas de 256 px) en el nivel de zoom dado.
+    """
+    scale = 256 * 2 ** zoom
+    lat_rad = np.radians(np.clip(lat, -85.05112878, 85.05112878))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * scale
+    return x, y
+
+
+def cluster_points(lon, lat, type_codes, zoom, cell_px=CELL_PX):
+    """
+    Agrupa los puntos en celdas de cell_px × cell_px píxeles en `zoom`.
+    Regresa una fila por celda: centroide (lon, lat), número de errores y
+    código del tipo más frecuente en la celda.
+    """
+    if len(lon) == 0:
+        return np.empty((0, 4))
+    x, y = _pixel_xy(lon, lat, zoom)
+    # Celda como un solo entero (columna * 2^32 + fila): np.unique 1-D es mucho más rápido
+    cells = (np.floor(x / cell_px).astype(np.int64) << 32) + np.floor(y / cell_px).astype(np.int64)
+    _, cell_idx = np.unique(cells, return_inverse=True)
+    n_cells = cell_idx.max() + 1
+
+    counts = np.bincount(cell_idx, minlength=n_cells)
+    c_lon = np.bincount(cell_idx, weights=lon, minlength=n_cells) / counts
+    c_lat = np.bincount(cell_idx, weights=lat, minlength=n_cells) / counts
+
+    # Tipo dominante: conteo por (celda, tipo) y el máximo de cada celda
+    n_types = type_codes.max() + 1
+    per_type = np.bincount(cell_idx * n_types + type_codes, minlength=n_cells * n_types)
+    dominant = per_type.reshape(n_cells, n_types).argmax(axis=1)
+
+    return np.column_stack([c_lon, c_lat, counts, dominant])
+
+
+def _write_json(data, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def export_dashboard(db_path=None, out_dir=None):
+    """
+    Exporta desde la base consolidada (merge_results.py) todo lo que carga el dashboard:
+
+    - summary.json:            KPIs y agregados de "All" y de cada tile (unos KB, sin puntos)
+    - clusters_z<zoom>.json:   puntos agrupados por celda para cada zoom (vista "All")
+    - points_<tile>.json:      detalle de los errores de un tile, solo se pide al seleccionarlo
+
+    db_path y out_dir se resuelven al llamar (default results.sqlite y dashboard/ en config.OUTPUT_DIR).
+    """
+    db_path = db_path or store_path()
+    out_dir = out_dir or output_path("dashboard")
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        tile_ids = [r[0] for r in conn.execute(
+            "SELECT tile_id FROM errors UNION SELECT tile_id FROM existence ORDER BY 1")]
+        summary = {
+            "tiles": tile_ids,
+            "all": summarize(conn),
+            "by_tile": {str(t): summarize(conn, t) for t in tile_ids},
+            "zooms": [MIN_ZOOM, MAX_ZOOM],
+        }
+
+        rows = conn.execute(
+            "SELECT tile_id, lon, lat, error_type, link_id, poi_id FROM errors "
+            "WHERE lon IS NOT NULL AND lat IS NOT NULL ORDER BY tile_id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    types = sorted({r[3] for r in rows})
+    summary["types"] = types
+    _write_json(summary, os.path.join(out_dir, "summary.json"))
+
+    # Detalle por tile: [lon, lat, error_type, link_id, poi_id]
+    by_tile = {t: [] for t in tile_ids}
+    for tile_id, lon, lat, error_type, link_id, poi_id in rows:
+        by_tile[tile_id].append([lon, lat, error_type, link_id, poi_id])
+    for tile_id, points in by_tile.items():
+        _write_json(points, os.path.join(out_dir, f"points_{tile_id}.json"))
+
+    # Capas agrupadas por zoom: [lon, lat, count, índice en summary["types"]]
+    lon = np.array([r[1] for r in rows], dtype=float)
+    lat = np.array([r[2] for r in rows], dtype=float)
+    type_codes = np.searchsorted(types, [r[3] for r in rows]).astype(np.int64)
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        clusters = cluster_points(lon, lat, type_codes, zoom)
+        _write_json(
+            [[round(c_lon, 6), round(c_lat, 6), int(count), int(t)] for c_lon, c_lat, count, t in clusters.tolist()],
+            os.path.join(out_dir, f"clusters_z{zoom}.json"),
+        )
+
+    print(f"[INFO] Dashboard: resumen, {len(tile_ids)} tiles de detalle y "
+          f"{MAX_ZOOM - MIN_ZOOM + 1} capas agrupadas exportados a {out_dir}")
+    return summary
+
+
+if __name__ == "__main__":
+    export_dashboard()
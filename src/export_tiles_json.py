@@ -1,6 +1,6 @@
 import os
 import json
-import geopandas as gpd
+from tile_catalog import get_catalog
 
 # Rutas base
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -9,8 +9,7 @@ OUTPUT_PATH = os.path.join(ROOT_DIR, "dashboard", "tiles.json")
 
 # Leer geojson de tiles
 tiles_path = os.path.join(DATA_DIR, "HERE_L11_Tiles.geojson")
-tiles_gdf = gpd.read_file(tiles_path)
-tile_ids = sorted(tiles_gdf["L11_Tile_ID"].unique())
+tile_ids = get_catalog(tiles_path).tile_ids
 
 # Filtrar solo los que tienen archivo de POIs
 tile_ids_with_data = [
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import marshal
+import pstats
+import resource
+from contextlib import contextmanager
+
+# Recolector del tile que se está procesando en este proceso (None = sin medir)
+_current = None
+
+
+def _read_peak_rss_kb():
+    """
+    Pico de memoria residente (VmHWM) del proceso en KB. Fuera de Linux se usa
+    ru_maxrss, que es el pico de toda la vida del proceso.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            return int(re.search(r"VmHWM:\s+(\d+)", f.read()).group(1))
+    except (OSError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss():
+    # Linux ≥ 4.0: escribir 5 en clear_refs reinicia VmHWM al RSS actual
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class TileRecorder:
+    """
+    Tiempos por etapa de un tile: wall, CPU, pico de RSS y filas procesadas.
+    Una etapa que se repite (p. ej. por chunk en modo streaming) acumula sus
+    tiempos y filas; el pico es el máximo de sus llamadas.
+    """
+
+    def __init__(self, tile_id):
+        self.tile_id = int(tile_id)
+        self.stages = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_mb = 0.0
+
+    def add(self, name, wall, cpu, peak_kb, rows):
+        st = self.stages.get(name)
+        if st is None:
+            st = self.stages[name] = {"stage": name, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                      "peak_rss_mb": 0.0, "rows": None}
+        st["calls"] += 1
+        st["wall_s"] += wall
+        st["cpu_s"] += cpu
+        st["peak_rss_mb"] = max(st["peak_rss_mb"], peak_kb / 1024)
+        if rows is not None:
+            st["rows"] = (st["rows"] or 0) + int(rows)
+        self.peak_rss_mb = max(self.peak_rss_mb, st["peak_rss_mb"])
+
+    def finish(self):
+        self.wall_s = time.perf_counter() - self._wall0
+        self.cpu_s = time.process_time() - self._cpu0
+        self.peak_rss_mb = max(self.peak_rss_mb, _read_peak_rss_kb() / 1024)
+
+    def as_dict(self):
+        return {
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "stages": [
+                dict(st, wall_s=round(st["wall_s"], 4), cpu_s=round(st["cpu_s"], 4),
+                     peak_rss_mb=round(st["peak_rss_mb"], 1))
+                for st in self.stages.values()
+            ],
+        }
+
+
+@contextmanager
+def recording(recorder):
+    """
+    Activa `recorder` para las etapas que se ejecuten dentro del bloque.
+    """
+    global _current
+    previous, _current = _current, recorder
+    _reset_peak_rss()
+    try:
+        yield recorder
+    finally:
+        _current = previous
+        recorder.finish()
+
+
+@contextmanager
+def stage(name):
+    """
+    Mide una etapa del tile activo. Dentro del bloque se puede asignar
+    info["rows"] con el número de filas procesadas:
+
+        with stage("placement") as info:
+            pois = validate_pois_within_tile(...)
+            info["rows"] = len(pois)
+
+    Sin recorder activo solo cuesta una comparación.
+    """
+    recorder = _current
+    info = {"rows": None}
+    if recorder is None:
+        yield info
+        return
+    _reset_peak_rss()
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield info
+    finally:
+        recorder.add(name, time.perf_counter() - wall0, time.process_time() - cpu0,
+                     _read_peak_rss_kb(), info["rows"])
+
+
+def timed_iter(iterable, name):
+    """
+    Itera `iterable` midiendo cada next() como la etapa `name` (filas = len del elemento).
+    """
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as info:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            info["rows"] = len(item)
+        yield item
+
+
+def profile_stats(profiler):
+    """
+    Estadísticas de un cProfile.Profile serializadas (formato .prof de pstats),
+    para regresarlas desde un worker.
+    """
+    return marshal.dumps(pstats.Stats(profiler).stats)
+
+
+def write_run_report(summaries, path):
+    """
+    Reporte JSONL: una línea por tile validado con tiempos totales y por etapa.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(path, "w", encoding="utf-8") as f:
+        for s in summaries:
+            if "timing" not in s:
+                continue
+            line = {"run": started, "tile_id": s["tile_id"], "status": s["status"], **s["timing"]}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    print(f"[INFO] Reporte de tiempos por etapa en {path}")
+
+
+def dump_slowest_profiles(summaries, out_dir, top=5):
+    """
+    Escribe tile_<id>.prof (abrir con pstats o snakeviz) de los `top` tiles más lentos.
+    """
+    profiled = [s for s in summaries if s.get("profile") and "timing" in s]
+    slowest = sorted(profiled, key=lambda s: s["timing"]["wall_s"], reverse=True)[:top]
+    if not slowest:
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for s in slowest:
+        path = os.path.join(out_dir, f"tile_{s['tile_id']}.prof")
+        with open(path, "wb") as f:
+            f.write(s["profile"])
+        paths.append(path)
+        print(f"[INFO] Perfil de tile {s['tile_id']} ({s['timing']['wall_s']:.2f} s) en {path}")
+    return paths
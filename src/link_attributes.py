@@ -0,0 +1,213 @@
+import os
+
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from tile_cache import CACHE_DIR
+from link_store import flatten_lines, line_endpoints, reference_first
+
+# Si cambia cómo se deriva alguna columna, se sube la versión y los cachés viejos se ignoran
+ATTRIBUTES_VERSION = 1
+
+# Columnas por link que se guardan en el caché (además de la geometría métrica)
+CACHED_COLUMNS = ("length_m", "bearing", "ref_first", "start_m", "end_m")
+
+
+def attributes_path_for(nav_path):
+    """
+    data/STREETS_NAV/SREETS_NAV_1.geojson → data/STREETS_NAV/.cache/SREETS_NAV_1.links.npz
+    """
+    folder, name = os.path.split(nav_path)
+    return os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0] + ".links.npz")
+
+
+def _mix(z):
+    # splitmix64: mezcla los bits de cada uint64 (aritmética módulo 2**64)
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def cacheable_lines(lines):
+    """
+    Links que se guardan en el caché: LineStrings 2D no vacíos. Lo demás
+    (MultiLineString, vacíos, con Z) es raro y se deriva en cada corrida.
+    """
+    return (shapely.get_type_id(lines) == 1) & ~shapely.is_empty(lines) & ~shapely.has_z(lines)
+
+
+def geometry_hashes(lines):
+    """
+    Hash de 64 bits de los vértices (en orden) de cada link de cacheable_lines,
+    calculado en bloque sobre el arreglo plano de coordenadas; 0 para los demás.
+    """
+    lines = np.asarray(lines, dtype=object)
+    hashes = np.zeros(len(lines), dtype=np.uint64)
+    rows = np.flatnonzero(cacheable_lines(lines))
+    if len(rows) == 0:
+        return hashes
+    coords, offsets = flatten_lines(lines[rows])
+    counts = np.diff(offsets)
+    vertex = (np.arange(len(coords)) - np.repeat(offsets[:-1], counts)).astype(np.uint64)
+    bits = np.ascontiguousarray(coords).view(np.uint64)
+    mixed = _mix(bits[:, 0] ^ _mix(bits[:, 1] ^ _mix(vertex)))
+    # El bit bajo en 1 separa los hashes válidos del 0 de "sin caché"
+    hashes[rows] = _mix(np.bitwise_xor.reduceat(mixed, offsets[:-1]) ^ counts.astype(np.uint64)) | np.uint64(1)
+    return hashes
+
+
+def _gather_lines(coords, offsets, pos):
+    # LineStrings con los vértices coords[offsets[p]:offsets[p + 1]] de cada p en pos
+    counts = offsets[pos + 1] - offsets[pos]
+    owner = np.repeat(np.arange(len(pos)), counts)
+    take = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(offsets[pos], counts)
+    return shapely.linestrings(coords[take], indices=owner)
+
+
+def normalize_lines(lines):
+    """
+    Normaliza en bloque las geometrías de los links: los LineString quedan
+    igual, los MultiLineString se vuelven un LineString con los vértices de
+    todas sus partes en orden y lo demás queda en None.
+    """
+    lines = np.asarray(lines, dtype=object)
+    type_id = shapely.get_type_id(lines)
+    out = np.full(len(lines), None, dtype=object)
+    out[type_id == 1] = lines[type_id == 1]
+    multi = np.flatnonzero(type_id == 5)
+    if len(multi):
+        coords, owner = shapely.get_coordinates(lines[multi], return_index=True)
+        parts, owner = np.unique(owner, return_inverse=True)
+        out[multi[parts]] = shapely.linestrings(coords, indices=owner)
+    return out
+
+
+def derive_columns(lines, lines_m):
+    """
+    CACHED_COLUMNS de cada link a partir de sus geometrías EPSG:4326 y métricas:
+    longitud de la línea normalizada (m), rumbo de inicio a fin (grados desde el
+    norte, sentido horario), si el primer vértice es el nodo de referencia (regla
+    en lat/lon) y los extremos en metros (NaN si la geometría no tiene vértices).
+    """
+    start_m, end_m = line_endpoints(*flatten_lines(lines_m))
+    delta = end_m - start_m
+    return {
+        "length_m": shapely.length(normalize_lines(lines_m)),
+        "bearing": np.degrees(np.arctan2(delta[:, 0], delta[:, 1])) % 360,
+        "ref_first": reference_first(*line_endpoints(*flatten_lines(lines))),
+        "start_m": start_m,
+        "end_m": end_m,
+    }
+
+
+class LinkAttributes:
+    """
+    Atributos derivados de la geometría de cada link de un tile, calculados una
+    sola vez en bloque y compartidos (solo lectura) por todos los validadores.
+    Mismo orden de filas que las geometrías con las que se construyó (en el
+    pipeline: streets_nav y, al final, tile_data["external_links"]).
+
+    - hashes:      hash de los vértices EPSG:4326 (geometry_hashes; llave del caché)
+    - lines / lines_m: geometrías EPSG:4326 y en el CRS métrico del tile
+    - line_m:      lines_m normalizada (normalize_lines; None si no es lineal)
+    - simple:      True si el link es un LineString no vacío
+    - length_m, bearing, ref_first, start_m / end_m: ver derive_columns
+    - ref_m / non_ref_m: nodo de referencia y no-referencia en metros
+    """
+
+    def __init__(self, hashes, lines, lines_m, columns):
+        self.hashes = hashes
+        self.lines = np.asarray(lines, dtype=object)
+        self.lines_m = np.asarray(lines_m, dtype=object)
+        self.line_m = normalize_lines(self.lines_m)
+        self.simple = (shapely.get_type_id(self.lines) == 1) & ~shapely.is_empty(self.lines)
+        for name in CACHED_COLUMNS:
+            setattr(self, name, columns[name])
+        first_is_ref = self.ref_first[:, None]
+        self.ref_m = np.where(first_is_ref, self.start_m, self.end_m)
+        self.non_ref_m = np.where(first_is_ref, self.end_m, self.start_m)
+
+        for arr in (self.hashes, self.lines, self.lines_m, self.line_m, self.simple,
+                    self.ref_m, self.non_ref_m, *columns.values()):
+            arr.flags.writeable = False
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+def _read_cache(cache_path, crs):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path) as cache:
+            if int(cache["version"]) != ATTRIBUTES_VERSION or str(cache["crs"]) != crs.to_string():
+                return None
+            return {k: cache[k] for k in ("hashes", "coords", "offsets", *CACHED_COLUMNS)}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, crs, attrs):
+    # Una fila por geometría distinta, ordenadas por hash (búsqueda con searchsorted)
+    hashes, rows = np.unique(attrs.hashes, return_index=True)
+    keep = hashes != 0
+    hashes, rows = hashes[keep], rows[keep]
+    coords, offsets = flatten_lines(attrs.lines_m[rows])
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            np.savez(f, version=ATTRIBUTES_VERSION, crs=crs.to_string(), hashes=hashes,
+                     coords=coords, offsets=offsets,
+                     **{name: getattr(attrs, name)[rows] for name in CACHED_COLUMNS})
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # El caché es opcional: si el directorio es de solo lectura seguimos sin él
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"[WARN] No se pudo escribir el caché de atributos de links {cache_path}: {e}")
+
+
+def load_link_attributes(lines, crs, cache_path=None):
+    """
+    LinkAttributes de las geometrías EPSG:4326 `lines` en el CRS métrico `crs`.
+
+    Con cache_path (attributes_path_for del NAV), los links cuyo hash ya está
+    en el caché toman de ahí sus vértices en metros y sus columnas, sin
+    reproyectar; solo los nuevos o modificados (y los que no son cacheables)
+    se proyectan y derivan, y el caché se reescribe si alguno era cacheable.
+    """
+    lines = np.asarray(lines, dtype=object)
+    hashes = geometry_hashes(lines)
+    cached = _read_cache(cache_path, crs) if cache_path else None
+
+    hit = np.zeros(len(lines), dtype=bool)
+    pos = np.zeros(len(lines), dtype=np.int64)
+    if cached is not None and len(cached["hashes"]):
+        pos = np.minimum(np.searchsorted(cached["hashes"], hashes), len(cached["hashes"]) - 1)
+        hit = (hashes != 0) & (cached["hashes"][pos] == hashes)
+    miss = np.flatnonzero(~hit)
+
+    lines_m = np.full(len(lines), None, dtype=object)
+    columns = {}
+    if hit.any():
+        lines_m[hit] = _gather_lines(cached["coords"], cached["offsets"], pos[hit])
+        for name in CACHED_COLUMNS:
+            values = cached[name]
+            columns[name] = np.empty((len(lines),) + values.shape[1:], dtype=values.dtype)
+            columns[name][hit] = values[pos[hit]]
+    if len(miss) or not columns:
+        lines_m[miss] = gpd.GeoSeries(lines[miss], crs="EPSG:4326").to_crs(crs).to_numpy()
+        derived = derive_columns(lines[miss], lines_m[miss])
+        for name in CACHED_COLUMNS:
+            if name not in columns:
+                values = derived[name]
+                columns[name] = np.empty((len(lines),) + values.shape[1:], dtype=values.dtype)
+            columns[name][miss] = derived[name]
+
+    attrs = LinkAttributes(hashes, lines, lines_m, columns)
+    if cache_path and (hashes[miss] != 0).any():
+        _write_cache(cache_path, crs, attrs)
+    return attrs
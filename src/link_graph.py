@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.strtree import STRtree
+
+from link_store import flatten_lines, line_endpoints
+
+# Dos extremos son el mismo nodo si coinciden a esta resolución (metros)
+NODE_TOLERANCE_M = 0.01
+
+# Sentido de circulación por link (DIR_TRAVEL): "F" del nodo de referencia al
+# otro, "T" hacia el nodo de referencia, "B" (o desconocido) ambos sentidos
+FORWARD, BACKWARD, BOTH = 1, -1, 0
+
+
+def travel_codes(dir_travel):
+    values = pd.Series(dir_travel).astype(str).str.strip().str.upper().to_numpy()
+    return np.select([values == "F", values == "T"], [FORWARD, BACKWARD], BOTH).astype(np.int8)
+
+
+def node_ids(start, end, tolerance=NODE_TOLERANCE_M):
+    """
+    Nodo inicial (u) y final (v) de cada link: los extremos que coinciden
+    (redondeados a `tolerance`) son el mismo nodo. -1 si el link no tiene vértices.
+    """
+    points = np.concatenate([start, end])
+    valid = ~np.isnan(points).any(axis=1)
+    ids = np.full(len(points), -1, dtype=np.int64)
+    if valid.any():
+        keys = np.round(points[valid] / tolerance).astype(np.int64)
+        ids[valid] = np.unique(keys, axis=0, return_inverse=True)[1].reshape(-1)
+    return ids[:len(start)], ids[len(start):]
+
+
+def connected_components(n, a, b):
+    """
+    Componente conexa de n vértices con aristas (a[k], b[k]); la etiqueta es el
+    menor vértice del componente. Sin scipy: cada ronda cuelga la raíz mayor de
+    cada arista de la menor y luego se comprimen los caminos (saltos de puntero).
+    """
+    labels = np.arange(n)
+    while len(a):
+        low = np.minimum(labels[a], labels[b])
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[a], low)
+        np.minimum.at(hooked, labels[b], low)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            break
+        labels = hooked
+    return labels
+
+
+def merge_chains(u, v, group):
+    """
+    Cadenas de links consecutivos: dos links del mismo grupo (p. ej. mismo
+    ST_NAME y MULTIDIGIT) se unen si comparten un nodo al que no llega ningún
+    otro link de ese grupo. En un cruce o bifurcación la cadena se corta.
+    Regresa la cadena de cada link (0..k-1), -1 para los links con group < 0.
+    """
+    n = len(u)
+    link = np.concatenate([np.arange(n), np.arange(n)])
+    node = np.concatenate([u, v])
+    grp = np.concatenate([group, group])
+    ok = (node >= 0) & (grp >= 0)
+    link, node, grp = link[ok], node[ok], grp[ok]
+
+    # Incidencias (grupo, nodo): los nodos con exactamente dos unen a sus links
+    order = np.lexsort((link, node, grp))
+    link, node, grp = link[order], node[order], grp[order]
+    first = np.ones(len(link), dtype=bool)
+    first[1:] = (grp[1:] != grp[:-1]) | (node[1:] != node[:-1])
+    starts = np.flatnonzero(first)
+    sizes = np.diff(np.append(starts, len(link)))
+    pairs = starts[sizes == 2]
+    a, b = link[pairs], link[pairs + 1]
+    loop = a == b  # un link cerrado sobre sí mismo no une nada
+    labels = connected_components(n, a[~loop], b[~loop])
+
+    chain = np.full(n, -1, dtype=np.int64)
+    member = np.asarray(group) >= 0
+    chain[member] = np.unique(labels[member], return_inverse=True)[1]
+    return chain
+
+
+class LinkSegments:
+    """
+    Segmentos entre vértices consecutivos de las líneas (métricas) de los links:
+
+    - owner:   link de cada segmento
+    - p0 / p1: extremos (x, y) en metros
+    - geoms:   LineString de dos vértices (STRtree / distancias)
+    - length:  metros
+    - axis:    orientación sin sentido, 0–180° desde el norte
+    - heading: rumbo de circulación 0–360° según DIR_TRAVEL; NaN en doble sentido
+
+    Con rumbos por segmento una calzada curva se compara tramo a tramo, no por
+    la cuerda entre su primer y último vértice.
+    """
+
+    def __init__(self, lines_m, travel=None, ref_first=None):
+        parts, part_owner = shapely.get_parts(lines_m, return_index=True)
+        coords, coord_part = shapely.get_coordinates(parts, return_index=True)
+        idx = np.flatnonzero(coord_part[1:] == coord_part[:-1])
+        p0, p1 = coords[idx], coords[idx + 1]
+        delta = p1 - p0
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        keep = length > 0
+
+        self.owner = part_owner[coord_part[idx]][keep]
+        self.p0, self.p1 = p0[keep], p1[keep]
+        self.length = length[keep]
+        delta = delta[keep]
+        bearing = np.degrees(np.arctan2(delta[:, 0], delta[:, 1])) % 360
+        self.axis = bearing % 180
+        self.geoms = shapely.linestrings(np.stack([self.p0, self.p1], axis=1))
+
+        # Sentido de circulación respecto al de digitalización del link
+        self.heading = np.full(len(self.owner), np.nan)
+        if travel is not None and ref_first is not None:
+            sense = travel[self.owner] * np.where(ref_first[self.owner], 1, -1)
+            self.heading[sense > 0] = bearing[sense > 0]
+            self.heading[sense < 0] = (bearing[sense < 0] + 180) % 360
+
+    def __len__(self):
+        return len(self.owner)
+
+
+class ChainMatches:
+    """
+    Resultado de LinkGraph.parallel_chains: pares de links (link_a, link_b) de
+    cadenas paralelas, con los metros de link_a que corren junto a link_b
+    (matched_m) y sus cadenas; ordenados por (link_a, link_b). stats trae los
+    conteos de cadenas y comparaciones.
+    """
+
+    def __init__(self, link_a, link_b, matched_m, chain_a, chain_b, stats):
+        self.link_a = link_a
+        self.link_b = link_b
+        self.matched_m = matched_m
+        self.chain_a = chain_a
+        self.chain_b = chain_b
+        self.stats = stats
+
+    def __len__(self):
+        return len(self.link_a)
+
+
+class LinkGraph:
+    """
+    Grafo nodo/arista de los links de un tile: cada link es una arista entre el
+    nodo de su primer vértice (u) y el de su último vértice (v). Los nodos salen
+    de los extremos métricos, así que un link de otra fila que llega al mismo
+    punto comparte nodo.
+
+    lines_m son las geometrías en el CRS métrico del tile. travel (travel_codes
+    de DIR_TRAVEL) y ref_first (link_store.line_reference_first, en lat/lon)
+    dan el sentido de circulación de cada segmento; sin ellos todos son de
+    doble sentido.
+    """
+
+    def __init__(self, lines_m, travel=None, ref_first=None):
+        lines_m = np.asarray(lines_m, dtype=object)
+        start_m, end_m = line_endpoints(*flatten_lines(lines_m))
+        self.u, self.v = node_ids(start_m, end_m)
+        self.n_nodes = int(max(self.u.max(initial=-1), self.v.max(initial=-1)) + 1)
+        self.length = shapely.length(lines_m)
+        self.segments = LinkSegments(lines_m, travel, ref_first)
+
+    def __len__(self):
+        return len(self.u)
+
+    def degree(self):
+        """
+        Links que llegan a cada nodo (un link cerrado cuenta dos veces).
+        """
+        ends = np.concatenate([self.u, self.v])
+        return np.bincount(ends[ends >= 0], minlength=self.n_nodes)
+
+    def chains(self, group):
+        """
+        Cadena de cada link uniendo links consecutivos del mismo grupo (ver merge_chains).
+        """
+        return merge_chains(self.u, self.v, np.asarray(group))
+
+    def parallel_chains(self, chain, side_a, side_b, key, max_dist, min_dist=0.0,
+                        angle_tol_deg=45, min_overlap=0.5):
+        """
+        Pares de cadenas paralelas: una cadena A (links con side_a) y una B
+        (links con side_b), distintas y con el mismo key (p. ej. ST_NAME), cuyos
+        segmentos corren paralelos (≤ angle_tol_deg) a min_dist–max_dist metros
+        en al menos min_overlap de la longitud de la cadena más corta. Si en los
+        tramos emparejados ambas son de un sentido, deben circular en sentidos
+        opuestos (dos calzadas de la misma vía, no calles paralelas).
+
+        Primero un STRtree con la caja de cada cadena da los pares de cadenas
+        candidatos; solo los segmentos de esos pares se comparan entre sí.
+        """
+        seg = self.segments
+        chain = np.asarray(chain)
+        n_chains = int(chain.max(initial=-1)) + 1
+        seg_chain = chain[seg.owner] if len(seg) else np.empty(0, dtype=np.int64)
+        in_chain = seg_chain >= 0
+        seg_a = np.flatnonzero(in_chain & np.asarray(side_a)[seg.owner])
+        seg_b = np.flatnonzero(in_chain & np.asarray(side_b)[seg.owner])
+
+        chain_key = np.full(n_chains, -1, dtype=np.int64)
+        member = chain >= 0
+        chain_key[chain[member]] = np.asarray(key)[member]
+        chain_len = np.bincount(seg_chain[in_chain], weights=seg.length[in_chain], minlength=n_chains)
+        stats = {
+            "chains_a": int(len(np.unique(seg_chain[seg_a]))),
+            "chains_b": int(len(np.unique(seg_chain[seg_b]))),
+            "chain_pairs": 0,
+            "segment_pairs": 0,
+            "parallel_chains": 0,
+        }
+        empty = np.empty(0, dtype=np.int64)
+        if len(seg_a) == 0 or len(seg_b) == 0:
+            return ChainMatches(empty, empty, np.empty(0), empty, empty, stats)
+
+        # 1) Pares de cadenas candidatos por caja envolvente
+        lo = np.minimum(seg.p0, seg.p1)
+        hi = np.maximum(seg.p0, seg.p1)
+        box_lo = np.full((n_chains, 2), np.inf)
+        box_hi = np.full((n_chains, 2), -np.inf)
+        for d in range(2):
+            np.minimum.at(box_lo[:, d], seg_chain[in_chain], lo[in_chain, d])
+            np.maximum.at(box_hi[:, d], seg_chain[in_chain], hi[in_chain, d])
+        chains_a = np.unique(seg_chain[seg_a])
+        chains_b = np.unique(seg_chain[seg_b])
+        boxes = shapely.box(box_lo[:, 0], box_lo[:, 1], box_hi[:, 0], box_hi[:, 1])
+        ia, ib = STRtree(boxes[chains_b]).query(boxes[chains_a], predicate="dwithin", distance=max_dist)
+        ca, cb = chains_a[ia], chains_b[ib]
+        keep = (ca != cb) & (chain_key[ca] == chain_key[cb])
+        candidates = np.unique(ca[keep] * n_chains + cb[keep])
+        stats["chain_pairs"] = int(len(candidates))
+        if len(candidates) == 0:
+            return ChainMatches(empty, empty, np.empty(0), empty, empty, stats)
+
+        # 2) Segmentos de esas cadenas: paralelos y a la distancia indicada
+        seg_a = seg_a[np.isin(seg_chain[seg_a], candidates // n_chains)]
+        seg_b = seg_b[np.isin(seg_chain[seg_b], candidates % n_chains)]
+        i, j = STRtree(seg.geoms[seg_b]).query(seg.geoms[seg_a], predicate="dwithin", distance=max_dist)
+        s, t = seg_a[i], seg_b[j]
+        keep = np.isin(seg_chain[s] * n_chains + seg_chain[t], candidates)
+        s, t = s[keep], t[keep]
+        stats["segment_pairs"] = int(len(s))
+
+        diff = np.abs(seg.axis[s] - seg.axis[t])
+        diff = np.minimum(diff, 180 - diff)
+        keep = diff <= angle_tol_deg
+        s, t = s[keep], t[keep]
+        dist = shapely.distance(seg.geoms[s], seg.geoms[t])
+        keep = (min_dist <= dist) & (dist <= max_dist)
+        s, t, dist = s[keep], t[keep], dist[keep]
+
+        # Cada segmento de A se empareja con el segmento más cercano de cada cadena B
+        order = np.lexsort((t, dist, seg_chain[t], s))
+        s, t = s[order], t[order]
+        first = np.ones(len(s), dtype=bool)
+        first[1:] = (s[1:] != s[:-1]) | (seg_chain[t[1:]] != seg_chain[t[:-1]])
+        s, t = s[first], t[first]
+
+        # 3) Por par de cadenas: traslape y sentido de circulación
+        pair = seg_chain[s] * n_chains + seg_chain[t]
+        pair_codes, pair_idx = np.unique(pair, return_inverse=True)
+        matched = np.bincount(pair_idx, weights=seg.length[s], minlength=len(pair_codes))
+        heading_diff = np.abs((seg.heading[s] - seg.heading[t] + 180) % 360 - 180)
+        same = np.bincount(pair_idx, weights=seg.length[s] * (heading_diff <= 90), minlength=len(pair_codes))
+        opposite = np.bincount(pair_idx, weights=seg.length[s] * (heading_diff > 90), minlength=len(pair_codes))
+        pa, pb = pair_codes // n_chains, pair_codes % n_chains
+        shorter = np.minimum(chain_len[pa], chain_len[pb])
+        accepted = (matched >= min_overlap * shorter) & (same <= opposite)
+        stats["parallel_chains"] = int(accepted.sum())
+
+        keep = accepted[pair_idx]
+        s, t = s[keep], t[keep]
+        link_a, link_b = seg.owner[s], seg.owner[t]
+        n_links = len(self)
+        link_codes, link_idx = np.unique(link_a * n_links + link_b, return_inverse=True)
+        matched_m = np.bincount(link_idx, weights=seg.length[s], minlength=len(link_codes))
+        link_a, link_b = link_codes // n_links, link_codes % n_links
+        return ChainMatches(link_a, link_b, matched_m, chain[link_a], chain[link_b], stats)
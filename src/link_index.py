@@ -0,0 +1,232 @@
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pyogrio
+
+from tile_cache import CACHE_DIR, HAS_PARQUET, NAV_COLUMNS, cache_path_for, is_fresh, read_streets_nav
+from link_store import as_link_ids
+
+NAV_FILE = re.compile(r"^SREETS_NAV_(\d+)\.geojson$")
+
+# Columnas de los links vecinos que necesitan la ubicación y los validadores
+NEIGHBOUR_COLUMNS = ["link_id", "MULTIDIGIT"]
+
+# Links de tiles vecinos cuyas geometrías se conservan en memoria (por proceso)
+NEIGHBOUR_CACHE_LINKS = 200_000
+
+# Un resolvedor por carpeta de datos y por proceso
+_RESOLVERS = {}
+
+
+def nav_path_for(base_path, tile_id):
+    return os.path.join(base_path, "STREETS_NAV", f"SREETS_NAV_{tile_id}.geojson")
+
+
+class LinkIndex:
+    """
+    Índice global link_id → tile_id de todos los SREETS_NAV_<tile>.geojson de base_path.
+
+    Solo guarda dos arreglos int64 ordenados por link_id. Se persiste en
+    STREETS_NAV/.cache/link_index.npz junto con el mtime/tamaño de cada archivo
+    NAV; al reconstruirlo solo se vuelven a leer los tiles que cambiaron.
+    """
+
+    def __init__(self, base_path, use_cache=True):
+        self.nav_dir = os.path.join(base_path, "STREETS_NAV")
+        self.cache_path = os.path.join(self.nav_dir, CACHE_DIR, "link_index.npz")
+
+        sources = self._sources()
+        cached = self._read_cache() if use_cache else None
+        if cached is not None and np.array_equal(cached["sources"], sources):
+            link_ids, link_tiles = cached["link_ids"], cached["link_tiles"]
+        else:
+            link_ids, link_tiles = self._build(sources, cached)
+            if use_cache:
+                self._write_cache(sources, link_ids, link_tiles)
+
+        self.link_ids = link_ids
+        self.link_tiles = link_tiles
+        self.tile_ids = sources[:, 0]
+
+    def __len__(self):
+        return len(self.link_ids)
+
+    def _sources(self):
+        # [tile_id, mtime_ns, size] de cada archivo NAV, ordenado por tile_id
+        rows = []
+        if os.path.isdir(self.nav_dir):
+            for name in os.listdir(self.nav_dir):
+                match = NAV_FILE.match(name)
+                if match:
+                    st = os.stat(os.path.join(self.nav_dir, name))
+                    rows.append((int(match.group(1)), st.st_mtime_ns, st.st_size))
+        return np.array(sorted(rows), dtype=np.int64).reshape(-1, 3)
+
+    def _read_link_ids(self, tile_id):
+        path = os.path.join(self.nav_dir, f"SREETS_NAV_{tile_id}.geojson")
+        cache_path = cache_path_for(path)
+        if HAS_PARQUET and is_fresh(path, cache_path, NAV_COLUMNS):
+            values = pd.read_parquet(cache_path, columns=["link_id"])["link_id"]
+        else:
+            values = pyogrio.read_dataframe(path, columns=["link_id"], read_geometry=False)["link_id"]
+        ids, valid = as_link_ids(values)
+        return np.unique(ids[valid])
+
+    def _build(self, sources, cached):
+        unchanged = set()
+        if cached is not None:
+            previous = {tuple(row) for row in cached["sources"].tolist()}
+            unchanged = {row[0] for row in sources.tolist() if tuple(row) in previous}
+
+        parts_ids, parts_tiles = [], []
+        if unchanged:
+            keep = np.isin(cached["link_tiles"], list(unchanged))
+            parts_ids.append(cached["link_ids"][keep])
+            parts_tiles.append(cached["link_tiles"][keep])
+        for tile_id in sources[:, 0].tolist():
+            if tile_id in unchanged:
+                continue
+            ids = self._read_link_ids(tile_id)
+            parts_ids.append(ids)
+            parts_tiles.append(np.full(len(ids), tile_id, dtype=np.int64))
+
+        if not parts_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        link_ids = np.concatenate(parts_ids).astype(np.int64)
+        link_tiles = np.concatenate(parts_tiles).astype(np.int64)
+        # Orden por (link_id, tile_id): un link que cruza tiles queda con el tile menor primero
+        order = np.lexsort((link_tiles, link_ids))
+        print(f"[INFO] Índice de links: {len(sources) - len(unchanged)} tiles NAV leídos, "
+              f"{len(unchanged)} reutilizados ({len(link_ids)} links)")
+        return link_ids[order], link_tiles[order]
+
+    def _read_cache(self):
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            with np.load(self.cache_path) as cache:
+                return {k: cache[k] for k in ("sources", "link_ids", "link_tiles")}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _write_cache(self, sources, link_ids, link_tiles):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(f, sources=sources, link_ids=link_ids, link_tiles=link_tiles)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # El caché es opcional: si el directorio es de solo lectura seguimos sin él
+            print(f"[WARN] No se pudo escribir el índice de links {self.cache_path}: {e}")
+
+    def tiles_for(self, link_ids, exclude_tile=None):
+        """
+        Tile que contiene cada link_id (-1 si no está en ningún NAV). Con exclude_tile
+        se busca el link en cualquier otro tile.
+        """
+        ids, valid = as_link_ids(link_ids)
+        ids_sorted, tiles_sorted = self.link_ids, self.link_tiles
+        if exclude_tile is not None:
+            other = tiles_sorted != int(exclude_tile)
+            ids_sorted, tiles_sorted = ids_sorted[other], tiles_sorted[other]
+        result = np.full(len(ids), -1, dtype=np.int64)
+        if len(ids_sorted) == 0:
+            return result
+        pos = np.minimum(np.searchsorted(ids_sorted, ids), len(ids_sorted) - 1)
+        found = valid & (ids_sorted[pos] == ids)
+        result[found] = tiles_sorted[pos[found]]
+        return result
+
+
+class NeighbourLinkCache:
+    """
+    Caché LRU de links de tiles vecinos (solo link_id, MULTIDIGIT y geometría),
+    por link: de cada tile solo se leen (filtradas en el caché Parquet) las filas
+    de los links pedidos que aún no están en memoria. A lo más max_links links.
+    """
+
+    def __init__(self, base_path, max_links=NEIGHBOUR_CACHE_LINKS):
+        self.base_path = base_path
+        self.max_links = max_links
+        # (tile_id, link_id) → (MULTIDIGIT, geometría)
+        self._links = OrderedDict()
+
+    def __len__(self):
+        return len(self._links)
+
+    def links(self, tile_id, link_ids):
+        """
+        GeoDataFrame (link_id, MULTIDIGIT, geometry) con los link_ids que están en
+        el NAV de tile_id, en el orden de link_ids (primera fila de cada link).
+        """
+        tile_id = int(tile_id)
+        keys = [(tile_id, link_id) for link_id in np.asarray(link_ids, dtype=np.int64).tolist()]
+        unread = [link_id for key_tile, link_id in keys if (key_tile, link_id) not in self._links]
+        if unread:
+            rows = read_streets_nav(nav_path_for(self.base_path, tile_id), columns=NEIGHBOUR_COLUMNS, link_ids=unread)
+            rows = rows.drop_duplicates(subset="link_id", keep="first")
+            for link_id, multidigit, geom in zip(rows["link_id"].tolist(), rows["MULTIDIGIT"].tolist(),
+                                                 rows.geometry.array):
+                self._links[(tile_id, int(link_id))] = (multidigit, geom)
+
+        found = []
+        for key in keys:
+            row = self._links.get(key)
+            if row is not None:
+                self._links.move_to_end(key)
+                found.append((key[1], *row))
+        while len(self._links) > self.max_links:
+            self._links.popitem(last=False)
+        return gpd.GeoDataFrame(found, columns=["link_id", "MULTIDIGIT", "geometry"], geometry="geometry",
+                                crs="EPSG:4326")
+
+
+class LinkResolver:
+    """
+    Resuelve los LINK_ID que no están en el NAV del propio tile: el índice global
+    dice en qué tile vive cada uno y la caché LRU da su geometría.
+    """
+
+    def __init__(self, base_path, max_links=NEIGHBOUR_CACHE_LINKS):
+        self.index = LinkIndex(base_path)
+        self.cache = NeighbourLinkCache(base_path, max_links)
+
+    def foreign_links(self, tile_id, link_ids, own_link_ids):
+        """
+        LINK_ID únicos (ordenados) de link_ids que no están en own_link_ids, y el
+        tile que contiene cada uno según el índice (-1 si no está en ningún otro NAV).
+        """
+        ids, valid = as_link_ids(link_ids)
+        own, own_valid = as_link_ids(own_link_ids)
+        missing = np.setdiff1d(np.unique(ids[valid]), own[own_valid])
+        return missing, self.index.tiles_for(missing, exclude_tile=tile_id)
+
+    def external_links(self, missing, tiles):
+        """
+        GeoDataFrame con los links (link_id, MULTIDIGIT, geometry, link_tile) de
+        foreign_links que sí están en otro tile. None si no hay ninguno.
+        """
+        parts = []
+        for neighbour in np.unique(tiles[tiles >= 0]).tolist():
+            part = self.cache.links(neighbour, missing[tiles == neighbour])
+            parts.append(part.assign(link_tile=neighbour))
+        if not parts:
+            return None
+        return pd.concat(parts, ignore_index=True)
+
+
+def get_link_resolver(base_path, max_links=NEIGHBOUR_CACHE_LINKS):
+    """
+    Devuelve el LinkResolver de base_path, construyéndolo solo la primera vez en el proceso.
+    """
+    key = os.path.abspath(base_path)
+    resolver = _RESOLVERS.get(key)
+    if resolver is None:
+        resolver = LinkResolver(base_path, max_links)
+        _RESOLVERS[key] = resolver
+    return resolver
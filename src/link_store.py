@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import shapely
+
+
+def as_link_ids(values):
+    """
+    LINK_IDs como int64 más una máscara de válidos (los nulos o no numéricos
+    quedan en -1 con valid=False).
+    """
+    ids = pd.to_numeric(pd.Series(values), errors="coerce")
+    valid = ids.notna().to_numpy()
+    return ids.fillna(-1).to_numpy(dtype=np.int64), valid
+
+
+def flatten_lines(geoms):
+    """
+    Vértices de todas las geometrías en un solo arreglo (n, 2) más los offsets:
+    los de la geometría i son coords[offsets[i]:offsets[i + 1]].
+    """
+    coords, owner = shapely.get_coordinates(geoms, return_index=True)
+    offsets = np.zeros(len(geoms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=len(geoms)), out=offsets[1:])
+    return coords, offsets
+
+
+def line_endpoints(coords, offsets):
+    """
+    Primer y último vértice de cada geometría sacados del arreglo plano (sin
+    crear Points); NaN si la geometría no tiene vértices.
+    """
+    start = np.full((len(offsets) - 1, 2), np.nan)
+    end = np.full((len(offsets) - 1, 2), np.nan)
+    has_coords = offsets[1:] > offsets[:-1]
+    start[has_coords] = coords[offsets[:-1][has_coords]]
+    end[has_coords] = coords[offsets[1:][has_coords] - 1]
+    return start, end
+
+
+def reference_first(start_ll, end_ll):
+    """
+    True si el primer vértice es el nodo de referencia del link (menor latitud,
+    empate → menor longitud), con los extremos en lat/lon.
+    """
+    return (start_ll[:, 1] < end_ll[:, 1]) | (
+        (start_ll[:, 1] == end_ll[:, 1]) & (start_ll[:, 0] <= end_ll[:, 0])
+    )
+
+
+def line_reference_first(lines_ll):
+    """
+    reference_first de cada línea EPSG:4326.
+    """
+    return reference_first(*line_endpoints(*flatten_lines(np.asarray(lines_ll, dtype=object))))
+
+
+class LinkStore:
+    """
+    Almacén compacto de los links de un tile, ordenado por link_id:
+
+    - ids:         link_id únicos (int64, ordenados; búsqueda con searchsorted)
+    - rows:        fila de streets_nav de cada link (primera aparición del link_id)
+    - lines / lines_m: geometrías EPSG:4326 y en el CRS métrico (lines_m es None sin CRS métrico)
+    - coords, offsets: vértices de todos los links en un solo arreglo (n, 2);
+      los del link i son coords[offsets[i]:offsets[i + 1]]
+    - start / end: primer y último vértice en lat/lon (NaN si la geometría está vacía)
+    - duplicate_ids: link_id que aparecen más de una vez en streets_nav
+
+    Todo se calcula una sola vez; los arreglos son de solo lectura. Longitudes,
+    rumbos y nodos en metros están en link_attributes.py.
+    """
+
+    def __init__(self, link_ids, lines, lines_m=None):
+        ids, valid = as_link_ids(link_ids)
+        rows = np.flatnonzero(valid)
+        ids = ids[rows]
+
+        # Orden estable: entre ids repetidos gana la primera aparición
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        first = np.ones(len(sorted_ids), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        self.ids = sorted_ids[first]
+        self.rows = rows[order[first]]
+        counts = np.diff(np.append(np.flatnonzero(first), len(sorted_ids)))
+        self.duplicate_ids = self.ids[counts > 1]
+        self.n_invalid = int((~valid).sum())
+
+        self.lines = np.asarray(lines, dtype=object)[self.rows]
+        self.lines_m = np.asarray(lines_m, dtype=object)[self.rows] if lines_m is not None else None
+        self.simple = (shapely.get_type_id(self.lines) == 1) & ~shapely.is_empty(self.lines)
+
+        self.coords, self.offsets = flatten_lines(self.lines)
+        self.start, self.end = line_endpoints(self.coords, self.offsets)
+
+        for arr in (self.ids, self.rows, self.duplicate_ids, self.lines, self.lines_m, self.simple,
+                    self.coords, self.offsets, self.start, self.end):
+            if arr is not None:
+                arr.flags.writeable = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, link_ids):
+        """
+        Posición de cada link_id en los arreglos del almacén (-1 si no existe o es nulo).
+        """
+        ids, valid = as_link_ids(link_ids)
+        pos = np.searchsorted(self.ids, ids)
+        pos = np.minimum(pos, max(len(self.ids) - 1, 0))
+        found = valid & (len(self.ids) > 0)
+        found[found] = self.ids[pos[found]] == ids[found]
+        return np.where(found, pos, -1)
+
+    def link_coords(self, pos):
+        """
+        Vértices (lon, lat) del link en la posición `pos`.
+        """
+        return self.coords[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def report_duplicates(self, tile_id, limit=10):
+        """
+        Avisa (una línea) de los link_id repetidos o nulos en streets_nav.
+        """
+        if len(self.duplicate_ids):
+            sample = ", ".join(str(i) for i in self.duplicate_ids[:limit].tolist())
+            more = " ..." if len(self.duplicate_ids) > limit else ""
+            print(f"[WARN] Tile {tile_id}: {len(self.duplicate_ids)} link_id repetidos en STREETS_NAV "
+                  f"(se usa la primera aparición): {sample}{more}")
+        if self.n_invalid:
+            print(f"[WARN] Tile {tile_id}: {self.n_invalid} links sin link_id en STREETS_NAV (se ignoran)")
+
+
+def build_link_store(streets_nav_gdf, streets_nav_m=None):
+    """
+    LinkStore a partir del GeoDataFrame de STREETS_NAV (y opcionalmente sus geometrías métricas).
+    """
+    lines_m = streets_nav_m.to_numpy() if streets_nav_m is not None else None
+    return LinkStore(streets_nav_gdf["link_id"], streets_nav_gdf.geometry.array, lines_m)
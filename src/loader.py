@@ -1,75 +1,163 @@
 import os
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
+import shapely
+from tile_catalog import get_catalog
+from tile_cache import read_streets_nav, read_naming
+from projection import project_tile
+from tile_context import prepare_tile
+from link_store import build_link_store
+from link_index import get_link_resolver
+from instrumentation import stage
+from config import invalid_pois_path
+from result_writer import get_writer
 
-def validate_pois_within_tile(pois_df, tile_geom, streets_nav_gdf):
+# Tipos de las columnas numéricas de POI_<tile>.csv que leen los validadores;
+# las demás columnas se leen como texto (ver poi_dtypes)
+POI_DTYPES = {"POI_ID": "Int64", "LINK_ID": "Int64", "FAC_TYPE": "Int64", "PERCFRREF": "float64"}
+
+def validate_pois_within_tile(pois_df, tile_geom, streets_nav_gdf, context=None):
     """
     Calcula la geometría de cada POI interpolando su posición sobre el LINK_ID usando PERCFRREF.
     Luego verifica si cae dentro del tile.
+
+    Todo se hace en bloque: un solo join POI→link, una llamada a
+    shapely.line_interpolate_point y un contains contra el tile preparado.
     """
-    # Asegura que el índice de calles esté por LINK_ID para acceso rápido
-    streets_nav_gdf = streets_nav_gdf.set_index("link_id")
+    # LINK_ID → geometría con el LinkStore del tile (si hay duplicados gana la primera
+    # aparición); si ya existe el TileContext del tile se reutiliza el suyo
+    links = context.links if context is not None else build_link_store(streets_nav_gdf)
+    link_geoms = links.lines
+
+    pos = links.lookup(pois_df["LINK_ID"])
+    found = pos >= 0  # -1 = el LINK_ID no existe
 
-    geometries = []
-    for _, row in pois_df.iterrows():
-        link_id = row["LINK_ID"]
-        perc = row.get("PERCFRREF", 50) / 100.0  # default: centro
+    if "PERCFRREF" in pois_df.columns:
+        perc = pois_df["PERCFRREF"].to_numpy(dtype=float) / 100.0
+    else:
+        perc = np.full(len(pois_df), 0.5)  # default: centro
 
-        try:
-            link_geom = streets_nav_gdf.loc[link_id].geometry
-            poi_geom = link_geom.interpolate(perc, normalized=True)
-        except KeyError:
-            poi_geom = None  # El LINK_ID no existe
-        geometries.append(poi_geom)
+    geometries = np.full(len(pois_df), None, dtype=object)
+    geometries[found] = shapely.line_interpolate_point(
+        link_geoms[pos[found]], perc[found], normalized=True
+    )
 
     # Asignar geometrías
     pois_df["geometry"] = geometries
     pois_gdf = gpd.GeoDataFrame(pois_df, geometry="geometry", crs="EPSG:4326")
 
-    # Validar si están dentro del tile
-    pois_gdf["inside_tile"] = pois_gdf["geometry"].apply(lambda geom: geom.within(tile_geom) if geom else False)
+    # Validar si están dentro del tile (contains con el tile preparado == within por POI)
+    shapely.prepare(tile_geom)
+    pois_gdf["inside_tile"] = shapely.contains(tile_geom, geometries)
 
     return pois_gdf
 
-def load_tile(tile_id: int, base_path: str = "data", export_errors: bool = True) -> dict:
+def tile_paths(tile_id, base_path="data"):
     """
-    Carga y valida los datos de un tile. Exporta errores si se encuentran POIs fuera del tile.
+    Rutas de los archivos de entrada de un tile. Falla si falta alguno.
     """
-    poi_path = os.path.join(base_path, "POIs", f"POI_{tile_id}.csv")
-    nav_path = os.path.join(base_path, "STREETS_NAV", f"SREETS_NAV_{tile_id}.geojson")
-    naming_path = os.path.join(base_path, "STREETS_NAMING_ADDRESSING", f"SREETS_NAMING_ADDRESSING_{tile_id}.geojson")
-    tiles_path = os.path.join(base_path, "HERE_L11_Tiles.geojson")
-
-    for path in [poi_path, nav_path, naming_path, tiles_path]:
+    paths = {
+        "poi": os.path.join(base_path, "POIs", f"POI_{tile_id}.csv"),
+        "nav": os.path.join(base_path, "STREETS_NAV", f"SREETS_NAV_{tile_id}.geojson"),
+        "naming": os.path.join(base_path, "STREETS_NAMING_ADDRESSING", f"SREETS_NAMING_ADDRESSING_{tile_id}.geojson"),
+        "tiles": os.path.join(base_path, "HERE_L11_Tiles.geojson"),
+    }
+    for path in paths.values():
         if not os.path.exists(path):
             raise FileNotFoundError(f"Archivo no encontrado: {path}")
+    return paths
+
+def load_tile_streets(tile_id: int, base_path: str = "data", poi_link_ids=None) -> dict:
+    """
+    Carga todo lo del tile excepto los POIs: calles NAV, NAMING y polígono del tile,
+    ya proyectados a metros y con su TileContext preparado.
+    Es la base del modo streaming (los POIs llegan por chunks).
+
+    Con poi_link_ids (LINK_ID de los POIs del tile), los links que no están en el
+    NAV del tile se buscan en los tiles vecinos (link_index.py) y quedan en
+    tile_data["external_links"]; tile_data["link_tiles"] lista esos tiles y
+    tile_data["foreign_links"] todos esos LINK_ID, se hayan encontrado o no.
+    """
+    paths = tile_paths(tile_id, base_path)
+    tile_data = {"tile_id": tile_id, "nav_path": paths["nav"]}
+    # NAV y NAMING salen del caché columnar (se reconstruye si cambió el GeoJSON)
+    with stage("read_nav") as info:
+        tile_data["streets_nav"] = read_streets_nav(paths["nav"])
+        info["rows"] = len(tile_data["streets_nav"])
+    with stage("read_naming") as info:
+        tile_data["naming"] = read_naming(paths["naming"])
+        info["rows"] = len(tile_data["naming"])
+    tile_data["link_tiles"] = []
+    tile_data["foreign_links"] = []
+    if poi_link_ids is not None:
+        with stage("resolve_links") as info:
+            resolver = get_link_resolver(base_path)
+            missing, tiles = resolver.foreign_links(tile_id, poi_link_ids, tile_data["streets_nav"]["link_id"])
+            external = resolver.external_links(missing, tiles)
+            info["rows"] = 0 if external is None else len(external)
+        tile_data["foreign_links"] = missing.tolist()
+        if external is not None:
+            tile_data["external_links"] = external
+            tile_data["link_tiles"] = sorted(set(external["link_tile"].tolist()))
+            print(f"[INFO] {len(external)} links de tiles vecinos resueltos {tile_data['link_tiles']}")
+    # El índice de tiles se carga una sola vez por proceso
+    with stage("tile_geom"):
+        tile_data["tile_geom"] = get_catalog(paths["tiles"]).geometry(tile_id)
+    with stage("project_streets"):
+        project_tile(tile_data)
+    with stage("prepare_context") as info:
+        info["rows"] = len(prepare_tile(tile_data).link_ids)
+    return tile_data
+
+def poi_dtypes(poi_path):
+    """
+    Tipos de todas las columnas de POI_<tile>.csv: POI_DTYPES para las numéricas
+    que usan los validadores y texto para las demás. Son fijos, así que la carga
+    completa y los chunks del modo streaming leen (y exportan) lo mismo.
+    """
+    columns = pd.read_csv(poi_path, nrows=0).columns
+    return {c: POI_DTYPES.get(c, str) for c in columns}
+
+def read_pois(poi_path):
+    """
+    POI_<tile>.csv completo, con los tipos de poi_dtypes.
+    """
+    return pd.read_csv(poi_path, dtype=poi_dtypes(poi_path))
 
-    pois = pd.read_csv(poi_path)
-    streets_nav = gpd.read_file(nav_path)
-    naming = gpd.read_file(naming_path)
-    tiles = gpd.read_file(tiles_path)
+def iter_poi_chunks(poi_path, chunksize):
+    """
+    Lee POI_<tile>.csv en chunks de `chunksize` filas, con todas sus columnas y
+    los mismos tipos que read_pois (iguales en todos los chunks).
+    """
+    return pd.read_csv(poi_path, dtype=poi_dtypes(poi_path), chunksize=chunksize)
 
-    tile_geom_row = tiles[tiles["L11_Tile_ID"] == tile_id]
-    if tile_geom_row.empty:
-        raise ValueError(f"No se encontró el tile_id {tile_id} en HERE_L11_Tiles.geojson")
-    
-    tile_geom = tile_geom_row.iloc[0].geometry
-    pois = validate_pois_within_tile(pois, tile_geom, streets_nav)
+def load_tile(tile_id: int, base_path: str = "data", export_errors: bool = True) -> dict:
+    """
+    Carga y valida los datos de un tile. Exporta errores si se encuentran POIs fuera del tile.
+    """
+    paths = tile_paths(tile_id, base_path)
 
+    with stage("read_pois") as info:
+        pois = read_pois(paths["poi"])
+        info["rows"] = len(pois)
+    tile_data = load_tile_streets(tile_id, base_path, pois["LINK_ID"] if "LINK_ID" in pois.columns else None)
+    with stage("placement") as info:
+        pois = validate_pois_within_tile(pois, tile_data["tile_geom"], tile_data["streets_nav"], tile_data["context"])
+        info["rows"] = len(pois)
 
     if export_errors:
         outside_pois = pois[pois["inside_tile"] == False]
         if not outside_pois.empty:
-            os.makedirs("outputs", exist_ok=True)
-            output_path = f"outputs/invalid_pois_{tile_id}.json"
-            outside_pois[["POI_ID", "LINK_ID", "geometry"]].to_file(output_path, driver="GeoJSON")
+            with stage("export_invalid") as info:
+                output_path = invalid_pois_path(tile_id)
+                get_writer().write_geodataframe(output_path, outside_pois[["POI_ID", "LINK_ID", "geometry"]])
+                info["rows"] = len(outside_pois)
             print(f"[INFO] {len(outside_pois)} POIs fuera del tile exportados a {output_path}")
 
-    return {
-        "tile_id": tile_id,
-        "pois": pois,
-        "streets_nav": streets_nav,
-        "naming": naming,
-        "tile_geom": tile_geom
-    }
+    tile_data["pois"] = pois
+    # Geometrías en metros (UTM) una sola vez, compartidas por todos los validadores
+    with stage("project_pois") as info:
+        tile_data["pois_m"] = pois.geometry.to_crs(tile_data["metric_crs"])
+        info["rows"] = len(pois)
+    return tile_data
@@ -1,61 +1,286 @@
 import os
-import geopandas as gpd
-from loader import load_tile
-from validate_slide import validate_poi_side, export_validation_results
-from validate_multidigit import validate_multidigit
-from validate_existence import validate_existence
+import io
+import json
+import argparse
+import cProfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from loader import load_tile, tile_paths
+from link_index import get_link_resolver, nav_path_for
+from tile_catalog import get_catalog
+from pipeline import run_validators
+import config
+from config import output_path, existence_path, multidigit_errors_path, side_errors_path
+from result_writer import flush_writes
+from streaming import validate_tile_streaming
+from run_manifest import RunManifest, validator_fingerprints, links_digest, NEIGHBOUR_PREFIX, LINKS_KEY
+from merge_results import merge_results
+from export_dashboard import export_dashboard
+from instrumentation import TileRecorder, recording, profile_stats, write_run_report, dump_slowest_profiles
+from repartition import unit_costs
 import traceback
 
+SUMMARY_PATH = output_path("run_summary.json")
+MANIFEST_PATH = output_path("run_manifest.json")
+REPORT_PATH = output_path("run_report.jsonl")
+PROFILE_DIR = output_path("profiles")
 
-# Ruta absoluta al proyecto
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-DATA_DIR = os.path.join(ROOT_DIR, "data")
 
-# Cargar lista de tiles desde geojson
-tiles_path = os.path.join(DATA_DIR, "HERE_L11_Tiles.geojson")
-tiles_gdf = gpd.read_file(tiles_path)
-tile_ids = sorted(tiles_gdf["L11_Tile_ID"].unique())
+def tile_outputs(tile_id, summary):
+    """
+    Archivos que deja la validación de un tile (mismas rutas que usan los validadores).
+    """
+    outputs = [existence_path(tile_id), multidigit_errors_path(tile_id)]
+    if summary.get("side_errors"):
+        outputs.append(side_errors_path(tile_id))
+    return outputs
 
-EXIST_OUT = os.path.join(ROOT_DIR, "outputs", "existence")
-os.makedirs(EXIST_OUT, exist_ok=True)
 
-# Filtrar los tiles que tienen POI disponible
-tile_ids_with_data = [
-    tid for tid in tile_ids if os.path.exists(os.path.join(DATA_DIR, "POIs", f"POI_{tid}.csv"))
-]
+def tile_inputs(tile_id, link_tiles=()):
+    """
+    Entradas de un tile para el manifiesto: sus archivos y el NAV de los tiles vecinos de los que toma links.
+    """
+    paths = tile_paths(tile_id, config.DATA_DIR)
+    for neighbour in link_tiles:
+        paths[f"{NEIGHBOUR_PREFIX}{neighbour}"] = nav_path_for(config.DATA_DIR, neighbour)
+    return paths
 
-print(f"Tiles únicos en el geojson: {len(tile_ids)}")
-print(f"Tiles con archivo POI disponible: {len(tile_ids_with_data)}\n")
 
-for tile_id in tile_ids_with_data:
+def validate_tile(tile_id):
+    """
+    Carga el tile completo en memoria y corre los validadores. Regresa los conteos del tile.
+    """
+    tile_data = load_tile(tile_id, base_path=config.DATA_DIR)
+    total = len(tile_data["pois"])
+    inside = int(tile_data["pois"]["inside_tile"].sum())
+    outside = total - inside
+    print(f"POIs totales: {total}")
+    print(f"Dentro del tile: {inside}")
+    print(f"Fuera del tile: {outside}\n")
+
+    # Validadores registrados (lado de calle, MULTIDIGIT, existence, ...) sobre el mismo contexto
+    counts = run_validators(tile_data)
+
+    return dict(pois_total=total, pois_inside=inside, pois_outside=outside, **counts,
+                link_tiles=tile_data["link_tiles"], foreign_links=tile_data["foreign_links"])
+
+
+def process_tile(tile_id, chunksize=None, profile=False, tile_workers=None):
+    """
+    Valida un tile. Se ejecuta dentro de un worker: solo regresa un resumen
+    compacto (conteos + tiempos por etapa + log de consola), nunca los GeoDataFrames.
+    Con chunksize los POIs se leen y validan por chunks (ver streaming.py).
+    Con profile también regresa las estadísticas de cProfile del tile.
+    Con tile_workers los validadores reparten el tile entre ese número de procesos (tile_shards.py).
+    """
+    if tile_workers is not None:
+        config.set_tile_workers(tile_workers)
+    summary = {"tile_id": int(tile_id), "status": "ok"}
+    log = io.StringIO()
+    recorder = TileRecorder(tile_id)
+    profiler = cProfile.Profile() if profile else None
+
+    with contextlib.redirect_stdout(log), recording(recorder):
+        if profiler:
+            profiler.enable()
+        try:
+            if chunksize:
+                summary.update(validate_tile_streaming(tile_id, config.DATA_DIR, chunksize))
+                print(f"POIs totales: {summary['pois_total']}")
+                print(f"Dentro del tile: {summary['pois_inside']}")
+                print(f"Fuera del tile: {summary['pois_outside']}")
+                for etype, cnt in summary["existence"].items():
+                    print(f"    {etype:16s}: {cnt}")
+            else:
+                summary.update(validate_tile(tile_id))
+
+        except Exception as e:
+            print(f"[ERROR] Tile {tile_id} failed:\n{traceback.format_exc()}")
+            summary["status"] = "error"
+            summary["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if profiler:
+                profiler.disable()
+
+        # El tile solo está bien si sus salidas llegaron a disco
+        failures = flush_writes()
+        if failures:
+            print(f"[ERROR] Tile {tile_id}: no se pudieron escribir sus salidas:\n" + "\n".join(failures))
+            summary["status"] = "error"
+            summary["error"] = "; ".join(filter(None, [summary.get("error")] + failures))
+
+    summary["timing"] = recorder.as_dict()
+    if profiler:
+        summary["profile"] = profile_stats(profiler)
+    summary["log"] = log.getvalue() + (
+        f"[INFO] Tiempo del tile: {recorder.wall_s:.2f} s wall, {recorder.cpu_s:.2f} s CPU, "
+        f"pico {recorder.peak_rss_mb:.0f} MB\n"
+    )
+    return summary
+
+
+def print_summary(summary):
     print("\n-------------------------------------------------------------")
-    print(f"Tile {tile_id}")
-    try:
-        tile_data = load_tile(tile_id, base_path=DATA_DIR)
-        total = len(tile_data["pois"])
-        inside = tile_data["pois"]["inside_tile"].sum()
-        outside = total - inside
-        print(f"POIs totales: {total}")
-        print(f"Dentro del tile: {inside}")
-        print(f"Fuera del tile: {outside}\n")
-        # Ejecutar Módulo 2: Validación de lado de calle
-        results = validate_poi_side(tile_data)
-        export_validation_results(results, tile_id)
-        
-        # Módulo 3 (MULTIDIGIT)
-        validate_multidigit(tile_data)
-        
-        # Módulo 4 (EXISTENCE)
-        exist_gdf = validate_existence(tile_data)
-        os.makedirs(EXIST_OUT, exist_ok=True)
-        out_path = os.path.join(EXIST_OUT, f"existence_{tile_id}.geojson")
-        exist_gdf.to_file(out_path, driver="GeoJSON")
-        print(f"  • Existence report written to: {out_path}")
-
-        # Optional quick counts
-        counts = exist_gdf["error_type"].value_counts()
-        for etype, cnt in counts.items():
-            print(f"    {etype:16s}: {cnt}")
-        
-    except Exception as e:
-        print(f"[ERROR] Tile {tile_id} failed:\n{traceback.format_exc()}")
\ No newline at end of file
+    print(f"Tile {summary['tile_id']}")
+    print(summary["log"], end="")
+
+
+def run(tile_ids, workers=1, chunksize=None, profile=False, tile_workers=None):
+    """
+    Procesa los tiles con un ProcessPoolExecutor de `workers` procesos (1 = sin pool).
+    La consola y el resumen salen siempre en orden de tile_id, sin importar
+    en qué orden terminen los workers. Con pool los tiles se reparten del más
+    grande al más chico (repartition.unit_costs), para que el último en
+    terminar no sea un tile grande que empezó tarde.
+
+    Las salidas de cada tile las escribe en segundo plano el escritor de
+    resultados del proceso (result_writer.py) mientras se sigue calculando el
+    tile; process_tile espera a que terminen antes de armar el resumen, así que
+    un tile cuyas salidas no se pudieron escribir queda con status="error".
+    """
+    tile_ids = sorted(int(t) for t in tile_ids)
+    summaries = {}
+
+    if workers <= 1:
+        for tile_id in tile_ids:
+            summaries[tile_id] = process_tile(tile_id, chunksize, profile, tile_workers)
+            print_summary(summaries[tile_id])
+        return [summaries[t] for t in tile_ids]
+
+    next_idx = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        costs = unit_costs(config.DATA_DIR, tile_ids)
+        futures = {pool.submit(process_tile, tid, chunksize, profile, tile_workers): tid
+                   for tid in sorted(tile_ids, key=lambda t: (-costs[t], t))}
+        for future in as_completed(futures):
+            tile_id = futures[future]
+            try:
+                summaries[tile_id] = future.result()
+            except Exception as e:
+                # El worker murió (p. ej. sin memoria): solo falla este tile
+                summaries[tile_id] = {
+                    "tile_id": tile_id,
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                    "log": f"[ERROR] Tile {tile_id} failed:\n{traceback.format_exc()}",
+                }
+            # Imprimir en orden todos los tiles consecutivos ya terminados
+            while next_idx < len(tile_ids) and tile_ids[next_idx] in summaries:
+                print_summary(summaries[tile_ids[next_idx]])
+                next_idx += 1
+
+    return [summaries[t] for t in tile_ids]
+
+
+def export_run_summary(summaries, path=SUMMARY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compact = [{k: v for k, v in s.items() if k not in ("log", "timing", "profile")} for s in summaries]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(compact, f, indent=2)
+    failed = [s["tile_id"] for s in summaries if s["status"] != "ok"]
+    skipped = sum(1 for s in summaries if s.get("skipped"))
+    print(f"\n[INFO] {len(summaries) - len(failed)} tiles OK, {len(failed)} con error. Resumen en {path}")
+    print(f"[INFO] Tiles sin cambios (omitidos): {skipped}, recalculados: {len(summaries) - skipped}")
+    if failed:
+        print(f"[INFO] Tiles con error: {failed}")
+
+
+def run_incremental(tile_ids, workers=1, chunksize=None, manifest_path=MANIFEST_PATH, force=False, profile=False,
+                    tile_workers=None):
+    """
+    Igual que run(), pero solo valida los tiles cuyas entradas (POI/NAV/NAMING)
+    o validadores cambiaron desde la última ejecución; los demás reutilizan
+    sus salidas y el resumen guardado en el manifiesto. También se vuelve a
+    validar un tile si alguno de los links de fuera que referencian sus POIs
+    cambió de tile o apareció en un NAV (índice de links).
+    """
+    manifest = RunManifest(manifest_path)
+    validators = validator_fingerprints()
+    index = get_link_resolver(config.DATA_DIR).index
+
+    def current_links(tile_id, link_ids):
+        # Dónde está hoy cada link de fuera del tile (el índice ya refleja los NAV actuales)
+        return links_digest(link_ids, index.tiles_for(link_ids, exclude_tile=tile_id))
+
+    inputs = {}
+    pending = []
+    summaries = {}
+    for tile_id in sorted(int(t) for t in tile_ids):
+        try:
+            inputs[tile_id] = manifest.input_digests(tile_id, tile_inputs(tile_id, manifest.link_tiles(tile_id)))
+            inputs[tile_id][LINKS_KEY] = current_links(tile_id, manifest.foreign_links(tile_id))
+        except FileNotFoundError:
+            # Falta alguna entrada: process_tile reportará el error
+            pending.append(tile_id)
+            continue
+        if not force and manifest.is_current(tile_id, inputs[tile_id], validators, tile_outputs):
+            summaries[tile_id] = dict(manifest.summary(tile_id), skipped=True)
+        else:
+            pending.append(tile_id)
+
+    print(f"[INFO] Tiles sin cambios: {len(summaries)}, por validar: {len(pending)}")
+    for summary in run(pending, workers=workers, chunksize=chunksize, profile=profile, tile_workers=tile_workers):
+        tile_id = summary["tile_id"]
+        foreign_links = summary.pop("foreign_links", [])
+        summaries[tile_id] = summary
+        if tile_id in inputs:
+            # Los tiles vecinos pueden haber cambiado con esta validación
+            if summary.get("link_tiles", []) != manifest.link_tiles(tile_id):
+                inputs[tile_id] = manifest.input_digests(tile_id, tile_inputs(tile_id, summary.get("link_tiles", [])))
+            inputs[tile_id][LINKS_KEY] = current_links(tile_id, foreign_links)
+            manifest.record(tile_id, inputs[tile_id], validators, summary)
+    manifest.save()
+
+    return [summaries[t] for t in sorted(summaries)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida los POIs de todos los tiles con datos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de procesos (1 = secuencial)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Leer los POIs en chunks de este tamaño (tiles muy grandes)")
+    parser.add_argument("--tile-workers", type=int, default=None,
+                        help="Procesos que se reparten los POIs y calles dentro de cada tile "
+                             "(tiles muy grandes; default POI_TILE_WORKERS o 1)")
+    parser.add_argument("--data-dir", default=None,
+                        help="Carpeta de entradas (default data/ o POI_DATA_DIR); p. ej. la salida de repartition.py")
+    parser.add_argument("--force", action="store_true",
+                        help="Validar todos los tiles aunque no hayan cambiado desde la última ejecución")
+    parser.add_argument("--profile", action="store_true",
+                        help="Correr cProfile en cada tile y guardar el perfil de los más lentos")
+    parser.add_argument("--profile-top", type=int, default=5,
+                        help="Cuántos tiles lentos guardar con --profile (default 5)")
+    args = parser.parse_args()
+    if args.data_dir:
+        config.set_data_dir(args.data_dir)
+    data_dir = config.DATA_DIR
+
+    # Cargar lista de tiles (o unidades de repartition.py) desde geojson
+    tile_ids = get_catalog(os.path.join(data_dir, "HERE_L11_Tiles.geojson")).tile_ids
+
+    # Filtrar los tiles que tienen POI disponible
+    tile_ids_with_data = [
+        tid for tid in tile_ids if os.path.exists(os.path.join(data_dir, "POIs", f"POI_{tid}.csv"))
+    ]
+
+    print(f"Tiles únicos en el geojson: {len(tile_ids)}")
+    print(f"Tiles con archivo POI disponible: {len(tile_ids_with_data)}\n")
+
+    # Índice global link_id → tile una vez aquí, antes de repartir los tiles entre los workers
+    get_link_resolver(data_dir)
+    summaries = run_incremental(tile_ids_with_data, workers=args.workers,
+                                chunksize=args.chunksize, force=args.force, profile=args.profile,
+                                tile_workers=args.tile_workers)
+    export_run_summary(summaries)
+    write_run_report(summaries, REPORT_PATH)
+    if args.profile:
+        dump_slowest_profiles(summaries, PROFILE_DIR, top=args.profile_top)
+
+    # Etapa de merge: base consolidada + resúmenes y capas del dashboard
+    merge_results()
+    export_dashboard()
+
+
+if __name__ == "__main__":
+    main()
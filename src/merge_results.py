@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import sqlite3
+import pyogrio
+import pandas as pd
+import geopandas as gpd
+import pyarrow.parquet as pq
+import config
+
+DB_NAME = "results.sqlite"
+
+# Salidas por tile que se consolidan: (source, carpeta, patrón del archivo)
+SOURCES = [
+    ("side", "validation_side", re.compile(r"^errors_(\d+)\.json$")),
+    ("multidigit", "validation_multidigit", re.compile(r"^errors_(\d+)\.json$")),
+    ("existence", "existence", re.compile(r"^existence_(\d+)\.(?:geojson|parquet)$")),
+]
+
+SCHEMA = """
+CREATE TABLE errors (
+    tile_id       INTEGER NOT NULL,
+    source        TEXT NOT NULL,
+    poi_id        INTEGER,
+    link_id       INTEGER,
+    error_type    TEXT NOT NULL,
+    description   TEXT,
+    suggestion    TEXT,
+    expected_side TEXT,
+    actual_side   TEXT,
+    lon           REAL,
+    lat           REAL
+);
+CREATE TABLE existence (
+    tile_id         INTEGER NOT NULL,
+    poi_id          INTEGER,
+    link_id         INTEGER,
+    fac_type        INTEGER,
+    error_type      TEXT NOT NULL,
+    distance_meters REAL,
+    suggestion      TEXT,
+    lon             REAL,
+    lat             REAL
+);
+CREATE INDEX idx_errors_tile ON errors (tile_id);
+CREATE INDEX idx_errors_type ON errors (error_type);
+CREATE INDEX idx_errors_link ON errors (link_id);
+CREATE INDEX idx_errors_lonlat ON errors (lon, lat);
+CREATE INDEX idx_existence_tile ON existence (tile_id);
+CREATE INDEX idx_existence_type ON existence (error_type);
+CREATE INDEX idx_existence_link ON existence (link_id);
+CREATE INDEX idx_existence_lonlat ON existence (lon, lat);
+"""
+
+
+def store_path(outputs_dir=None):
+    """Ruta de la base consolidada; outputs_dir default config.OUTPUT_DIR (resuelto al llamar)."""
+    return os.path.join(outputs_dir or config.OUTPUT_DIR, DB_NAME)
+
+
+def find_result_files(outputs_dir=None):
+    """
+    {source: {tile_id: ruta}} con los archivos de resultados que hay en outputs_dir
+    (default config.OUTPUT_DIR).
+    Si un tile tiene la misma salida en dos formatos (GeoJSON y GeoParquet) se usa la más reciente.
+    """
+    outputs_dir = outputs_dir or config.OUTPUT_DIR
+    found = {}
+    for source, folder, pattern in SOURCES:
+        folder_path = os.path.join(outputs_dir, folder)
+        files = {}
+        if os.path.isdir(folder_path):
+            for name in os.listdir(folder_path):
+                match = pattern.match(name)
+                if match:
+                    path = os.path.join(folder_path, name)
+                    previous = files.get(int(match.group(1)))
+                    if previous is None or os.stat(path).st_mtime_ns > os.stat(previous).st_mtime_ns:
+                        files[int(match.group(1))] = path
+        found[source] = files
+    return found
+
+
+def _error_rows(tile_id, source, records):
+    for e in records:
+        geometry = e.get("geometry")
+        lon, lat = (geometry[0], geometry[1]) if geometry else (None, None)
+        yield (
+            int(e.get("tile_id", tile_id)), source, e.get("poi_id"), e.get("link_id"),
+            e["error_type"], e.get("description"), e.get("suggestion"),
+            e.get("expected_side"), e.get("actual_side"), lon, lat,
+        )
+
+
+def _existence_rows(tile_id, path):
+    columns = ["POI_ID", "LINK_ID", "fac_type", "error_type", "distance_meters", "suggestion"]
+    if path.endswith(".parquet"):
+        present = set(pq.read_schema(path).names)
+        df = gpd.read_parquet(path, columns=[c for c in columns if c in present] + ["geometry"])
+    else:
+        df = pyogrio.read_dataframe(path, columns=columns)
+    if df.empty:
+        return []
+    geoms = df.geometry
+    has_geom = geoms.notna() & ~geoms.is_empty
+    lon = geoms.x.where(has_geom)
+    lat = geoms.y.where(has_geom)
+    # Columnas a objetos de Python (NaN / NA → None) sin iterar fila por fila sobre el DataFrame
+    cols = [
+        [None if pd.isna(v) else int(v) for v in df[c].tolist()] if c in ("POI_ID", "LINK_ID", "fac_type")
+        else df[c].astype(object).where(df[c].notna(), None).tolist()
+        for c in columns
+    ]
+    lon = lon.astype(object).where(lon.notna(), None).tolist()
+    lat = lat.astype(object).where(lat.notna(), None).tolist()
+    return [(tile_id, *row) for row in zip(*cols, lon, lat)]
+
+
+def build_store(db_path=None, outputs_dir=None):
+    """
+    Etapa de merge: consolida los resultados side, multidigit y existence de
+    todos los tiles en una sola base SQLite (indexada por tile_id, error_type
+    y link_id). Se escribe en un archivo temporal y se reemplaza al final.
+    Regresa la lista de tile_ids consolidados.
+    """
+    outputs_dir = outputs_dir or config.OUTPUT_DIR
+    db_path = db_path or store_path(outputs_dir)
+    files = find_result_files(outputs_dir)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        for source in ("side", "multidigit"):
+            for tile_id, path in sorted(files[source].items()):
+                with open(path, encoding="utf-8") as f:
+                    records = json.load(f)
+                conn.executemany(
+                    "INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    _error_rows(tile_id, source, records),
+                )
+        for tile_id, path in sorted(files["existence"].items()):
+            conn.executemany(
+                "INSERT INTO existence VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _existence_rows(tile_id, path),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+    tile_ids = sorted(set().union(*(f.keys() for f in files.values())))
+    print(f"[INFO] {len(tile_ids)} tiles consolidados en {db_path}")
+    return tile_ids
+
+
+def merge_results(outputs_dir=None, db_path=None):
+    return build_store(db_path, outputs_dir)
+
+
+if __name__ == "__main__":
+    merge_results()
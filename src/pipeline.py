@@ -0,0 +1,51 @@
+import importlib
+from tile_context import prepare_tile
+from instrumentation import stage
+
+# Módulos que registran validadores (en este orden se ejecutan y se reportan).
+# Para agregar un validador: decorarlo con @register_validator y listar su módulo aquí.
+VALIDATOR_MODULES = ["validate_slide", "validate_multidigit", "validate_existence"]
+
+_VALIDATORS = {}
+
+
+def register_validator(name):
+    """
+    Registra fn(tile_data) -> dict de conteos para el resumen del tile.
+    El validador escribe sus propias salidas y no debe modificar tile_data:
+    lo compartido (índices, columnas normalizadas) está en tile_data["context"].
+    """
+    def decorator(fn):
+        _VALIDATORS[name] = fn
+        return fn
+    return decorator
+
+
+def registered_validators():
+    """
+    {nombre: validador} en el orden de VALIDATOR_MODULES, sin importar en qué
+    orden se importaron los módulos (los no listados van al final).
+    """
+    for module in VALIDATOR_MODULES:
+        importlib.import_module(module)
+
+    def order(item):
+        module = item[1].__module__
+        return VALIDATOR_MODULES.index(module) if module in VALIDATOR_MODULES else len(VALIDATOR_MODULES)
+
+    return dict(sorted(_VALIDATORS.items(), key=order))
+
+
+def run_validators(tile_data):
+    """
+    Prepara el contexto del tile una vez y corre todos los validadores registrados.
+    Regresa los conteos combinados.
+    """
+    prepare_tile(tile_data)
+    pois = tile_data.get("pois")
+    counts = {}
+    for name, validator in registered_validators().items():
+        with stage(f"validate.{name}") as info:
+            counts.update(validator(tile_data))
+            info["rows"] = len(pois) if pois is not None else None
+    return counts
@@ -0,0 +1,57 @@
+import numpy as np
+import geopandas as gpd
+import pyproj
+from link_attributes import attributes_path_for, load_link_attributes
+
+
+def utm_crs_for(lon, lat):
+    """
+    CRS UTM (WGS84) de la zona que contiene lon/lat, p. ej. CDMX → EPSG:32614.
+    """
+    zone = min(int((lon + 180) // 6) + 1, 60)
+    epsg = (32600 if lat >= 0 else 32700) + zone
+    return pyproj.CRS.from_epsg(epsg)
+
+
+def project_tile(tile_data):
+    """
+    Reproyecta una sola vez las geometrías del tile a su zona UTM y las deja en tile_data:
+
+    - metric_crs:    CRS métrico del tile
+    - streets_nav_m: GeoSeries de streets_nav en metros (mismo índice que streets_nav)
+    - link_attributes: LinkAttributes de streets_nav seguido de external_links (si
+      hay); con tile_data["nav_path"] las geometrías métricas y sus atributos
+      salen del caché de link_attributes.py y solo se reproyectan los links nuevos
+    - pois_m:        GeoSeries de pois en metros (mismo índice que pois), si hay pois
+
+    Las columnas geometry originales siguen en EPSG:4326 para las salidas.
+    Si el tile ya estaba proyectado no hace nada.
+    """
+    if "metric_crs" in tile_data:
+        return tile_data
+
+    streets_nav = tile_data["streets_nav"]
+    if tile_data.get("tile_geom") is not None:
+        center = tile_data["tile_geom"].centroid
+        lon, lat = center.x, center.y
+    else:
+        minx, miny, maxx, maxy = streets_nav.total_bounds
+        lon, lat = (minx + maxx) / 2, (miny + maxy) / 2
+
+    crs = utm_crs_for(lon, lat)
+    tile_data["metric_crs"] = crs
+    lines = np.asarray(streets_nav.geometry.array, dtype=object)
+    external = tile_data.get("external_links")
+    if external is not None and len(external):
+        lines = np.concatenate([lines, np.asarray(external.geometry.array, dtype=object)])
+    nav_path = tile_data.get("nav_path")
+    attrs = load_link_attributes(lines, crs, attributes_path_for(nav_path) if nav_path else None)
+    tile_data["link_attributes"] = attrs
+    tile_data["streets_nav_m"] = gpd.GeoSeries(attrs.lines_m[:len(streets_nav)], index=streets_nav.index,
+                                               crs=crs, name=streets_nav.geometry.name)
+
+    pois = tile_data.get("pois")
+    if pois is not None and "geometry" in pois:
+        tile_data["pois_m"] = pois.geometry.to_crs(crs)
+
+    return tile_data
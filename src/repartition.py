@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.strtree import STRtree
+
+from loader import load_tile, tile_paths
+from tile_catalog import get_catalog
+from link_graph import LinkGraph
+from validate_multidigit import MAX_DIST_M, named_links, carriageway_groups, multidigit_codes
+
+# Filas (POIs + links propios) a partir de las cuales un tile se parte en cuatro
+TARGET_ROWS = 50_000
+
+# Niveles de quadkey que se puede bajar desde el tile L11 (L11 → L15)
+MAX_DEPTH = 4
+
+# Metros de calzadas vecinas que lleva cada unidad: la búsqueda de validate_multidigit
+HALO_M = MAX_DIST_M
+
+PARTITIONS_FILE = "partitions.json"
+
+
+def child_id(unit_id, quadrant):
+    """
+    Quadkey hijo (convención de los tile_id HERE: padre * 4 + cuadrante, con
+    cuadrante = 2 * norte + este). Los ids de niveles distintos no chocan.
+    """
+    return unit_id * 4 + quadrant
+
+
+def split_units(tile_id, bounds, poi_xy, link_xy, target_rows=TARGET_ROWS, max_depth=MAX_DEPTH):
+    """
+    Parte el rectángulo bounds (lon/lat) en quadkeys cada vez más profundos
+    hasta que cada hoja tiene a lo más target_rows filas (POIs + links) o
+    llega a max_depth. Cada POI y cada link queda en una sola hoja, la que
+    contiene su punto (poi_xy, link_xy); los que caen fuera del tile van al
+    cuadrante más cercano y los que no tienen punto (NaN) al suroeste.
+
+    Regresa [(unit_id, depth, bounds, índices de POIs, índices de links)]
+    ordenada por unit_id; las hojas sin filas se descartan.
+    """
+    units = []
+    stack = [(int(tile_id), 0, tuple(bounds), np.arange(len(poi_xy)), np.arange(len(link_xy)))]
+    while stack:
+        unit_id, depth, (x0, y0, x1, y1), pois, links = stack.pop()
+        if len(pois) + len(links) <= target_rows or depth >= max_depth:
+            if len(pois) or len(links):
+                units.append((unit_id, depth, (x0, y0, x1, y1), pois, links))
+            continue
+        xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+        q_pois = (poi_xy[pois, 1] >= ym) * 2 + (poi_xy[pois, 0] >= xm)
+        q_links = (link_xy[links, 1] >= ym) * 2 + (link_xy[links, 0] >= xm)
+        for quadrant, box in enumerate([(x0, y0, xm, ym), (xm, y0, x1, ym), (x0, ym, xm, y1), (xm, ym, x1, y1)]):
+            stack.append((child_id(unit_id, quadrant), depth + 1, box,
+                          pois[q_pois == quadrant], links[q_links == quadrant]))
+    return sorted(units, key=lambda u: u[0])
+
+
+class CarriagewayHalo:
+    """
+    Links de contexto que necesita un conjunto de links propios para que
+    validate_multidigit dé lo mismo que sobre el tile completo: las cadenas
+    completas de los propios, todo link a ≤ halo_m metros de ellas (posibles
+    calzadas opuestas) con sus cadenas completas, y los links que tocan ese
+    conjunto (para que ninguna cadena se una de más en el borde). Trabaja con
+    filas de streets_nav.
+    """
+
+    def __init__(self, tile_data, halo_m=HALO_M):
+        self.halo_m = halo_m
+        nav_ids = tile_data["streets_nav"]["link_id"].to_numpy()
+        self.lines_m = tile_data["streets_nav_m"].to_numpy()
+        self.tree = STRtree(self.lines_m)
+
+        # Cadena de cada fila de NAV (-1 sin cadena); un link_id repetido toma la primera
+        merged = named_links(tile_data)
+        name_codes, _ = pd.factorize(merged["ST_NAME"], sort=True)
+        groups = carriageway_groups(name_codes, multidigit_codes(merged["MULTIDIGIT"].to_numpy()))
+        chains = LinkGraph(merged.geometry.to_numpy()).chains(groups)
+        ids, first = np.unique(merged["link_id"].to_numpy(), return_index=True)
+        pos = np.minimum(np.searchsorted(ids, nav_ids), max(len(ids) - 1, 0))
+        self.chain = np.full(len(nav_ids), -1, dtype=np.int64)
+        if len(ids):
+            found = ids[pos] == nav_ids
+            self.chain[found] = chains[first[pos[found]]]
+
+    def close_chains(self, rows):
+        chains = np.unique(self.chain[rows])
+        return np.union1d(rows, np.flatnonzero(np.isin(self.chain, chains[chains >= 0])))
+
+    def near(self, rows, distance):
+        _, near = self.tree.query(self.lines_m[rows], predicate="dwithin", distance=distance)
+        return np.union1d(rows, near)
+
+    def links(self, own):
+        rows = self.close_chains(self.near(self.close_chains(own), self.halo_m))
+        return self.near(rows, 0)
+
+
+def _write_geojson(gdf, path):
+    tmp_path = path + ".tmp"
+    gdf.to_file(tmp_path, driver="GeoJSON")
+    os.replace(tmp_path, path)
+
+
+def repartition_tile(tile_id, base_path, out_path, target_rows=TARGET_ROWS, max_depth=MAX_DEPTH, halo_m=HALO_M):
+    """
+    Reescribe un tile de base_path en out_path como unidades de trabajo. Si el
+    tile no pasa de target_rows se copia tal cual; si no, cada quadkey hijo
+    tiene su POI_<unidad>.csv (los POIs cuya ubicación cae en él), su NAV y su
+    NAMING: los links propios (su punto medio cae en la unidad) más su halo
+    (CarriagewayHalo, calzadas a ≤ halo_m metros) y los links de sus POIs,
+    marcados HALO=Y. Los validadores usan el halo como contexto pero solo
+    reportan los links propios, así que cada link se reporta en una sola unidad.
+    Un POI_ID repetido con ubicaciones en unidades distintas se evalúa una vez
+    por unidad en validate_poi_side (en el tile completo, solo la primera vez).
+
+    Regresa [(unit_id, polígono del tile, {pois, links, halo_links, level, bounds, tile_id})],
+    con bounds el rectángulo (lon/lat) del quadkey de la unidad.
+    """
+    paths = tile_paths(tile_id, base_path)
+    tile_geom = get_catalog(paths["tiles"]).geometry(tile_id)
+    raw_pois = pd.read_csv(paths["poi"], dtype=str, keep_default_na=False)
+    nav = gpd.read_file(paths["nav"])
+    naming = gpd.read_file(paths["naming"])
+
+    # Ubicación de los POIs igual que en la validación (PERCFRREF sobre su link,
+    # también si el link es de un tile vecino) y punto medio de cada link
+    tile_data = load_tile(tile_id, base_path, export_errors=False)
+    poi_xy = np.column_stack([shapely.get_x(tile_data["pois"].geometry.array),
+                              shapely.get_y(tile_data["pois"].geometry.array)])
+    mid = shapely.line_interpolate_point(tile_data["streets_nav"].geometry.array, 0.5, normalized=True)
+    link_xy = np.column_stack([shapely.get_x(mid), shapely.get_y(mid)])
+
+    units = split_units(tile_id, tile_geom.bounds, poi_xy, link_xy, target_rows, max_depth)
+    if len(units) == 1 and units[0][0] == int(tile_id):
+        for key in ("poi", "nav", "naming"):
+            dest = os.path.join(out_path, os.path.relpath(paths[key], base_path))
+            shutil.copy2(paths[key], dest)
+        return [(int(tile_id), tile_geom, {"tile_id": int(tile_id), "level": 0, "pois": len(raw_pois),
+                                           "links": len(nav), "halo_links": 0})]
+
+    halo_of = CarriagewayHalo(tile_data, halo_m)
+    # Fila de NAV del link de cada POI (-1 si no existe o es de un tile vecino)
+    ctx = tile_data["context"]
+    pos = ctx.link_positions(tile_data["pois"]["LINK_ID"])
+    poi_rows = np.where(pos >= 0, ctx.link_rows[np.maximum(pos, 0)], -1)
+    poi_rows[poi_rows >= len(nav)] = -1
+    result = []
+    for unit_id, depth, bounds, pois, own in units:
+        # Propios + su halo de calzadas + los links de sus POIs (para ubicarlos)
+        links = np.union1d(halo_of.links(own), poi_rows[pois][poi_rows[pois] >= 0])
+        halo = np.where(np.isin(links, own), "N", "Y")
+        unit_nav = nav.iloc[links].assign(HALO=halo)
+        unit_naming = naming[naming["link_id"].isin(unit_nav["link_id"])]
+        raw_pois.iloc[pois].to_csv(os.path.join(out_path, "POIs", f"POI_{unit_id}.csv"), index=False)
+        _write_geojson(unit_nav, os.path.join(out_path, "STREETS_NAV", f"SREETS_NAV_{unit_id}.geojson"))
+        _write_geojson(unit_naming, os.path.join(out_path, "STREETS_NAMING_ADDRESSING",
+                                                 f"SREETS_NAMING_ADDRESSING_{unit_id}.geojson"))
+        # La unidad se valida con el polígono del tile: qué POIs le tocan ya lo decidió
+        # split_units (regla semiabierta), y así inside_tile da lo mismo que en el
+        # tile completo también para los POIs sobre una línea de corte
+        result.append((unit_id, tile_geom, {"tile_id": int(tile_id), "level": depth, "bounds": list(bounds),
+                                            "pois": len(pois), "links": len(own),
+                                            "halo_links": int((halo == "Y").sum())}))
+    return result
+
+
+def repartition(base_path, out_path, tile_ids=None, target_rows=TARGET_ROWS, max_depth=MAX_DEPTH, halo_m=HALO_M):
+    """
+    Etapa de repartición: escribe en out_path (misma estructura que data/) las
+    unidades de trabajo de los tiles de base_path con POIs (o solo tile_ids).
+    HERE_L11_Tiles.geojson de out_path lleva cada unidad con su id en
+    L11_Tile_ID y el polígono de su tile, así que loader.py y main.py las
+    procesan como tiles; partitions.json guarda de qué tile sale cada una, el
+    rectángulo de su quadkey y sus filas (el runner reparte primero las
+    unidades más grandes). Regresa los ids de las unidades.
+    """
+    catalog = get_catalog(os.path.join(base_path, "HERE_L11_Tiles.geojson"))
+    if tile_ids is None:
+        tile_ids = [t for t in catalog.tile_ids if os.path.exists(os.path.join(base_path, "POIs", f"POI_{t}.csv"))]
+    for folder in ("POIs", "STREETS_NAV", "STREETS_NAMING_ADDRESSING"):
+        os.makedirs(os.path.join(out_path, folder), exist_ok=True)
+
+    units = []
+    for tile_id in sorted(int(t) for t in tile_ids):
+        tile_units = repartition_tile(tile_id, base_path, out_path, target_rows, max_depth, halo_m)
+        print(f"[INFO] Tile {tile_id}: {len(tile_units)} unidades "
+              f"({', '.join(str(info['pois'] + info['links']) for _, _, info in tile_units)} filas)")
+        units.extend(tile_units)
+
+    unit_ids = [u[0] for u in units]
+    _write_geojson(gpd.GeoDataFrame({"L11_Tile_ID": unit_ids}, geometry=[u[1] for u in units], crs="EPSG:4326"),
+                   os.path.join(out_path, "HERE_L11_Tiles.geojson"))
+    payload = {
+        "source": os.path.abspath(base_path),
+        "target_rows": target_rows,
+        "halo_m": halo_m,
+        "units": {str(unit_id): info for unit_id, _, info in units},
+    }
+    tmp_path = os.path.join(out_path, PARTITIONS_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_path, PARTITIONS_FILE))
+    print(f"[INFO] {len(tile_ids)} tiles → {len(unit_ids)} unidades en {out_path}")
+    return unit_ids
+
+
+def read_partitions(base_path):
+    """
+    {unit_id: info} de partitions.json de base_path, o None si base_path no
+    viene de repartition().
+    """
+    path = os.path.join(base_path, PARTITIONS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f)["units"].items()}
+
+
+def unit_costs(base_path, tile_ids):
+    """
+    Costo estimado de cada tile o unidad para ordenar el trabajo: sus filas
+    según partitions.json, o el tamaño de sus archivos POI + NAV si base_path
+    son tiles sin repartir.
+    """
+    partitions = read_partitions(base_path) or {}
+    costs = {}
+    for tile_id in tile_ids:
+        info = partitions.get(int(tile_id))
+        if info is not None:
+            costs[tile_id] = info["pois"] + info["links"] + info["halo_links"]
+            continue
+        try:
+            paths = tile_paths(tile_id, base_path)
+            costs[tile_id] = os.path.getsize(paths["poi"]) + os.path.getsize(paths["nav"])
+        except FileNotFoundError:
+            costs[tile_id] = 0
+    return costs
+
+
+if __name__ == "__main__":
+    ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    parser = argparse.ArgumentParser(description="Reparte los tiles en unidades de trabajo balanceadas (quadkeys)")
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, "data"), help="Carpeta de tiles de entrada")
+    parser.add_argument("--out", required=True, help="Carpeta destino (misma estructura que data/)")
+    parser.add_argument("--target-rows", type=int, default=TARGET_ROWS,
+                        help="Filas (POIs + links) máximas por unidad")
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH,
+                        help="Niveles de quadkey bajo L11 que se pueden usar")
+    parser.add_argument("--halo", type=float, default=HALO_M, help="Metros de links vecinos por unidad")
+    parser.add_argument("tiles", nargs="*", type=int, help="Solo estos tiles (default: todos con POIs)")
+    args = parser.parse_args()
+    if os.path.abspath(args.out) == os.path.abspath(args.data):
+        sys.exit("[ERROR] --out debe ser distinta de --data")
+    repartition(args.data, args.out, args.tiles or None, args.target_rows, args.max_depth, args.halo)
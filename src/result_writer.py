@@ -0,0 +1,302 @@
+import io
+import os
+import sys
+import json
+import queue
+import threading
+import multiprocessing.util
+
+import shapely
+
+from config import WRITE_QUEUE_SIZE
+from tile_cache import HAS_PARQUET
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_PARQUET:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+# Escritor del proceso actual (uno por proceso; se crea al primer uso)
+_writer = None
+_writer_pid = None
+
+
+def dumps_json(records):
+    """
+    JSON compacto (bytes). orjson si está instalado; acepta tipos NumPy.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(records, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(records, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _json_default(value):
+    # Escalares NumPy (int64, float64, bool_) → tipos de Python
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} no es serializable a JSON")
+
+
+def atomic_write(path, write):
+    """
+    write(tmp_path) escribe el archivo completo; al terminar se renombra a `path`.
+    Si falla no queda ni el temporal ni una versión anterior de `path`: así la
+    siguiente corrida ve que falta la salida y vuelve a validar el tile.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        for p in (tmp_path, path):
+            if os.path.exists(p):
+                os.remove(p)
+        raise
+
+
+def write_json(path, records):
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(dumps_json(records))
+    atomic_write(path, write)
+
+
+def write_geodataframe(path, gdf):
+    """
+    GeoParquet si path termina en .parquet, si no GeoJSON. Usa el mismo escritor
+    por chunks que el modo streaming (open_chunk_writer), así que los dos caminos
+    dejan los mismos tipos y, en GeoJSON, los mismos bytes. Si falla no queda
+    ni el temporal ni una versión anterior de `path` (como atomic_write).
+    """
+    writer = open_chunk_writer(path)
+    try:
+        writer.write(gdf)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def geojson_features(gdf):
+    """
+    Cada fila de gdf como una Feature GeoJSON (str): la geometría con
+    shapely.to_geojson y las propiedades con DataFrame.to_json, ambos en bloque.
+    Los nulos (NaN, NA, None) quedan en null.
+    """
+    geometries = shapely.to_geojson(gdf.geometry.array)
+    properties = gdf.drop(columns=gdf.geometry.name)
+    if len(properties.columns):
+        # Una línea por fila; los saltos de línea dentro de los textos van escapados
+        lines = properties.to_json(orient="records", lines=True, double_precision=15, force_ascii=False)
+        records = lines.split("\n")[:len(gdf)]
+    else:
+        records = ["{}"] * len(gdf)
+    for record, geometry in zip(records, geometries):
+        yield f'{{ "type": "Feature", "properties": {record}, "geometry": {geometry or "null"} }}'
+
+
+class FeatureCollectionWriter:
+    """
+    Escribe un GeoJSON FeatureCollection por partes: cada write() agrega las
+    features de un GeoDataFrame (EPSG:4326) sin tener la colección completa en memoria.
+    Con lazy=True el archivo solo se crea si llega al menos una feature.
+    Se escribe en path.tmp y se renombra en close().
+    """
+
+    def __init__(self, path, lazy=False):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        self._file = None
+        if not lazy:
+            self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        self._file.write(
+            '{\n"type": "FeatureCollection",\n'
+            f'"name": "{name}",\n'
+            '"crs": { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } },\n'
+            '"features": ['
+        )
+
+    def write(self, gdf):
+        if gdf.empty:
+            return
+        if self._file is None:
+            self._open()
+        for feature in geojson_features(gdf):
+            self._file.write(",\n" if self.count else "\n")
+            self._file.write(feature)
+            self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.write("\n]\n}\n")
+            self._file.close()
+            self._file = None
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class GeoParquetWriter:
+    """
+    Igual que FeatureCollectionWriter pero a un solo GeoParquet: cada write()
+    es un row group. Los metadatos "geo" salen de geopandas (un slice vacío
+    del primer chunk), sin bbox porque se conoce hasta el final; los de pandas
+    (tipos como Int64) se conservan, igual que con to_parquet.
+    """
+
+    def __init__(self, path, lazy=False):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        self.lazy = lazy
+        self._writer = None
+        self._schema = None
+        self._empty = None
+
+    def write(self, gdf):
+        if gdf.empty:
+            # Sin filas: solo se guardan las columnas por si no llega ninguna otra
+            if self._empty is None:
+                self._empty = gdf.iloc[:0]
+            return
+        table = pa.table(gdf.to_arrow(index=False, geometry_encoding="WKB"))
+        if self._writer is None:
+            buf = io.BytesIO()
+            gdf.iloc[:0].to_parquet(buf, index=False)
+            buf.seek(0)
+            metadata = {**(table.schema.metadata or {}), b"geo": pq.read_schema(buf).metadata[b"geo"]}
+            self._schema = table.schema.with_metadata(metadata)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+        self.count += len(gdf)
+
+    def close(self):
+        if self._writer is None:
+            if self.lazy:
+                return
+            # Sin filas: GeoParquet vacío pero válido, con las columnas si se conocen
+            empty = self._empty
+            if empty is None:
+                import geopandas as gpd
+                empty = gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+            atomic_write(self.path, lambda tmp_path: empty.to_parquet(tmp_path, index=False))
+            return
+        self._writer.close()
+        self._writer = None
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def open_chunk_writer(path, lazy=False):
+    """
+    Escritor por chunks según la extensión de path (.parquet o GeoJSON).
+    """
+    if path.endswith(".parquet"):
+        return GeoParquetWriter(path, lazy=lazy)
+    return FeatureCollectionWriter(path, lazy=lazy)
+
+
+class ResultWriter:
+    """
+    Etapa de escritura de resultados: una cola acotada (max_pending tareas) que
+    vacía un hilo de fondo, en orden de llegada. El cálculo del siguiente tile
+    (o chunk) sigue mientras se escribe el anterior; si la cola está llena,
+    submit() espera, así que la memoria pendiente de escribir está acotada.
+
+    Los errores de escritura no detienen el cálculo: se reportan en stderr y
+    flush() los regresa.
+    """
+
+    def __init__(self, max_pending=WRITE_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._failures = []
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                fn, args, label = task
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self._failures.append(f"{label}: {type(e).__name__}: {e}")
+                    print(f"[ERROR] No se pudo escribir {label}: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, fn, *args, label=None):
+        """
+        Encola fn(*args). Las tareas se ejecutan en orden, una a la vez.
+        """
+        self._queue.put((fn, args, label or getattr(fn, "__qualname__", repr(fn))))
+
+    def write_json(self, path, records):
+        self.submit(write_json, path, records, label=path)
+
+    def write_geodataframe(self, path, gdf):
+        self.submit(write_geodataframe, path, gdf, label=path)
+
+    def flush(self):
+        """
+        Espera a que se escriba todo lo encolado. Regresa los errores desde el último flush.
+        """
+        self._queue.join()
+        failures, self._failures = self._failures, []
+        return failures
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def get_writer():
+    """
+    ResultWriter del proceso, creado al primer uso. Al salir el proceso (también
+    los workers del pool) se termina de escribir lo pendiente.
+    """
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        _writer = ResultWriter()
+        _writer_pid = os.getpid()
+        multiprocessing.util.Finalize(_writer, _writer.close, exitpriority=10)
+    return _writer
+
+
+def flush_writes():
+    """
+    Espera las escrituras pendientes de este proceso; regresa los errores.
+    """
+    if _writer is None or _writer_pid != os.getpid():
+        return []
+    return _writer.flush()
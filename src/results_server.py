@@ -0,0 +1,389 @@
+import os
+import io
+import csv
+import json
+import gzip
+import zlib
+import hashlib
+import sqlite3
+import zipfile
+import argparse
+import mimetypes
+from contextlib import closing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import config
+from merge_results import store_path, find_result_files
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Rutas base
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DASHBOARD_DIR = os.path.join(ROOT_DIR, "dashboard")
+
+
+def static_dirs():
+    """Carpetas que se sirven como archivos estáticos (prefijo URL → carpeta), resueltas al llamar."""
+    return {"/dashboard/": DASHBOARD_DIR, "/outputs/": config.OUTPUT_DIR}
+
+
+# Columnas de cada tabla de results.sqlite que regresa la API
+TABLES = {
+    "errors": ["tile_id", "source", "poi_id", "link_id", "error_type", "description",
+               "suggestion", "expected_side", "actual_side", "lon", "lat"],
+    "existence": ["tile_id", "poi_id", "link_id", "fac_type", "error_type",
+                  "distance_meters", "suggestion", "lon", "lat"],
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE = ("application/json", "application/geo+json", "text/")
+
+
+def _int_list(params, key):
+    values = [v for raw in params.get(key, []) for v in raw.split(",") if v]
+    try:
+        return [int(v) for v in values]
+    except ValueError:
+        raise ValueError(f"{key} debe ser entero") from None
+
+
+def build_filters(params):
+    """
+    WHERE (sin la palabra) y parámetros a partir de tile_id, error_type, source y
+    bbox=oeste,sur,este,norte. Los valores separados por coma se combinan con OR.
+    """
+    clauses, args = [], []
+    tile_ids = _int_list(params, "tile_id")
+    if tile_ids:
+        clauses.append(f"tile_id IN ({','.join('?' * len(tile_ids))})")
+        args += tile_ids
+    for key in ("error_type", "source"):
+        values = [v for raw in params.get(key, []) for v in raw.split(",") if v]
+        if values:
+            clauses.append(f"{key} IN ({','.join('?' * len(values))})")
+            args += values
+    if params.get("bbox"):
+        try:
+            west, south, east, north = (float(v) for v in params["bbox"][0].split(","))
+        except ValueError:
+            raise ValueError("bbox debe ser oeste,sur,este,norte") from None
+        clauses.append("lon BETWEEN ? AND ? AND lat BETWEEN ? AND ?")
+        args += [west, east, south, north]
+    return clauses, args
+
+
+def query_page(conn, table, params):
+    """
+    Una página de resultados con paginación por cursor (rowid del último elemento):
+    {"items": [...], "next_cursor": str | None}
+    """
+    columns = TABLES[table]
+    if table == "existence" and "source" in params:
+        raise ValueError("source no aplica a existence")
+    clauses, args = build_filters(params)
+
+    cursor = params.get("cursor", [None])[0]
+    if cursor:
+        try:
+            clauses.append("rowid > ?")
+            args.append(int(cursor))
+        except ValueError:
+            raise ValueError("cursor inválido") from None
+    try:
+        limit = int(params.get("limit", [DEFAULT_LIMIT])[0])
+    except ValueError:
+        raise ValueError("limit debe ser entero") from None
+    # Con limit < 1 el cursor saltaría filas (0) o SQLite leería toda la tabla (negativo)
+    if limit < 1:
+        raise ValueError("limit debe ser al menos 1")
+    limit = min(limit, MAX_LIMIT)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = conn.execute(
+        f"SELECT rowid, {', '.join(columns)} FROM {table} {where} ORDER BY rowid LIMIT ?",
+        args + [limit + 1],
+    ).fetchall()
+
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    return {
+        "items": [dict(zip(columns, row[1:])) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+def iter_csv(conn, table, params, batch_size=5000):
+    """
+    Genera el CSV de los resultados filtrados en bloques (no arma todo el archivo en memoria).
+    """
+    columns = TABLES[table]
+    clauses, args = build_filters(params)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cur = conn.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY rowid", args)
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+class _ChunkedWriter(io.RawIOBase):
+    """
+    Archivo de solo escritura que manda cada write() como un chunk HTTP/1.1,
+    opcionalmente comprimido con gzip al vuelo.
+    """
+
+    def __init__(self, wfile, gzip_stream=False):
+        self._wfile = wfile
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip_stream else None
+
+    def writable(self):
+        return True
+
+    def _send(self, data):
+        if data:
+            self._wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def write(self, data):
+        data = bytes(data)
+        self._send(self._compressor.compress(data) if self._compressor else data)
+        return len(data)
+
+    def finish(self):
+        if self._compressor:
+            self._send(self._compressor.flush())
+        self._wfile.write(b"0\r\n\r\n")
+        self._wfile.flush()
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    """
+    API de resultados sobre outputs/results.sqlite (ver merge_results.py):
+
+    - GET /api/errors, /api/existence   ?tile_id=&error_type=&source=&bbox=&limit=&cursor=
+    - GET /api/tiles                    tiles consolidados
+    - GET /api/export.csv               ?table=errors|existence + filtros (streaming)
+    - GET /api/export.zip               ?tile_id= archivos originales por tile (streaming)
+    - GET /dashboard/..., /outputs/...  archivos estáticos
+
+    Las respuestas JSON llevan ETag (según la base y la consulta) y se comprimen
+    con Brotli o gzip según Accept-Encoding.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ResultsAPI/1.0"
+    db_path = None  # serve() lo fija; default results.sqlite en config.OUTPUT_DIR
+
+    def log_message(self, format, *args):
+        print(f"[INFO] {self.address_string()} {format % args}")
+
+    # ---------- helpers ----------
+
+    def _connect(self):
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError("results.sqlite no existe; corre merge_results.py")
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def _etag(self, *parts):
+        return '"' + hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20] + '"'
+
+    def _db_etag(self, url):
+        st = os.stat(self.db_path)
+        return self._etag(st.st_mtime_ns, st.st_size, url.path, url.query)
+
+    def _not_modified(self, etag):
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        return False
+
+    def _encoding(self, content_type):
+        if not content_type.startswith(COMPRESSIBLE):
+            return None
+        accepted = self.headers.get("Accept-Encoding", "")
+        if HAS_BROTLI and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _send_bytes(self, body, content_type, etag=None, status=200):
+        encoding = self._encoding(content_type) if len(body) >= MIN_COMPRESS_BYTES else None
+        if encoding == "br":
+            body = brotli.compress(body)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=6)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, etag=None, status=200):
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._send_bytes(body, "application/json; charset=utf-8", etag, status)
+
+    def _start_stream(self, content_type, filename=None, etag=None):
+        # En streaming solo gzip (zlib incremental)
+        gzip_stream = content_type.startswith(COMPRESSIBLE) and "gzip" in self.headers.get("Accept-Encoding", "")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        if gzip_stream:
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept-Encoding")
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return _ChunkedWriter(self.wfile, gzip_stream)
+
+    # ---------- rutas ----------
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            if url.path in ("/", "/dashboard"):
+                self.send_response(302)
+                self.send_header("Location", "/dashboard/index.html")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif url.path in ("/api/errors", "/api/existence"):
+                etag = self._db_etag(url)
+                if not self._not_modified(etag):
+                    with closing(self._connect()) as conn:
+                        self._send_json(query_page(conn, url.path.rsplit("/", 1)[1], params), etag)
+            elif url.path == "/api/tiles":
+                etag = self._db_etag(url)
+                if not self._not_modified(etag):
+                    with closing(self._connect()) as conn:
+                        tiles = [r[0] for r in conn.execute(
+                            "SELECT tile_id FROM errors UNION SELECT tile_id FROM existence ORDER BY 1")]
+                    self._send_json(tiles, etag)
+            elif url.path == "/api/export.csv":
+                self._export_csv(url, params)
+            elif url.path == "/api/export.zip":
+                self._export_zip(params)
+            else:
+                self._send_static(url.path)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, status=400)
+        except FileNotFoundError as e:
+            self._send_json({"error": str(e)}, status=404)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cerró la conexión a media descarga
+            self.close_connection = True
+
+    def _export_csv(self, url, params):
+        table = params.get("table", ["errors"])[0]
+        if table not in TABLES:
+            raise ValueError(f"table debe ser uno de {sorted(TABLES)}")
+        etag = self._db_etag(url)
+        if self._not_modified(etag):
+            return
+        with closing(self._connect()) as conn:
+            build_filters(params)  # valida antes de mandar encabezados
+            out = self._start_stream("text/csv; charset=utf-8", f"{table}.csv", etag)
+            for chunk in iter_csv(conn, table, params):
+                out.write(chunk)
+            out.finish()
+
+    def _export_zip(self, params):
+        files = find_result_files()
+        tile_ids = _int_list(params, "tile_id") or sorted(set().union(*(f.keys() for f in files.values())))
+        # Nombre dentro del zip; la extensión es la del archivo (existence puede ser .geojson o .parquet)
+        names = {
+            "multidigit": "errors_multidigit_{}",
+            "side": "errors_side_{}",
+            "existence": "existence_{}",
+        }
+        entries = [
+            (files[source][t], f"tile_{t}/{pattern.format(t)}{os.path.splitext(files[source][t])[1]}")
+            for t in tile_ids for source, pattern in names.items() if t in files[source]
+        ]
+        if not entries:
+            raise FileNotFoundError("No hay resultados para esos tiles")
+
+        filename = f"tile_{tile_ids[0]}_errors.zip" if len(tile_ids) == 1 else "all_tiles_errors.zip"
+        out = self._start_stream("application/zip", filename)
+        # zipfile escribe directo al socket (sin seek): cada archivo se comprime por bloques
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path, arcname in entries:
+                zf.write(path, arcname)
+        out.finish()
+
+    def _send_static(self, path):
+        for prefix, folder in static_dirs().items():
+            if path.startswith(prefix):
+                full = os.path.realpath(os.path.join(folder, path[len(prefix):]))
+                if full.startswith(os.path.realpath(folder) + os.sep) and os.path.isfile(full):
+                    break
+        else:
+            raise FileNotFoundError(f"No encontrado: {path}")
+
+        st = os.stat(full)
+        etag = self._etag(full, st.st_mtime_ns, st.st_size)
+        if self._not_modified(etag):
+            return
+        content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        if full.endswith((".json", ".geojson")):
+            content_type = "application/json"
+
+        if st.st_size <= 8 * 1024 * 1024:
+            with open(full, "rb") as f:
+                self._send_bytes(f.read(), content_type, etag)
+            return
+        # Archivos grandes (p. ej. existence_*.geojson): por chunks
+        out = self._start_stream(content_type, etag=etag)
+        with open(full, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                out.write(block)
+        out.finish()
+
+
+def serve(host="127.0.0.1", port=8000, db_path=None):
+    db_path = db_path or store_path()
+    ResultsHandler.db_path = db_path
+    server = ThreadingHTTPServer((host, port), ResultsHandler)
+    print(f"[INFO] Resultados en http://{host}:{port}/ (API en /api, base {db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de resultados y dashboard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    serve(args.host, args.port)
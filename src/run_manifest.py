@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import importlib.util
+
+import numpy as np
+
+from pipeline import VALIDATOR_MODULES
+
+# Módulos cuyo código determina las salidas de un tile: si cambia cualquiera,
+# todos los tiles se vuelven a validar
+FINGERPRINT_MODULES = [
+    "config", "loader", "tile_cache", "tile_catalog", "projection", "link_store", "link_attributes", "link_index",
+    "link_graph", "tile_context", "pipeline", "streaming", "result_writer", "tile_shards",
+] + VALIDATOR_MODULES
+
+# "tiles" es HERE_L11_Tiles.geojson: el polígono decide inside_tile e invalid_pois_<tile>
+INPUT_KEYS = ["poi", "nav", "naming", "tiles"]
+# Además, "nav:<tile>" por cada tile vecino del que el tile tomó links (summary["link_tiles"])
+NEIGHBOUR_PREFIX = "nav:"
+# y "links": los LINK_ID de sus POIs que no están en su NAV y el tile que hoy contiene
+# cada uno (links_digest); un NAV nuevo o editado que ahora tiene uno invalida al tile
+LINKS_KEY = "links"
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def links_digest(link_ids, link_tiles):
+    """
+    Entrada "links" del manifiesto: sha256 de los LINK_ID de fuera del tile y del
+    tile que contiene cada uno (-1 si ninguno), más los LINK_ID para recalcularla.
+    """
+    link_ids = np.asarray(link_ids, dtype=np.int64)
+    h = hashlib.sha256(link_ids.tobytes())
+    h.update(np.asarray(link_tiles, dtype=np.int64).tobytes())
+    return {"sha256": h.hexdigest(), "ids": link_ids.tolist()}
+
+
+def validator_fingerprints(modules=FINGERPRINT_MODULES):
+    """
+    Huella de versión de cada módulo validador: sha256 de su código fuente.
+    """
+    fingerprints = {}
+    for name in modules:
+        spec = importlib.util.find_spec(name)
+        fingerprints[name] = file_sha256(spec.origin) if spec and spec.origin else None
+    return fingerprints
+
+
+class RunManifest:
+    """
+    Manifiesto de la última ejecución por tile: hash de contenido de sus entradas
+    (POI, NAV, NAMING, índice de tiles, NAV de los tiles vecinos que usó y en qué
+    tile está cada link de fuera que referencian sus POIs), huella de los
+    validadores y el resumen que produjo.
+
+    Un tile cuyo manifiesto coincide y cuyas salidas siguen en disco no se vuelve
+    a validar. El tamaño/mtime de cada archivo se guarda junto al hash para no
+    re-hashear archivos que no se han tocado.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tiles = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.tiles = json.load(f).get("tiles", {})
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Manifiesto ilegible, se validan todos los tiles: {path} ({e})")
+
+    def input_digests(self, tile_id, paths):
+        """
+        {"poi": {...}, "nav": {...}, "naming": {...}, "tiles": {...}, "nav:<tile>": {...}} con sha256,
+        size y mtime_ns de cada entrada.
+        """
+        previous = self.tiles.get(str(tile_id), {}).get("inputs", {})
+        digests = {}
+        for key in INPUT_KEYS + sorted(k for k in paths if k.startswith(NEIGHBOUR_PREFIX)):
+            st = os.stat(paths[key])
+            prev = previous.get(key)
+            if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+                sha = prev["sha256"]
+            else:
+                sha = file_sha256(paths[key])
+            digests[key] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        return digests
+
+    def is_current(self, tile_id, inputs, validators, outputs_for):
+        """
+        True si el tile ya se validó con las mismas entradas y validadores y sus salidas existen.
+        outputs_for(tile_id, summary) regresa las rutas que debe haber dejado esa validación.
+        """
+        entry = self.tiles.get(str(tile_id))
+        if entry is None or entry["summary"].get("status") != "ok":
+            return False
+        if entry["validators"] != validators:
+            return False
+        if set(entry["inputs"]) != set(inputs):
+            return False
+        if any(entry["inputs"][k]["sha256"] != inputs[k]["sha256"] for k in inputs):
+            return False
+        return all(os.path.exists(p) for p in outputs_for(tile_id, entry["summary"]))
+
+    def link_tiles(self, tile_id):
+        """
+        Tiles vecinos de los que el tile tomó links en su última validación.
+        """
+        return self.tiles.get(str(tile_id), {}).get("summary", {}).get("link_tiles", [])
+
+    def foreign_links(self, tile_id):
+        """
+        LINK_ID de fuera del tile que usaron sus POIs en su última validación.
+        """
+        return self.tiles.get(str(tile_id), {}).get("inputs", {}).get(LINKS_KEY, {}).get("ids", [])
+
+    def summary(self, tile_id):
+        return dict(self.tiles[str(tile_id)]["summary"])
+
+    def record(self, tile_id, inputs, validators, summary):
+        if summary.get("status") != "ok":
+            # Un tile con error siempre se vuelve a intentar
+            self.tiles.pop(str(tile_id), None)
+            return
+        self.tiles[str(tile_id)] = {
+            "inputs": inputs,
+            "validators": validators,
+            "summary": {k: v for k, v in summary.items() if k not in ("log", "skipped", "timing", "profile")},
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"tiles": self.tiles}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
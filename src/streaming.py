@@ -0,0 +1,98 @@
+from collections import Counter
+import pandas as pd
+from loader import tile_paths, load_tile_streets, iter_poi_chunks, validate_pois_within_tile
+from validate_slide import find_side_errors, report_side_errors, export_validation_results
+from validate_multidigit import validate_multidigit
+from validate_existence import validate_existence
+from instrumentation import stage, timed_iter
+from config import existence_path, invalid_pois_path
+from result_writer import get_writer, open_chunk_writer
+
+
+def validate_tile_streaming(tile_id, base_path, chunksize=100_000):
+    """
+    Igual que load_tile + los tres validadores, pero leyendo POI_<tile>.csv en chunks:
+    cada chunk pasa por la ubicación, el lado de calle y existence, y sus
+    resultados se escriben en cuanto se calculan. La memoria depende de
+    chunksize, no del tamaño del tile. Regresa los conteos del tile.
+    """
+    paths = tile_paths(tile_id, base_path)
+    # Solo la columna LINK_ID de todos los POIs, para resolver los links de tiles vecinos
+    poi_link_ids = pd.read_csv(paths["poi"], usecols=["LINK_ID"], dtype={"LINK_ID": "Int64"})["LINK_ID"]
+    tile_data = load_tile_streets(tile_id, base_path, poi_link_ids)
+    del poi_link_ids
+
+    # MULTIDIGIT no depende de los POIs: una sola vez por tile
+    with stage("validate.multidigit"):
+        multidigit = validate_multidigit(tile_data)
+
+    total = 0
+    inside = 0
+    side_results = []
+    seen_poi_ids = set()
+    existence_counts = Counter()
+
+    exist_path = existence_path(tile_id)
+    invalid_path = invalid_pois_path(tile_id)
+
+    # Los chunks se escriben en el hilo del escritor de resultados (en orden):
+    # mientras se escribe un chunk ya se calcula el siguiente
+    writer = get_writer()
+    exist_writer = open_chunk_writer(exist_path)
+    invalid_writer = open_chunk_writer(invalid_path, lazy=True)
+    outside_total = 0
+    try:
+        for chunk in timed_iter(iter_poi_chunks(paths["poi"], chunksize), "read_pois"):
+            with stage("placement") as info:
+                pois = validate_pois_within_tile(chunk, tile_data["tile_geom"], tile_data["streets_nav"], tile_data["context"])
+                info["rows"] = len(pois)
+            with stage("project_pois") as info:
+                chunk_data = dict(tile_data, pois=pois, pois_m=pois.geometry.to_crs(tile_data["metric_crs"]))
+                info["rows"] = len(pois)
+
+            total += len(pois)
+            inside += int(pois["inside_tile"].sum())
+            with stage("export_invalid") as info:
+                outside = pois.loc[~pois["inside_tile"], ["POI_ID", "LINK_ID", "geometry"]]
+                writer.submit(invalid_writer.write, outside, label=invalid_path)
+                outside_total += len(outside)
+                info["rows"] = len(outside)
+
+            # Un POI_ID ya evaluado en un chunk anterior no se vuelve a evaluar
+            with stage("validate.side") as info:
+                already_seen = pois["POI_ID"].isin(seen_poi_ids).to_numpy(dtype=bool)
+                side_pois = pois.assign(inside_tile=pois["inside_tile"].to_numpy(dtype=bool) & ~already_seen)
+                side_results.extend(find_side_errors(dict(chunk_data, pois=side_pois)))
+                evaluated = side_pois["inside_tile"] & pois["POI_ID"].notna() & pois["LINK_ID"].notna()
+                seen_poi_ids.update(pois.loc[evaluated, "POI_ID"].astype("int64").tolist())
+                info["rows"] = len(pois)
+
+            with stage("validate.existence") as info:
+                exist_gdf = validate_existence(chunk_data)
+                writer.submit(exist_writer.write, exist_gdf, label=exist_path)
+                existence_counts.update(exist_gdf["error_type"].value_counts().to_dict())
+                info["rows"] = len(pois)
+    except BaseException:
+        # Sin archivos a medias: se descartan los temporales
+        writer.submit(exist_writer.abort, label=exist_path)
+        writer.submit(invalid_writer.abort, label=invalid_path)
+        raise
+    writer.submit(exist_writer.close, label=exist_path)
+    writer.submit(invalid_writer.close, label=invalid_path)
+
+    if outside_total:
+        print(f"[INFO] {outside_total} POIs fuera del tile exportados a {invalid_path}")
+    report_side_errors(side_results, int(tile_id))
+    export_validation_results(side_results, tile_id)
+    print(f"  • Existence report written to: {exist_path}")
+
+    return {
+        "pois_total": total,
+        "pois_inside": inside,
+        "pois_outside": total - inside,
+        "side_errors": len(side_results),
+        "multidigit_errors": len(multidigit),
+        "existence": {str(k): int(v) for k, v in sorted(existence_counts.items())},
+        "link_tiles": tile_data["link_tiles"],
+        "foreign_links": tile_data["foreign_links"],
+    }
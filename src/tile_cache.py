@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import hashlib
+import pandas as pd
+import geopandas as gpd
+
+try:
+    import pyarrow.parquet as pq  # necesario para GeoParquet
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+# Solo las columnas que leen los validadores / herramientas de debug
+NAV_COLUMNS = [
+    "link_id", "MULTIDIGIT", "DIVIDER", "DIR_TRAVEL", "FUNC_CLASS",
+    "LANE_CAT", "SPEED_CAT", "TOLLWAY", "URBAN",
+    "HALO",  # solo en las unidades de repartition.py: Y = link de contexto de otra unidad
+]
+NAMING_COLUMNS = ["link_id", "ST_NAME"]
+
+CACHE_DIR = ".cache"
+
+# Llave de los metadatos del Parquet con la huella de la fuente (source_fingerprint)
+SOURCE_METADATA_KEY = b"tile_cache.source"
+
+
+def cache_path_for(source_path):
+    """
+    data/STREETS_NAV/SREETS_NAV_1.geojson → data/STREETS_NAV/.cache/SREETS_NAV_1.parquet
+    """
+    folder, name = os.path.split(source_path)
+    return os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0] + ".parquet")
+
+
+def source_fingerprint(source_path, columns):
+    """
+    mtime y tamaño de la fuente más un hash de las columnas que se guardan en el caché.
+    """
+    st = os.stat(source_path)
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "columns": hashlib.sha256(json.dumps(list(columns)).encode()).hexdigest(),
+    }
+
+
+def is_fresh(source_path, cache_path, columns):
+    """
+    El caché guarda en sus metadatos la huella de la fuente con la que se escribió;
+    si la fuente cambia (mtime o tamaño) o cambian las columnas, deja de coincidir.
+    """
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        stored = json.loads(pq.read_schema(cache_path).metadata[SOURCE_METADATA_KEY])
+    except (OSError, KeyError, TypeError, ValueError):
+        # Caché ilegible o escrito sin huella (versión anterior): se reconstruye
+        return False
+    return stored == source_fingerprint(source_path, columns)
+
+
+def _read_geojson(source_path, columns, geometry):
+    # pyogrio solo materializa las columnas pedidas (ignora las que no existan)
+    return gpd.read_file(source_path, columns=columns, ignore_geometry=not geometry)
+
+
+def _write_cache(df, fingerprint, cache_path):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        # La huella de la fuente va junto a los metadatos de (Geo)Parquet
+        table = pq.read_table(tmp_path)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SOURCE_METADATA_KEY] = json.dumps(fingerprint).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        # El caché es opcional: si falla la escritura seguimos con lo ya parseado
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"[WARN] No se pudo escribir el caché {cache_path}: {e}")
+
+
+def _read_cached(source_path, columns, geometry, use_cache=True, subset=None, link_ids=None):
+    # subset: leer solo esas columnas (el caché siempre se escribe con todas las de `columns`)
+    # link_ids: solo las filas de esos links (del caché se leen filtradas por el Parquet)
+    if not use_cache or not HAS_PARQUET:
+        df = _read_geojson(source_path, subset or columns, geometry)
+        return df if link_ids is None else df[df["link_id"].isin(link_ids)].reset_index(drop=True)
+
+    cache_path = cache_path_for(source_path)
+    if is_fresh(source_path, cache_path, columns):
+        filters = None if link_ids is None else [("link_id", "in", list(link_ids))]
+        if geometry:
+            return gpd.read_parquet(cache_path, columns=subset and subset + ["geometry"], filters=filters)
+        return pd.read_parquet(cache_path, columns=subset, filters=filters)
+
+    # La huella se toma antes de leer: si la fuente cambia mientras tanto, el caché ya no coincide
+    fingerprint = source_fingerprint(source_path, columns)
+    df = _read_geojson(source_path, columns, geometry)
+    _write_cache(df, fingerprint, cache_path)
+    if subset:
+        df = df[subset + ["geometry"]] if geometry else df[subset]
+    if link_ids is not None:
+        df = df[df["link_id"].isin(link_ids)].reset_index(drop=True)
+    return df
+
+
+def read_streets_nav(nav_path, use_cache=True, columns=None, link_ids=None):
+    """
+    Lee SREETS_NAV_<tile>.geojson desde el caché GeoParquet (geometría WKB),
+    reconstruyéndolo si no existe o si el GeoJSON cambió. Con `columns` solo
+    se cargan esas columnas (más la geometría) y con `link_ids` solo las filas
+    de esos links.
+    """
+    return _read_cached(nav_path, NAV_COLUMNS, geometry=True, use_cache=use_cache, subset=columns,
+                        link_ids=link_ids)
+
+
+def read_naming(naming_path, use_cache=True):
+    """
+    Lee SREETS_NAMING_ADDRESSING_<tile>.geojson desde el caché Parquet.
+    Solo se guardan link_id y ST_NAME (la geometría no la usa ningún validador).
+    """
+    return _read_cached(naming_path, NAMING_COLUMNS, geometry=False, use_cache=use_cache)
+
+
+def build_cache(base_path, tile_ids=None, force=False):
+    """
+    Etapa de conversión: genera el caché de NAV y NAMING para todos los tiles
+    de base_path (o solo tile_ids). Regresa cuántos archivos se (re)construyeron.
+    """
+    if not HAS_PARQUET:
+        raise ImportError("pyarrow es necesario para generar el caché GeoParquet")
+
+    sources = []
+    for folder, prefix, reader, columns in [
+        ("STREETS_NAV", "SREETS_NAV_", read_streets_nav, NAV_COLUMNS),
+        ("STREETS_NAMING_ADDRESSING", "SREETS_NAMING_ADDRESSING_", read_naming, NAMING_COLUMNS),
+    ]:
+        folder_path = os.path.join(base_path, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            if not (name.startswith(prefix) and name.endswith(".geojson")):
+                continue
+            if tile_ids is not None and name[len(prefix):-len(".geojson")] not in {str(t) for t in tile_ids}:
+                continue
+            sources.append((os.path.join(folder_path, name), reader, columns))
+
+    built = 0
+    for source_path, reader, columns in sources:
+        cache_path = cache_path_for(source_path)
+        if force and os.path.exists(cache_path):
+            os.remove(cache_path)
+        if not is_fresh(source_path, cache_path, columns):
+            reader(source_path)
+            built += 1
+
+    print(f"[INFO] Caché: {built} archivos reconstruidos, {len(sources) - built} ya estaban al día")
+    return built
+
+
+if __name__ == "__main__":
+    ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    build_cache(os.path.join(ROOT_DIR, "data"), force="--force" in sys.argv)
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+import geopandas as gpd
+import shapely
+
+# Un catálogo por archivo y por proceso
+_CATALOGS = {}
+
+
+class TileCatalog:
+    """
+    Índice en memoria L11_Tile_ID → geometría preparada del tile.
+
+    Se construye una vez a partir de HERE_L11_Tiles.geojson. Si use_cache=True
+    se guarda un sidecar WKB (.wkb.npz) junto al geojson, válido mientras no
+    cambie el mtime/tamaño del archivo original; las siguientes ejecuciones
+    lo leen en milisegundos en lugar de volver a parsear el GeoJSON.
+    """
+
+    def __init__(self, tiles_path, use_cache=True):
+        self.tiles_path = tiles_path
+        self.cache_path = os.path.splitext(tiles_path)[0] + ".wkb.npz"
+
+        ids, geoms = None, None
+        if use_cache:
+            ids, geoms = self._read_cache()
+        if ids is None:
+            ids, geoms = self._read_source()
+            if use_cache:
+                self._write_cache(ids, geoms)
+
+        shapely.prepare(geoms)
+        self._geoms = dict(zip(ids.tolist(), geoms))
+        self.tile_ids = sorted(self._geoms)
+
+    def __contains__(self, tile_id):
+        return int(tile_id) in self._geoms
+
+    def __len__(self):
+        return len(self._geoms)
+
+    def geometry(self, tile_id):
+        geom = self._geoms.get(int(tile_id))
+        if geom is None:
+            raise ValueError(f"No se encontró el tile_id {tile_id} en {os.path.basename(self.tiles_path)}")
+        return geom
+
+    def _source_key(self):
+        st = os.stat(self.tiles_path)
+        return np.array([st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+    def _read_source(self):
+        tiles = gpd.read_file(self.tiles_path)
+        # Si un tile aparece repetido nos quedamos con la primera fila
+        tiles = tiles.drop_duplicates(subset="L11_Tile_ID", keep="first")
+        ids = tiles["L11_Tile_ID"].to_numpy(dtype=np.int64)
+        geoms = np.asarray(tiles.geometry.array, dtype=object)
+        return ids, geoms
+
+    def _read_cache(self):
+        if not os.path.exists(self.cache_path):
+            return None, None
+        try:
+            with np.load(self.cache_path) as cache:
+                if not np.array_equal(cache["source_key"], self._source_key()):
+                    return None, None
+                ids = cache["ids"]
+                offsets = cache["offsets"]
+                buf = cache["wkb"].tobytes()
+        except (OSError, KeyError, ValueError):
+            return None, None
+        wkb = np.array([buf[offsets[i]:offsets[i + 1]] for i in range(len(ids))], dtype=object)
+        return ids, shapely.from_wkb(wkb)
+
+    def _write_cache(self, ids, geoms):
+        wkb = shapely.to_wkb(geoms)
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in wkb])
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    source_key=self._source_key(),
+                    ids=ids,
+                    offsets=offsets,
+                    wkb=np.frombuffer(b"".join(wkb), dtype=np.uint8),
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            # El caché es opcional: si el directorio es de solo lectura seguimos sin él
+            print(f"[WARN] No se pudo escribir el caché de tiles {self.cache_path}: {e}")
+
+
+def get_catalog(tiles_path, use_cache=True):
+    """
+    Devuelve el TileCatalog de tiles_path, construyéndolo solo la primera vez en el proceso.
+    """
+    key = os.path.abspath(tiles_path)
+    catalog = _CATALOGS.get(key)
+    if catalog is None:
+        catalog = TileCatalog(tiles_path, use_cache=use_cache)
+        _CATALOGS[key] = catalog
+    return catalog
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from projection import project_tile
+from link_store import LinkStore
+
+
+def _normalize(values):
+    return pd.Series(values).astype(str).str.strip().str.upper().to_numpy()
+
+
+class TileContext:
+    """
+    Estructuras de los links de un tile, calculadas una sola vez y compartidas
+    (solo lectura) por todos los validadores. Nadie modifica tile_data["streets_nav"]
+    ni tile_data["naming"]; las columnas normalizadas viven aquí.
+
+    Por link único (primera aparición de cada link_id en streets_nav, ordenados por link_id):
+    - links:        LinkStore (búsqueda por link_id, vértices, extremos)
+    - link_ids:     link_id únicos ordenados (int64)
+    - link_rows:    posición de cada link en streets_nav; las filas ≥ len(streets_nav)
+                    son links de tiles vecinos (tile_data["external_links"])
+    - lines:        geometrías EPSG:4326
+    - lines_m:      geometrías en el CRS métrico del tile
+    - multidigit:   MULTIDIGIT normalizado ("Y", "N", ...)
+    - simple:       True si el link es un LineString no vacío
+    - ref_m / non_ref_m: nodo de referencia y no-referencia (x, y en metros);
+      la referencia se elige en lat/lon (menor latitud, empate → menor longitud).
+      NaN para los links que no son simples.
+    - length_m / bearing: longitud y rumbo de cada link (link_attributes.py)
+
+    Por fila (mismo orden que streets_nav / naming):
+    - nav_multidigit: MULTIDIGIT normalizado de cada fila de streets_nav
+    - naming_st_name: ST_NAME normalizado de cada fila de naming
+    - attrs:          LinkAttributes del tile (filas de streets_nav y luego las
+                      de external_links; link_rows indexa en ella)
+    """
+
+    def __init__(self, tile_data):
+        project_tile(tile_data)
+        streets_nav = tile_data["streets_nav"]
+        naming = tile_data.get("naming")
+
+        self.tile_id = tile_data["tile_id"]
+        self.metric_crs = tile_data["metric_crs"]
+
+        self.nav_multidigit = _normalize(streets_nav["MULTIDIGIT"])
+        # Sin NAMING (p. ej. solo lado de calle / existence) no hay nombres
+        self.naming_st_name = _normalize(naming["ST_NAME"]) if naming is not None else np.array([], dtype=object)
+
+        # Links del tile y, al final, los de tiles vecinos que referencian sus POIs
+        link_ids = streets_nav["link_id"].to_numpy()
+        lines = np.asarray(streets_nav.geometry.array, dtype=object)
+        multidigit = self.nav_multidigit
+        external = tile_data.get("external_links")
+        if external is not None and len(external):
+            link_ids = np.concatenate([link_ids, external["link_id"].to_numpy()])
+            lines = np.concatenate([lines, np.asarray(external.geometry.array, dtype=object)])
+            multidigit = np.concatenate([multidigit, _normalize(external["MULTIDIGIT"])])
+
+        # Geometrías métricas y atributos derivados: una fila por fila de entrada (project_tile)
+        self.attrs = tile_data["link_attributes"]
+        self.links = LinkStore(link_ids, lines, self.attrs.lines_m)
+        self.links.report_duplicates(self.tile_id)
+        self.link_ids = self.links.ids
+        self.link_rows = self.links.rows
+        self.lines = self.links.lines
+        self.lines_m = self.links.lines_m
+        self.simple = self.links.simple
+        self.multidigit = multidigit[self.link_rows]
+
+        # Nodos por link. Solo LineStrings; lo demás lo resuelve cada validador
+        self.ref_m = np.where(self.simple[:, None], self.attrs.ref_m[self.link_rows], np.nan)
+        self.non_ref_m = np.where(self.simple[:, None], self.attrs.non_ref_m[self.link_rows], np.nan)
+        self.length_m = self.attrs.length_m[self.link_rows]
+        self.bearing = self.attrs.bearing[self.link_rows]
+
+        for arr in (self.multidigit, self.ref_m, self.non_ref_m, self.length_m, self.bearing,
+                    self.nav_multidigit, self.naming_st_name):
+            arr.flags.writeable = False
+
+    def link_positions(self, link_ids):
+        """
+        Posición de cada link_id en los arreglos por link (-1 si no existe en el tile).
+        """
+        return self.links.lookup(link_ids)
+
+
+def prepare_tile(tile_data):
+    """
+    Devuelve el TileContext del tile, construyéndolo solo la primera vez
+    (queda en tile_data["context"]).
+    """
+    context = tile_data.get("context")
+    if context is None:
+        context = TileContext(tile_data)
+        tile_data["context"] = context
+    return context
@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+
+import config
+
+# Pool de procesos del tile, uno por proceso (se crea al primer uso)
+_pool = None
+_pool_key = None
+
+
+class SharedArrays:
+    """
+    Arreglos NumPy de un tile publicados para los procesos del pool: cada uno
+    es un .npy en un directorio temporal (en /dev/shm si existe, ver
+    config.SHARED_DIR) que los workers abren con mmap, sin copiarlo ni pasarlo
+    por pickle. Los arreglos de geometrías (dtype object) se publican como WKB
+    (ver take_geometries). El directorio se borra al cerrar.
+    """
+
+    def __init__(self, arrays, shared_dir=None):
+        self.path = tempfile.mkdtemp(prefix="tile_shards_", dir=shared_dir or config.SHARED_DIR)
+        try:
+            files = {}
+            for name, arr in arrays.items():
+                arr = np.asarray(arr)
+                files.update(pack_geometries(arr, name) if arr.dtype == object else {name: arr})
+            for name, arr in files.items():
+                np.save(os.path.join(self.path, f"{name}.npy"), np.ascontiguousarray(arr))
+            self.names = tuple(files)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def spec(self):
+        # Lo único que viaja a los workers: la carpeta y los nombres
+        return self.path, self.names
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(spec):
+    """
+    {nombre: arreglo de solo lectura (mmap)} a partir de SharedArrays.spec.
+    """
+    path, names = spec
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+
+
+def pack_geometries(geoms, name):
+    """
+    Geometrías en arreglos numéricos para SharedArrays. Si todas son puntos:
+    {f"{name}_xy": (n, 2)} (NaN las nulas o vacías). Si no, WKB en un solo
+    arreglo uint8 más offsets (las nulas quedan vacías):
+    {f"{name}_wkb": ..., f"{name}_offsets": ...}.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    type_ids = shapely.get_type_id(geoms)
+    if np.all((type_ids == 0) | (type_ids == -1)):
+        return {f"{name}_xy": np.column_stack([shapely.get_x(geoms), shapely.get_y(geoms)])}
+    wkb = shapely.to_wkb(geoms)
+    sizes = np.array([len(b) if b is not None else 0 for b in wkb], dtype=np.int64)
+    offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    buffer = np.frombuffer(b"".join(b for b in wkb if b is not None), dtype=np.uint8)
+    return {f"{name}_wkb": buffer, f"{name}_offsets": offsets}
+
+
+def take_geometries(arrays, name, idx):
+    """
+    Geometrías arrays[name][idx]. En un worker llegan empacadas (pack_geometries)
+    y solo se reconstruyen las posiciones pedidas: las líneas nulas quedan None
+    y los puntos nulos o vacíos como POINT (NaN NaN).
+    """
+    if name in arrays:
+        return np.asarray(arrays[name], dtype=object)[idx]
+    if f"{name}_xy" in arrays:
+        return shapely.points(arrays[f"{name}_xy"][idx])
+    buffer, offsets = arrays[f"{name}_wkb"], arrays[f"{name}_offsets"]
+    idx = np.asarray(idx, dtype=np.int64)
+    wkb = np.full(len(idx), None, dtype=object)
+    for k, (lo, hi) in enumerate(zip(offsets[idx].tolist(), offsets[idx + 1].tolist())):
+        if hi > lo:
+            wkb[k] = bytes(buffer[lo:hi])
+    return shapely.from_wkb(wkb)
+
+
+def shard_bounds(n_items, n_shards, min_items=1, weights=None):
+    """
+    Rangos contiguos [(lo, hi), ...] que cubren 0..n_items con peso parecido
+    (weights por elemento; por defecto 1) y al menos min_items de peso cada uno.
+    Siempre hay al menos un rango.
+    """
+    if n_items == 0:
+        return [(0, 0)]
+    weights = np.ones(n_items) if weights is None else np.asarray(weights, dtype=float)
+    cum = np.cumsum(weights)
+    total = float(cum[-1])
+    n_shards = int(max(1, min(n_shards, n_items, total // max(min_items, 1))))
+    cuts = np.searchsorted(cum, total * np.arange(1, n_shards) / n_shards, side="left") + 1
+    edges = np.unique(np.concatenate([[0], np.minimum(cuts, n_items), [n_items]]))
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def tile_pool():
+    """
+    ProcessPoolExecutor de config.TILE_WORKERS procesos, compartido por todos los
+    tiles del proceso. Se cierra al salir (o si cambia el número de workers).
+
+    Los procesos salen de un forkserver y no de fork(): quien llama puede ya
+    tener hilos (el escritor de resultados, el pool de tiles) y un fork con
+    hilos puede heredar un lock tomado y quedarse colgado.
+    """
+    global _pool, _pool_key
+    key = (os.getpid(), config.TILE_WORKERS)
+    if _pool is None or _pool_key != key:
+        if _pool is not None and _pool_key[0] == os.getpid():
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=config.TILE_WORKERS,
+                                    mp_context=multiprocessing.get_context("forkserver"))
+        _pool_key = key
+        # Antes que los finalizadores de las colas del propio pool (prioridad 10):
+        # si se cierran primero, los workers nunca reciben la señal de salida
+        multiprocessing.util.Finalize(_pool, _pool.shutdown, exitpriority=20)
+    return _pool
+
+
+def _run_shard(kernel, spec, lo, hi):
+    return kernel(attach(spec), lo, hi)
+
+
+def map_shards(kernel, arrays, n_items, weights=None, min_items=None):
+    """
+    Corre kernel(arrays, lo, hi) sobre rangos contiguos de 0..n_items y regresa
+    los resultados en el orden de los rangos (el mismo sin importar qué worker
+    termine primero). Con config.TILE_WORKERS = 1, o si no hay elementos
+    suficientes (config.TILE_SHARD_MIN por parte, o min_items), es una sola
+    llamada en este proceso. Si no, los arreglos se
+    publican con SharedArrays y cada rango corre en el pool del tile.
+
+    kernel debe ser una función de módulo (o functools.partial de una) que solo
+    use arrays (las geometrías con take_geometries); sus resultados deben ser
+    arreglos o tipos simples, nunca GeoDataFrames.
+    """
+    if min_items is None:
+        min_items = config.TILE_SHARD_MIN
+    bounds = shard_bounds(n_items, config.TILE_WORKERS, min_items, weights)
+    if len(bounds) == 1:
+        return [kernel(arrays, *bounds[0])]
+    with SharedArrays(arrays) as shared:
+        pool = tile_pool()
+        futures = [pool.submit(_run_shard, kernel, shared.spec, lo, hi) for lo, hi in bounds]
+        return [future.result() for future in futures]
@@ -1,8 +1,15 @@
 # src/validate_existence.py
 
+import numpy as np
 import geopandas as gpd
 import pandas as pd
-from shapely.geometry import Point, LineString
+import shapely
+from tile_context import prepare_tile
+from pipeline import register_validator
+from config import existence_path
+from result_writer import get_writer
+from tile_shards import map_shards, take_geometries
+
 
 SIDE_LEFT = "L"
 SIDE_RIGHT = "R"
@@ -13,6 +20,56 @@ MAX_DIST_METERS = 5
 # Valid FAC_TYPEs that qualify as legitimate exceptions when very close to MULTIDIGIT links
 VALID_FAC_TYPES = {4013, 4100, 4170}
 
+# Classification codes returned by classify_pois (index into ERROR_TYPES)
+ERROR_TYPES = np.array(
+    ["UNDEFINED", "INVALID_GEOMETRY", "NOT_MULTIDIGIT", "LEGITIMATE_EXCEPTION", "TOO_CLOSE_INVALID_TYPE", "TOO_FAR_FROM_LINK"],
+    dtype=object,
+)
+
+def classify_pois(arrays, lo, hi):
+    """
+    Classifies POIs lo:hi: distance in meters to their MULTIDIGIT link (NaN for
+    the rest), error code (index into ERROR_TYPES) and suggestion text.
+
+    Works only on arrays (masks, link positions, FAC_TYPE and the geometries
+    through take_geometries), so the POIs of a tile can be split across processes.
+    """
+    invalid = np.asarray(arrays["invalid"][lo:hi])
+    on_multig = np.asarray(arrays["on_multig"][lo:hi])
+    fac_type = np.asarray(arrays["fac_type"][lo:hi])
+    not_multig = ~invalid & ~on_multig
+    multig = ~invalid & on_multig
+
+    # Distance only for POIs on a MULTIDIGIT link; only the links they point to are rebuilt
+    distance = np.full(hi - lo, np.nan)
+    idx = np.flatnonzero(multig)
+    if len(idx):
+        links, inverse = np.unique(arrays["link_pos"][lo:hi][idx], return_inverse=True)
+        lines = take_geometries(arrays, "lines_m", links)
+        points = take_geometries(arrays, "pois_m", lo + idx)
+        distance[idx] = shapely.distance(points, lines[inverse])
+
+    close = multig & (distance <= MAX_DIST_METERS)
+    valid_fac = np.isin(fac_type, list(VALID_FAC_TYPES))
+    legit = close & valid_fac
+    too_close = close & ~valid_fac
+    too_far = multig & ~close
+    codes = np.select([invalid, not_multig, legit, too_close, too_far], [1, 2, 3, 4, 5], default=0).astype(np.int8)
+
+    # Suggestions: constants by mask, formatted strings only for the rows that carry a distance
+    suggestion = np.full(hi - lo, "", dtype=object)
+    suggestion[invalid] = "Missing geometry or LINK_ID"
+    suggestion[not_multig] = "Associated link is not MULTIDIGIT"
+    for mask, template in [
+        (legit, "Valid FAC_TYPE {fac} near MULTIDIGIT (dist {dist:.2f}m)"),
+        (too_close, "FAC_TYPE {fac} is not valid for legit exception (dist {dist:.2f}m)"),
+        (too_far, "POI is {dist:.2f}m from MULTIDIGIT link"),
+    ]:
+        idx = np.flatnonzero(mask)
+        suggestion[idx] = [template.format(fac=f, dist=d) for f, d in zip(fac_type[idx].tolist(), distance[idx].tolist())]
+    return distance, codes, suggestion
+
+
 def validate_existence(loader_data: dict) -> gpd.GeoDataFrame:
     """
     Validates the existence and legitimacy of POIs located inside Multiply Digitised (MULTIDIGIT) links.
@@ -24,68 +81,74 @@ def validate_existence(loader_data: dict) -> gpd.GeoDataFrame:
     Validation steps:
     - Check POI geometry and link_id.
     - Verify if the associated link is marked MULTIDIGIT.
-    - Measure real distance between POI and the MULTIDIGIT link geometry.
+    - Measure real distance (meters, tile's UTM CRS) between POI and the MULTIDIGIT link geometry.
     - If distance ≤ MAX_DIST_METERS AND POI.FAC_TYPE is in VALID_FAC_TYPES → LEGITIMATE_EXCEPTION.
 
+    All POIs are classified at once with masks (classify_pois); no per-row Python
+    loop. With several tile workers the POIs are split in ranges across processes
+    (see tile_shards.py).
+
     Returns a GeoDataFrame with added columns: error_type, suggestion, distance_meters, fac_type.
     """
 
-    pois = loader_data["pois"].copy()
-    streets = loader_data["streets_nav"]
-
-    if "MULTIDIGIT" not in streets.columns:
+    if "MULTIDIGIT" not in loader_data["streets_nav"].columns:
         raise KeyError("MULTIDIGIT column missing in streets_nav")
 
-    multig_links = streets[streets["MULTIDIGIT"] == "Y"]
-    multig_links = multig_links.set_index("link_id")
-
-    results = []
-
-    for _, row in pois.iterrows():
-        link_id = row.get("LINK_ID")
-        poi_geom = row.geometry
-        perc = row.get("PERCFRREF", 50) / 100.0
-        side = row.get("POI_ST_SD")
-        fac_type = int(row.get("FAC_TYPE", -1)) if not pd.isna(row.get("FAC_TYPE")) else -1
-
-        # Default values
-        distance = None
-        error_type = "UNDEFINED"
-        suggestion = ""
-
-        if pd.isna(link_id) or poi_geom is None or poi_geom.is_empty:
-            error_type = "INVALID_GEOMETRY"
-            suggestion = "Missing geometry or LINK_ID"
-        elif link_id not in multig_links.index:
-            error_type = "NOT_MULTIDIGIT"
-            suggestion = "Associated link is not MULTIDIGIT"
-        else:
-            link_geom = multig_links.loc[link_id].geometry
-            try:
-                # Measure distance from POI to line
-                distance = poi_geom.distance(link_geom)
-
-                if distance <= MAX_DIST_METERS:
-                    if fac_type in VALID_FAC_TYPES:
-                        error_type = "LEGITIMATE_EXCEPTION"
-                        suggestion = f"Valid FAC_TYPE {fac_type} near MULTIDIGIT (dist {distance:.2f}m)"
-                    else:
-                        error_type = "TOO_CLOSE_INVALID_TYPE"
-                        suggestion = f"FAC_TYPE {fac_type} is not valid for legit exception (dist {distance:.2f}m)"
-                else:
-                    error_type = "TOO_FAR_FROM_LINK"
-                    suggestion = f"POI is {distance:.2f}m from MULTIDIGIT link"
-            except Exception as e:
-                error_type = "DISTANCE_ERROR"
-                suggestion = f"Distance calc failed: {str(e)}"
-
-        # Output full row + analysis
-        results.append({
-            **row.to_dict(),
-            "fac_type": fac_type,
-            "distance_meters": distance,
-            "error_type": error_type,
-            "suggestion": suggestion
-        })
-
-    return gpd.GeoDataFrame(results, geometry="geometry", crs=pois.crs)
+    ctx = prepare_tile(loader_data)
+    pois = loader_data["pois"]
+
+    n = len(pois)
+    link_ids = pois["LINK_ID"] if "LINK_ID" in pois.columns else pd.Series(np.nan, index=pois.index)
+    geoms = np.asarray(pois.geometry.array, dtype=object)
+    if "FAC_TYPE" in pois.columns:
+        fac_type = pois["FAC_TYPE"].fillna(-1).astype(np.int64).to_numpy()
+    else:
+        fac_type = np.full(n, -1, dtype=np.int64)
+
+    # Link lookup through the shared tile context (normalized MULTIDIGIT, metric geometries)
+    link_pos = ctx.link_positions(link_ids)
+    on_multig = (link_pos >= 0) & (ctx.multidigit[np.maximum(link_pos, 0)] == "Y")
+
+    invalid = link_ids.isna().to_numpy() | shapely.is_missing(geoms) | shapely.is_empty(geoms)
+
+    # Distances, classes and suggestions by POI ranges (split across the tile's processes)
+    arrays = {
+        "invalid": invalid,
+        "on_multig": on_multig,
+        "fac_type": fac_type,
+        "link_pos": link_pos,
+        "pois_m": loader_data["pois_m"].to_numpy(),
+        "lines_m": ctx.lines_m,
+    }
+    parts = map_shards(classify_pois, arrays, n)
+    distance = np.concatenate([p[0] for p in parts])
+    error_type = ERROR_TYPES[np.concatenate([p[1] for p in parts])]
+    suggestion = np.concatenate([p[2] for p in parts])
+
+    # Output full row + analysis
+    result = pois.assign(
+        fac_type=fac_type,
+        distance_meters=distance,
+        error_type=error_type,
+        suggestion=suggestion,
+    ).reset_index(drop=True)
+    return gpd.GeoDataFrame(result, geometry="geometry", crs=pois.crs)
+
+
+@register_validator("existence")
+def run_existence_validation(loader_data: dict) -> dict:
+    """
+    Runs validate_existence, queues existence_<tile>.parquet (or .geojson, see
+    config.EXISTENCE_FORMAT) on the result writer and returns the per-type
+    counts for the run summary.
+    """
+    exist_gdf = validate_existence(loader_data)
+    out_path = existence_path(loader_data["tile_id"])
+    get_writer().write_geodataframe(out_path, exist_gdf)
+    print(f"  • Existence report written to: {out_path}")
+
+    # Optional quick counts
+    counts = exist_gdf["error_type"].value_counts()
+    for etype, cnt in counts.items():
+        print(f"    {etype:16s}: {cnt}")
+    return {"existence": {str(k): int(v) for k, v in sorted(counts.items())}}
@@ -1,147 +1,212 @@
-import os
-import json
-import math
-from shapely.geometry import LineString, MultiLineString
-from shapely.strtree import STRtree
-
-def normalize_line_geometry(geom):
-    if isinstance(geom, LineString):
-        return geom
-    if isinstance(geom, MultiLineString):
-        coords = []
-        for part in geom.geoms:
-            coords.extend(part.coords)
-        return LineString(coords) if coords else None
-    return None
-
-def angle_from_linestring(line):
-    coords = list(line.coords)
-    if len(coords) < 2:
-        return None
-    x1, y1 = coords[0]
-    x2, y2 = coords[-1]
-    return math.atan2(y2 - y1, x2 - x1)
-
-def is_parallel_and_within_distance(line1, line2,
-                                   angle_tol_deg=45,
-                                   min_dist=0,
-                                   max_dist=200):
-    a1 = angle_from_linestring(line1)
-    a2 = angle_from_linestring(line2)
-    if a1 is None or a2 is None:
-        return False
-    diff = abs(math.degrees(a1 - a2)) % 180
-    diff = min(diff, 180 - diff)
-    if diff > angle_tol_deg:
-        return False
-    dist = line1.distance(line2) * 111_320
-    return 0 <= dist <= max_dist
-
-
-def score_link(row, min_length=20):
-    s = 0
-    if row.get("DIVIDER") == "Y":
-        s += 2
-    if str(row.get("FUNC_CLASS", "5")).strip() not in ("5", ""):
-        s += 1
-    if str(row.get("LANE_CAT", "1")).strip() != "1":
-        s += 1
-    if row.geometry.length * 111_320 > min_length:
-        s += 1
-    if str(row.get("SPEED_CAT", "0")).isdigit() and int(row["SPEED_CAT"]) >= 5:
-        s += 1
-    if row.get("TOLLWAY") == "Y":
-        s += 1
-    if row.get("URBAN") == "N":
-        s += 0.5
-    return s
-
-def validate_multidigit(tile_data):
-    tile_id = tile_data["tile_id"]
-    nav     = tile_data["streets_nav"]
-    naming  = tile_data["naming"]
-
-    nav["MULTIDIGIT"] = nav["MULTIDIGIT"].astype(str).str.strip().str.upper()
-    naming["ST_NAME"] = naming["ST_NAME"].astype(str).str.strip().str.upper()
-
-    naming = naming[["link_id", "ST_NAME"]].copy()
-    nav = nav.copy()
+import numpy as np
+import pandas as pd
+from tile_context import prepare_tile
+from link_graph import LinkGraph, travel_codes
+from tile_shards import map_shards, take_geometries
+from pipeline import register_validator
+from config import multidigit_errors_path
+from result_writer import get_writer
+
+# Calzadas N–Y: distancia máxima (m) y tolerancia de orientación por segmento (grados)
+MAX_DIST_M = 200
+ANGLE_TOL_DEG = 45
+
+# Códigos de MULTIDIGIT en los arreglos compartidos
+MD_OTHER, MD_N, MD_Y = 0, 1, 2
+
+# Calificación de cada link (score_links): criterio → condición sobre el valor
+# crudo de la columna NAV; si la columna no existe el criterio no suma
+SCORE_RULES = {
+    "DIVIDER": lambda v: v == "Y",
+    "FUNC_CLASS": lambda v: str(v).strip() not in ("5", ""),
+    "LANE_CAT": lambda v: str(v).strip() != "1",
+    "SPEED_CAT": lambda v: str(v).isdigit() and int(v) >= 5,
+    "TOLLWAY": lambda v: v == "Y",
+    "URBAN": lambda v: v == "N",
+}
+# Puntos de cada criterio; "length" = link de más de SCORE_MIN_LENGTH_M metros
+SCORE_WEIGHTS = {"DIVIDER": 2, "FUNC_CLASS": 1, "LANE_CAT": 1, "length": 1, "SPEED_CAT": 1, "TOLLWAY": 1, "URBAN": 0.5}
+SCORE_MIN_LENGTH_M = 20
+# Un par N–Y se reporta si el promedio de los scores de sus dos links llega a esto
+SCORE_THRESHOLD = 4.0
+
+def score_flags(values, rule):
+    """
+    rule evaluada una vez por valor distinto de la columna (pd.factorize) y
+    repartida a todas las filas como arreglo bool.
+    """
+    codes, uniques = pd.factorize(pd.Series(values).astype(object), use_na_sentinel=False)
+    return np.array([bool(rule(v)) for v in uniques], dtype=bool)[codes]
+
+def score_links(links, weights=None, min_length=SCORE_MIN_LENGTH_M):
+    """
+    Score de todas las filas de `links` a la vez: suma de los pesos
+    (SCORE_WEIGHTS) de los criterios de SCORE_RULES que cumple cada link. links necesita
+    length_m (ver named_links) y las columnas de SCORE_RULES que haya.
+    """
+    weights = SCORE_WEIGHTS if weights is None else weights
+    scores = np.zeros(len(links))
+    for name, weight in weights.items():
+        if name == "length":
+            flags = links["length_m"].to_numpy(dtype=float) > min_length
+        elif name in SCORE_RULES:
+            if name not in links:
+                continue
+            flags = score_flags(links[name], SCORE_RULES[name])
+        else:
+            raise ValueError(f"Criterio de score desconocido: {name}")
+        scores += np.where(flags, weight, 0)
+    return scores
+
+def match_carriageways(arrays, lo, hi):
+    """
+    Calzadas N–Y paralelas de los ST_NAME lo:hi (códigos ordenados). Cada nombre
+    es independiente (las cadenas y los pares son del mismo nombre), así que los
+    grupos se pueden repartir entre procesos. Regresa las filas (link_a N, link_b Y),
+    los metros compartidos y los conteos. Solo se buscan pares para las cadenas N
+    con algún link propio (arrays["own"]; ver HALO en repartition.py).
+    """
+    rows_by_name, name_offsets = arrays["rows_by_name"], arrays["name_offsets"]
+    rows = np.asarray(rows_by_name[name_offsets[lo]:name_offsets[hi]])
+    multidigit = arrays["multidigit"][rows]
+    name_codes = arrays["name_codes"][rows]
+    is_n, is_y = multidigit == MD_N, multidigit == MD_Y
+
+    graph = LinkGraph(take_geometries(arrays, "lines_m", rows), arrays["travel"][rows], arrays["ref_first"][rows])
+    chains = graph.chains(carriageway_groups(name_codes, multidigit))
+    is_n &= np.isin(chains, chains[is_n & arrays["own"][rows]])
+    matches = graph.parallel_chains(chains, is_n, is_y, name_codes,
+                                    max_dist=MAX_DIST_M, angle_tol_deg=ANGLE_TOL_DEG)
+    return rows[matches.link_a], rows[matches.link_b], matches.matched_m, matches.stats
+
+def named_links(tile_data):
+    """
+    Links con ST_NAME y geometría lineal del tile: NAV + NAMING con las columnas
+    normalizadas del contexto (tile_data no se modifica), geometry en metros
+    (normalizada), geometry_ll (EPSG:4326) para la salida, y length_m y
+    ref_first de la tabla de atributos del tile (link_attributes.py).
+    """
+    ctx = prepare_tile(tile_data)
+    nav = tile_data["streets_nav"]
+    nav = nav.assign(MULTIDIGIT=ctx.nav_multidigit, geometry_ll=nav.geometry.array, nav_row=np.arange(len(nav)))
+    nav = nav.set_geometry(tile_data["streets_nav_m"])
+    naming = pd.DataFrame({"link_id": tile_data["naming"]["link_id"].to_numpy(), "ST_NAME": ctx.naming_st_name})
 
     merged = nav.merge(naming, on="link_id", how="left").dropna(subset=["ST_NAME"])
-    merged["geometry"] = merged["geometry"].apply(normalize_line_geometry)
-    merged = merged.dropna(subset=["geometry"])
-
+    rows = merged["nav_row"].to_numpy()
+    merged["geometry"] = ctx.attrs.line_m[rows]
+    merged["length_m"] = ctx.attrs.length_m[rows]
+    merged["ref_first"] = ctx.attrs.ref_first[rows]
+    return merged.dropna(subset=["geometry"]).drop(columns="nav_row").reset_index(drop=True)
+
+def carriageway_groups(name_codes, multidigit):
+    """
+    Grupo de cada link para las cadenas de calzadas: mismo ST_NAME y mismo
+    MULTIDIGIT (N o Y); -1 para los demás.
+    """
+    is_n, is_y = multidigit == MD_N, multidigit == MD_Y
+    return np.where(is_n | is_y, name_codes * 2 + is_y, -1)
+
+def multidigit_codes(values):
+    return np.select([values == "N", values == "Y"], [MD_N, MD_Y], MD_OTHER).astype(np.int8)
+
+def validate_multidigit(tile_data, weights=None, threshold=SCORE_THRESHOLD):
+    """
+    Busca calzadas N–Y paralelas del mismo ST_NAME y reporta, por link N, el
+    link Y con el que más tramo comparte entre los pares cuyo score promedio
+    (score_links con `weights`, SCORE_WEIGHTS por omisión) llega a `threshold`.
+    """
+    tile_id = tile_data["tile_id"]
+    merged = named_links(tile_data)
+
+    # Grafo de los links con nombre; cadenas de links consecutivos con el mismo
+    # ST_NAME y MULTIDIGIT, y calzadas N–Y paralelas emparejadas cadena con cadena.
+    # Los grupos de ST_NAME se reparten entre los procesos del tile (tile_shards.py)
+    name_codes, names = pd.factorize(merged["ST_NAME"], sort=True)
+    multidigit = merged["MULTIDIGIT"].to_numpy()
+    is_n, is_y = multidigit == "N", multidigit == "Y"
+    rows_by_name = np.argsort(name_codes, kind="stable")
+    name_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(name_codes, minlength=len(names)), out=name_offsets[1:])
+    if "DIR_TRAVEL" in merged:
+        travel = travel_codes(merged["DIR_TRAVEL"])
+    else:
+        travel = np.zeros(len(merged), dtype=np.int8)
+    arrays = {
+        "rows_by_name": rows_by_name,
+        "name_offsets": name_offsets,
+        "name_codes": name_codes,
+        "multidigit": multidigit_codes(multidigit),
+        "travel": travel,
+        "ref_first": merged["ref_first"].to_numpy(),
+        "lines_m": merged.geometry.to_numpy(),
+        # En las unidades de repartition.py los links HALO=Y son solo contexto: los reporta su unidad
+        "own": merged["HALO"].to_numpy() != "Y" if "HALO" in merged else np.ones(len(merged), dtype=bool),
+    }
+    parts = map_shards(match_carriageways, arrays, len(names), weights=np.diff(name_offsets))
+    link_a = np.concatenate([p[0] for p in parts])
+    link_b = np.concatenate([p[1] for p in parts])
+    matched_m = np.concatenate([p[2] for p in parts])
+    stats = {k: sum(p[3][k] for p in parts) for k in parts[0][3]}
+    # Solo los pares de links propios se reportan (y se califican)
+    order = np.lexsort((link_b, link_a))
+    order = order[arrays["own"][link_a[order]]]
+    link_a, link_b, matched_m = link_a[order], link_b[order], matched_m[order]
+
+    total_groups = len(names)
+    groups_with_both = len(np.intersect1d(name_codes[is_n], name_codes[is_y]))
+
+    # Score de cada link una sola vez, en bloque; el de cada par es el promedio de sus dos links
+    scores = score_links(merged, weights)
+    pair_scores = (scores[link_a] + scores[link_b]) / 2
+
+    # Por link N, el link Y que más tramo comparte con él entre los que pasan el umbral
+    passing = pair_scores >= threshold
+    n_pairs = len(link_a)
+    link_a, link_b = link_a[passing], link_b[passing]
+    matched_m, pair_scores = matched_m[passing], pair_scores[passing]
+    order = np.lexsort((link_b, -matched_m, link_a))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = link_a[order][1:] != link_a[order][:-1]
+    best = order[first]
+    # Salida por ST_NAME y luego por posición del link en el tile
+    best = best[np.lexsort((link_a[best], name_codes[link_a[best]]))]
+
+    link_ids = merged["link_id"].to_numpy()
+    geoms_ll = merged["geometry_ll"].to_numpy()
     output = []
-    st_groups = merged.groupby("ST_NAME")
-
-    total_groups = 0
-    groups_with_both = 0
-    total_evals = 0
-
-    SCORE_THRESHOLD = 4.0
-
-    for st_name, grp in st_groups:
-        total_groups += 1
-        grp_n = grp[grp["MULTIDIGIT"] == "N"]
-        grp_y = grp[grp["MULTIDIGIT"] == "Y"]
-        if grp_n.empty or grp_y.empty:
-            continue
-        groups_with_both += 1
-
-        geoms_with_data = []
-        for _, row in grp_y.iterrows():
-            geom = row.geometry
-            if geom is not None:
-                geoms_with_data.append((geom, row))
-
-        if not geoms_with_data:
-            continue
-
-        geoms_only = [g for g, _ in geoms_with_data]
-        idx_y = STRtree(geoms_only)
-        geom_to_row = dict(geoms_with_data)
-
-        for _, row_n in grp_n.iterrows():
-            line_n = row_n.geometry
-            cands = [g for g in geoms_only if line_n.distance(g) * 111_320 <= 200]
-
-
-
-
-            for gY in cands:
-                row_y = geom_to_row.get(gY)
-                if row_y is None:
-                    continue
-                if is_parallel_and_within_distance(line_n, gY):
-                    total_evals += 1
-                    score = (score_link(row_n) + score_link(row_y)) / 2
-                    if score >= SCORE_THRESHOLD:
-                        output.append({
-                            "tile_id": int(tile_id),
-                            "poi_id": None,
-                            "link_id": int(row_n.link_id),
-                            "error_type": "potential_multidigit_false_negative",
-                            "description": (
-                                f"Parallel segment {int(row_y.link_id)} "
-                                f"seems to need MULTIDIGIT=Y (score={score:.1f})"
-                            ),
-                            "suggestion": "Consider setting MULTIDIGIT to 'Y'",
-                            "geometry": list(line_n.centroid.coords)[0]
-                        })
-                        break
-
-    out_dir = os.path.join("../outputs", "validation_multidigit")
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, f"errors_{tile_id}.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2)
+    for k in best.tolist():
+        i, j, score = int(link_a[k]), int(link_b[k]), float(pair_scores[k])
+        output.append({
+            "tile_id": int(tile_id),
+            "poi_id": None,
+            "link_id": int(link_ids[i]),
+            "error_type": "potential_multidigit_false_negative",
+            "description": (
+                f"Parallel segment {int(link_ids[j])} "
+                f"seems to need MULTIDIGIT=Y (score={score:.1f})"
+            ),
+            "suggestion": "Consider setting MULTIDIGIT to 'Y'",
+            "geometry": list(geoms_ll[i].centroid.coords)[0]
+        })
+
+    out_path = multidigit_errors_path(tile_id)
+    get_writer().write_json(out_path, output)
 
     print(f"[DEBUG] total ST_NAME groups: {total_groups}")
     print(f"[DEBUG] groups with both N & Y: {groups_with_both}")
-    print(f"[DEBUG] total N–Y pairs evaluated: {total_evals}")
+    print(f"[DEBUG] chains N / Y: {stats['chains_a']} / {stats['chains_b']}")
+    print(f"[DEBUG] N–Y chain pairs (STRtree candidates): {stats['chain_pairs']}")
+    print(f"[DEBUG] N–Y segment distance checks: {stats['segment_pairs']}")
+    print(f"[DEBUG] parallel N–Y chain pairs: {stats['parallel_chains']}")
+    print(f"[DEBUG] N–Y link pairs evaluated: {n_pairs}")
     if output:
         print(f"[INFO] Exported {len(output)} MULTIDIGIT candidates to {out_path}")
     else:
         print(f"[INFO] No MULTIDIGIT issues found for tile {tile_id}")
 
     return output
+
+@register_validator("multidigit")
+def run_multidigit_validation(tile_data):
+    return {"multidigit_errors": len(validate_multidigit(tile_data))}
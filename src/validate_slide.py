@@ -1,8 +1,18 @@
-import os
-import json
 import math
+from functools import partial
+import numpy as np
+import pandas as pd
+import shapely
 from shapely.geometry import Point
 from collections import Counter
+from tile_context import prepare_tile
+from pipeline import register_validator
+from config import side_errors_path
+from result_writer import get_writer
+from tile_shards import map_shards
+
+# Lado calculado en los arreglos compartidos: 0 = no se pudo calcular (link inexistente o no simple)
+SIDE_CODES = np.array([None, "L", "R"], dtype=object)
 
 def get_reference_node(line):
     coords = list(line.coords)
@@ -14,6 +24,17 @@ def get_reference_node(line):
     else:
         return (first, last) if first[0] < last[0] else (last, first)
 
+def get_reference_node_metric(line, line_m):
+    """
+    Nodo de referencia elegido con lat/lon (regla HERE) pero devuelto con las
+    coordenadas de la misma línea en el CRS métrico.
+    """
+    ref_node, _ = get_reference_node(line)
+    coords_m = list(line_m.coords)
+    if ref_node == line.coords[0]:
+        return coords_m[0], coords_m[-1]
+    return coords_m[-1], coords_m[0]
+
 def determine_side(ref_node, non_ref_node, poi_point):
     ax, ay = non_ref_node[0] - ref_node[0], non_ref_node[1] - ref_node[1]
     bx, by = poi_point.x - ref_node[0], poi_point.y - ref_node[1]
@@ -21,6 +42,7 @@ def determine_side(ref_node, non_ref_node, poi_point):
     return "L" if cross > 0 else "R"
 
 def displace_point(poi_point, ref_node, non_ref_node, side="R", distance=5):
+    # Coordenadas en CRS métrico: distance son metros reales
     dx = non_ref_node[0] - ref_node[0]
     dy = non_ref_node[1] - ref_node[1]
     length = math.sqrt(dx**2 + dy**2)
@@ -29,33 +51,102 @@ def displace_point(poi_point, ref_node, non_ref_node, side="R", distance=5):
     ux = -dy / length
     uy = dx / length
     factor = 1 if side == "L" else -1
-    new_x = poi_point.x + factor * ux * (distance / 111320)
-    new_y = poi_point.y + factor * uy * (distance / 111320)
+    new_x = poi_point.x + factor * ux * distance
+    new_y = poi_point.y + factor * uy * distance
     return Point(new_x, new_y)
+def side_codes(arrays, lo, hi, displacement=5):
+    """
+    Lado real (1 = L, 2 = R, 0 = sin calcular) de los POIs candidatos lo:hi:
+    cada POI se desplaza `displacement` metros hacia el lado esperado,
+    perpendicular a su link, y se toma el signo del producto cruz. Solo usa
+    arreglos (posición del link, nodos por link), así que los POIs se pueden
+    repartir entre procesos.
+    """
+    link_pos = np.asarray(arrays["link_pos"][lo:hi])
+    found = link_pos >= 0
+    simple = found.copy()
+    simple[found] = arrays["simple"][link_pos[found]]
+    idx = np.flatnonzero(simple)
+    ref = arrays["ref_m"][link_pos[idx]]
+    non_ref = arrays["non_ref_m"][link_pos[idx]]
+
+    # Desplazar el POI `displacement` metros hacia el lado esperado (perpendicular al link)
+    poi_xy = arrays["poi_xy"][lo:hi][idx]
+    dx = non_ref[:, 0] - ref[:, 0]
+    dy = non_ref[:, 1] - ref[:, 1]
+    length = np.sqrt(dx**2 + dy**2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ux = np.where(length == 0, 0.0, -dy / length)
+        uy = np.where(length == 0, 0.0, dx / length)
+    factor = np.where(arrays["expected_left"][lo:hi][idx], 1, -1)
+    disp_x = poi_xy[:, 0] + factor * ux * displacement
+    disp_y = poi_xy[:, 1] + factor * uy * displacement
+
+    # Signo del producto cruz
+    cross = dx * (disp_y - ref[:, 1]) - dy * (disp_x - ref[:, 0])
+    codes = np.zeros(hi - lo, dtype=np.int8)
+    codes[idx] = np.where(cross > 0, 1, 2)
+    return codes
+
 #Función de validate
-def validate_poi_side(tile_data):
+def validate_poi_side(tile_data, displacement=5):
+    results = find_side_errors(tile_data, displacement)
+    report_side_errors(results, int(tile_data["tile_id"]))
+    return results
+
+def find_side_errors(tile_data, displacement=5):
+    """
+    Valida POI_ST_SD de todos los POIs a la vez: los nodos de referencia salen
+    del TileContext (una vez por link) y el desplazamiento de `displacement` metros y
+    el signo del producto cruz se calculan como arreglos NumPy (side_codes).
+    Solo regresa los registros de error, sin imprimir el resumen.
+    """
     pois = tile_data["pois"]
-    streets_nav = tile_data["streets_nav"]
     tile_id = int(tile_data["tile_id"])
 
-    results = []
-    processed_ids = set()
-    streets_nav = streets_nav.set_index("link_id")
-
-    for _, poi in pois.iterrows():
-        try:
-            poi_id = int(poi["POI_ID"])
-            link_id = int(poi["LINK_ID"])
-            expected_side = str(poi["POI_ST_SD"]).strip().upper()
-            geometry = poi.geometry
-        except Exception:
-            continue
+    # POIs a evaluar: IDs numéricos, dentro del tile, primera aparición de cada POI_ID
+    poi_ids = pd.to_numeric(pois["POI_ID"], errors="coerce").to_numpy(dtype=float)
+    link_ids = pd.to_numeric(pois["LINK_ID"], errors="coerce").to_numpy(dtype=float)
+    candidate = ~np.isnan(poi_ids) & ~np.isnan(link_ids) & pois["inside_tile"].to_numpy(dtype=bool)
+    cand_pos = np.flatnonzero(candidate)
+    cand_pos = cand_pos[~pd.Series(poi_ids[cand_pos].astype(np.int64)).duplicated().to_numpy()]
+
+    poi_ids = poi_ids[cand_pos].astype(np.int64)
+    link_ids = link_ids[cand_pos].astype(np.int64)
+    expected = pois["POI_ST_SD"].astype(str).str.strip().str.upper().to_numpy()[cand_pos]
+    geoms_m = tile_data["pois_m"].to_numpy()[cand_pos]
+
+    # link_id → posición en los arreglos por link del contexto (primera aparición)
+    ctx = prepare_tile(tile_data)
+    lines, lines_m = ctx.lines, ctx.lines_m
+    link_pos = ctx.link_positions(link_ids)
+    found = link_pos >= 0
+
+    # Nodos de referencia por link del contexto; los POIs se reparten entre los
+    # procesos del tile (tile_shards.py) y los lados se juntan en orden
+    arrays = {
+        "link_pos": link_pos,
+        "expected_left": expected == "L",
+        "poi_xy": np.column_stack([shapely.get_x(geoms_m), shapely.get_y(geoms_m)]),
+        "simple": ctx.simple,
+        "ref_m": ctx.ref_m,
+        "non_ref_m": ctx.non_ref_m,
+    }
+    parts = map_shards(partial(side_codes, displacement=displacement), arrays, len(cand_pos))
+    codes = np.concatenate(parts)
+    simple = codes > 0
+    actual = SIDE_CODES[codes]
 
-        if poi_id in processed_ids or not poi["inside_tile"]:
-            continue
-        processed_ids.add(poi_id)
+    # Solo generan registro: link inexistente, geometría rara o lado distinto
+    emit = ~simple | (actual != expected)
+    geoms = np.asarray(pois.geometry.array, dtype=object)[cand_pos]
+
+    results = []
+    for k in np.flatnonzero(emit).tolist():
+        poi_id = int(poi_ids[k])
+        link_id = int(link_ids[k])
 
-        if link_id not in streets_nav.index:
+        if not found[k]:
             results.append({
                 "tile_id": tile_id,
                 "poi_id": poi_id,
@@ -67,37 +158,44 @@ def validate_poi_side(tile_data):
             })
             continue
 
-        try:
-            line = streets_nav.loc[link_id].geometry
-            ref_node, non_ref_node = get_reference_node(line)
-
-            displaced = displace_point(geometry, ref_node, non_ref_node, expected_side)
-            actual_side = determine_side(ref_node, non_ref_node, displaced)
-
-            if actual_side != expected_side:
+        expected_side = expected[k]
+        geometry = geoms[k]
+        if simple[k]:
+            actual_side = actual[k]
+        else:
+            # Geometrías raras (MultiLineString, vacías): camino escalar original
+            try:
+                ref_node, non_ref_node = get_reference_node_metric(lines[link_pos[k]], lines_m[link_pos[k]])
+                displaced = displace_point(geoms_m[k], ref_node, non_ref_node, expected_side, displacement)
+                actual_side = determine_side(ref_node, non_ref_node, displaced)
+            except Exception as e:
                 results.append({
                     "tile_id": tile_id,
                     "poi_id": poi_id,
                     "link_id": link_id,
-                    "error_type": "wrong_side_of_street",
-                    "description": f"POI expected on {expected_side} side, but is located on {actual_side}",
-                    "suggestion": f"Update POI_ST_SD to '{actual_side}'",
-                    "expected_side": expected_side,
-                    "actual_side": actual_side,
-                    "geometry": [float(geometry.x), float(geometry.y)] if geometry else None
+                    "error_type": "geometry_processing_error",
+                    "description": str(e),
+                    "suggestion": "Check geometry or input values",
+                    "geometry": None
                 })
+                continue
 
-        except Exception as e:
+        if actual_side != expected_side:
             results.append({
                 "tile_id": tile_id,
                 "poi_id": poi_id,
                 "link_id": link_id,
-                "error_type": "geometry_processing_error",
-                "description": str(e),
-                "suggestion": "Check geometry or input values",
-                "geometry": None
+                "error_type": "wrong_side_of_street",
+                "description": f"POI expected on {expected_side} side, but is located on {actual_side}",
+                "suggestion": f"Update POI_ST_SD to '{actual_side}'",
+                "expected_side": expected_side,
+                "actual_side": actual_side,
+                "geometry": [float(geometry.x), float(geometry.y)] if geometry else None
             })
 
+    return results
+
+def report_side_errors(results, tile_id):
     side_errors = [
         (e["expected_side"], e["actual_side"])
         for e in results
@@ -134,18 +232,19 @@ def validate_poi_side(tile_data):
     print(f"  → R but actually L: {bad_assignments['R_expected_but_L_actual']} / {bad_assignments['total_R']}")
     print(f"  → L but actually R: {bad_assignments['L_expected_but_R_actual']} / {bad_assignments['total_L']}")
 
-    return results
-
 def export_validation_results(results, tile_id):
     if not results:
         print(f"[INFO] No side errors found in tile {tile_id}")
         return
 
-    output_dir = os.path.join("../outputs", "validation_side")
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, f"errors_{tile_id}.json")
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2)
+    # La escritura la hace el hilo del escritor de resultados (no bloquea el cálculo)
+    output_path = side_errors_path(tile_id)
+    get_writer().write_json(output_path, results)
 
     print(f"[INFO] {len(results)} side errors exported to {output_path}")
+
+@register_validator("side")
+def run_side_validation(tile_data):
+    results = validate_poi_side(tile_data)
+    export_validation_results(results, tile_data["tile_id"])
+    return {"side_errors": len(results)}
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import math
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import LineString
+from shapely.strtree import STRtree
+
+import config
+from config import output_path
+from tile_cache import read_streets_nav, read_naming
+from projection import utm_crs_for
+from link_graph import LinkGraph, travel_codes
+from link_store import line_reference_first
+from link_attributes import attributes_path_for, load_link_attributes
+
+def angle_from_linestring(line):
+    coords = list(line.coords)
+    if len(coords) < 2:
+        return None
+    x1, y1 = coords[0]
+    x2, y2 = coords[-1]
+    return math.atan2(y2 - y1, x2 - x1)
+
+def is_parallel_and_within_distance(line1, line2, angle_tol_deg=20, min_dist=3, max_dist=80):
+    if line1.is_empty or line2.is_empty:
+        return False
+    angle1 = angle_from_linestring(line1)
+    angle2 = angle_from_linestring(line2)
+    if angle1 is None or angle2 is None:
+        return False
+    angle_diff = abs(math.degrees(angle1 - angle2)) % 180
+    angle_diff = min(angle_diff, 180 - angle_diff)
+    if angle_diff > angle_tol_deg:
+        return False
+    dist = line1.distance(line2)  # CRS métrico: metros
+    return min_dist <= dist <= max_dist
+
+def load_tile_nav_and_names(tile_id, base_path="data"):
+    nav_path = os.path.join(base_path, "STREETS_NAV", f"SREETS_NAV_{tile_id}.geojson")
+    naming_path = os.path.join(base_path, "STREETS_NAMING_ADDRESSING", f"SREETS_NAMING_ADDRESSING_{tile_id}.geojson")
+    if not os.path.exists(nav_path) or not os.path.exists(naming_path):
+        raise FileNotFoundError("Nav o Naming file no encontrado.")
+    nav = read_streets_nav(nav_path)
+    naming = read_naming(naming_path)
+    nav["MULTIDIGIT"] = nav["MULTIDIGIT"].astype(str).str.strip().str.upper()
+    nav["FUNC_CLASS"] = nav["FUNC_CLASS"].astype(str).str.strip()
+    nav["LANE_CAT"] = nav["LANE_CAT"].astype(str).str.strip()
+    nav["DIVIDER"] = nav["DIVIDER"].astype(str).str.strip().str.upper()
+    naming["ST_NAME"] = naming["ST_NAME"].astype(str).str.strip().str.upper()
+    # Zona UTM del tile: longitudes y distancias en metros. Las geometrías métricas
+    # y el nodo de referencia salen de la tabla de atributos (caché junto al NAV)
+    minx, miny, maxx, maxy = nav.total_bounds
+    crs = utm_crs_for((minx + maxx) / 2, (miny + maxy) / 2)
+    attrs = load_link_attributes(nav.geometry.array, crs, attributes_path_for(nav_path))
+    nav["geometry_ll"] = nav.geometry.array
+    nav["ref_first"] = attrs.ref_first  # sentido de DIR_TRAVEL
+    nav = nav.set_geometry(gpd.GeoSeries(attrs.lines_m, index=nav.index, crs=crs))
+    return nav.merge(naming[["link_id", "ST_NAME"]], on="link_id", how="left")
+
+def find_multidigit_errors(tile_id, base_path="data", chains=False):
+    """
+    suspicious_pairs del tile: pares de links (find_suspicious_pairs). Con
+    chains=True se usa find_suspicious_chain_pairs (cadenas sobre el grafo de
+    links); da otros pares, así que es opcional.
+    """
+    merged = load_tile_nav_and_names(tile_id, base_path)
+    print(f"[DEBUG] Original links: {len(merged)}")
+
+    # Solo descartar si ambos FUNC_CLASS=5 y LANE_CAT=1
+    merged = merged[~((merged["FUNC_CLASS"] == "5") & (merged["LANE_CAT"] == "1"))]
+    print(f"[DEBUG] After filtering FUNC_CLASS=5 & LANE_CAT=1: {len(merged)}")
+
+    merged = merged[merged["ST_NAME"].notna()]
+    if chains:
+        return find_suspicious_chain_pairs(merged, tile_id)
+    return find_suspicious_pairs(merged, tile_id)
+
+def find_suspicious_pairs(merged, tile_id, angle_tol_deg=20, min_dist=3, max_dist=80, min_length=40):
+    """
+    Busca pares del mismo ST_NAME paralelos y a min_dist–max_dist metros
+    (merged en CRS métrico, ver load_tile_nav_and_names).
+    Un solo STRtree por tile da todos los pares cercanos; ángulo, longitud y
+    distancia se filtran como arreglos. Mismo orden de salida que el loop
+    i<j por grupo: ST_NAME ordenado y luego posición dentro del tile.
+    """
+    merged = merged.reset_index(drop=True)
+    geoms = merged.geometry.to_numpy()
+    if len(geoms) == 0:
+        return []
+
+    # Todos los pares (a, b) con a < b, del mismo nombre y a ≤ max_dist
+    tree = STRtree(geoms)
+    a, b = tree.query(geoms, predicate="dwithin", distance=max_dist)
+    name_codes, names = pd.factorize(merged["ST_NAME"], sort=True)
+    keep = (a < b) & (name_codes[a] == name_codes[b])
+    a, b = a[keep], b[keep]
+
+    # Atributos por link, una sola vez
+    lengths = shapely.length(geoms)
+    divider = merged["DIVIDER"].to_numpy()
+    multidigit = merged["MULTIDIGIT"].to_numpy()
+    link_ids = merged["link_id"].to_numpy()
+
+    is_line = (shapely.get_type_id(geoms) == 1) & ~shapely.is_empty(geoms)
+    angles = np.full(len(geoms), np.nan)
+    if is_line.any():
+        start = shapely.get_coordinates(shapely.get_point(geoms[is_line], 0))
+        end = shapely.get_coordinates(shapely.get_point(geoms[is_line], -1))
+        angles[is_line] = np.arctan2(end[:, 1] - start[:, 1], end[:, 0] - start[:, 0])
+
+    # Tolerar tramos cortos si alguno tiene DIVIDER
+    has_divider = (divider[a] == "Y") | (divider[b] == "Y")
+    short = (lengths[a] < min_length) | (lengths[b] < min_length)
+    keep = ~short | has_divider
+    keep &= (multidigit[a] == "N") | (multidigit[b] == "N")
+
+    angle_diff = np.abs(np.degrees(angles[a] - angles[b])) % 180
+    angle_diff = np.minimum(angle_diff, 180 - angle_diff)
+    keep &= angle_diff <= angle_tol_deg  # NaN (sin ángulo) queda fuera
+    a, b = a[keep], b[keep]
+
+    dist = shapely.distance(geoms[a], geoms[b])
+    keep = (min_dist <= dist) & (dist <= max_dist)
+    a, b = a[keep], b[keep]
+
+    order = np.lexsort((b, a, name_codes[a]))
+    suspicious_pairs = []
+    for i, j in zip(a[order].tolist(), b[order].tolist()):
+        d1, d2 = divider[i], divider[j]
+        suspicious_pairs.append({
+            "tile_id": tile_id,
+            "link1": int(link_ids[i]),
+            "link2": int(link_ids[j]),
+            "st_name": names[name_codes[i]],
+            "MULTIDIGIT_link1": multidigit[i],
+            "MULTIDIGIT_link2": multidigit[j],
+            "DIVIDER_link1": d1,
+            "DIVIDER_link2": d2,
+            "note": "unverified_divider" if (d1 != "Y" and d2 != "Y") else "confirmed_divider"
+        })
+    return suspicious_pairs
+
+def find_suspicious_chain_pairs(merged, tile_id, angle_tol_deg=20, min_dist=3, max_dist=80, min_length=40):
+    """
+    Igual que find_suspicious_pairs pero sobre el grafo de links: los links
+    consecutivos del mismo ST_NAME y MULTIDIGIT se unen en cadenas y se emparejan
+    cadena con cadena (calzadas paralelas en sentidos opuestos según DIR_TRAVEL),
+    comparando rumbos por segmento, así que las calzadas curvas también salen.
+    min_length aplica a la cadena, no a cada link. Se reportan los pares de links
+    de las cadenas emparejadas con al menos un MULTIDIGIT=N, con el mismo formato
+    y orden que find_suspicious_pairs.
+    """
+    merged = merged.reset_index(drop=True)
+    if len(merged) == 0:
+        return []
+    name_codes, names = pd.factorize(merged["ST_NAME"], sort=True)
+    divider = merged["DIVIDER"].to_numpy()
+    multidigit = merged["MULTIDIGIT"].to_numpy()
+    link_ids = merged["link_id"].to_numpy()
+    is_y = multidigit == "Y"
+
+    travel = ref_first = None
+    if "DIR_TRAVEL" in merged and "ref_first" in merged:
+        travel = travel_codes(merged["DIR_TRAVEL"])
+        ref_first = merged["ref_first"].to_numpy()
+    elif "DIR_TRAVEL" in merged and "geometry_ll" in merged:
+        travel = travel_codes(merged["DIR_TRAVEL"])
+        ref_first = line_reference_first(merged["geometry_ll"].to_numpy())
+    graph = LinkGraph(merged.geometry.to_numpy(), travel, ref_first)
+    chains = graph.chains(name_codes * 2 + is_y)
+    matches = graph.parallel_chains(chains, multidigit == "N", np.ones(len(merged), dtype=bool), name_codes,
+                                    max_dist=max_dist, min_dist=min_dist, angle_tol_deg=angle_tol_deg)
+
+    # Un par N–N sale en ambos sentidos: se deja una vez como (a, b) con a < b
+    a = np.minimum(matches.link_a, matches.link_b)
+    b = np.maximum(matches.link_a, matches.link_b)
+    codes = np.unique(a * len(merged) + b)
+    a, b = codes // len(merged), codes % len(merged)
+
+    # Tolerar cadenas cortas si alguno tiene DIVIDER
+    chain_len = np.bincount(chains, weights=graph.length)
+    short = (chain_len[chains[a]] < min_length) | (chain_len[chains[b]] < min_length)
+    keep = ~short | (divider[a] == "Y") | (divider[b] == "Y")
+    a, b = a[keep], b[keep]
+
+    order = np.lexsort((b, a, name_codes[a]))
+    suspicious_pairs = []
+    for i, j in zip(a[order].tolist(), b[order].tolist()):
+        d1, d2 = divider[i], divider[j]
+        suspicious_pairs.append({
+            "tile_id": tile_id,
+            "link1": int(link_ids[i]),
+            "link2": int(link_ids[j]),
+            "st_name": names[name_codes[i]],
+            "MULTIDIGIT_link1": multidigit[i],
+            "MULTIDIGIT_link2": multidigit[j],
+            "DIVIDER_link1": d1,
+            "DIVIDER_link2": d2,
+            "note": "unverified_divider" if (d1 != "Y" and d2 != "Y") else "confirmed_divider"
+        })
+    return suspicious_pairs
+
+if __name__ == "__main__":
+    TILE_ID = 4815075  # cámbialo según el tile a probar
+    # --chains: emparejar cadenas del grafo de links en vez de pares de links
+    results = find_multidigit_errors(TILE_ID, config.DATA_DIR, chains="--chains" in sys.argv)
+
+    print(f"[INFO] Found {len(results)} suspicious MULTIDIGIT pairs in tile {TILE_ID}")
+    for r in results[:10]:
+        print(f"  → {r['link1']} ⬌ {r['link2']} ({r['st_name']}) [{r['note']}]")
+
+    # Exportar resultados
+    out_path = output_path(f"multidigit_candidates_{TILE_ID}.json")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Exported to {out_path}")